@@ -3,14 +3,37 @@ Streamlit frontend for "Exam Hall Seat Allocator and Checker"
 """
 
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
 import mysql.connector
 from mysql.connector import errorcode
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from datetime import datetime
+from functools import partial
+import atexit
 import os
+import re
+import tempfile
+import threading
+import time
 from dotenv import load_dotenv
-from io import StringIO
+from io import StringIO, BytesIO
+import hashlib
+import json
+import sys
+from collections import deque
+
+from migrations.migrate import migrate, migration_status
+from seat_allocator import allocation as allocator
+from seat_allocator.adhoc import ADHOC_EXPORT_MAX_ROWS, ADHOC_MAX_COST, ADHOC_MAX_ROWS, ADHOC_TIMEOUT_MS, \
+    adhoc_cursor, check_select, explain_select, export_csv, export_snapshot_csv, snapshot_cursor
+from seat_allocator.db import Database, POOL_CONFIG, reserve_id_block
+from seat_allocator.engine import ALLOCATION_RULES
+from seat_allocator.grid import load_hall_grid, row_label
+from seat_allocator.lookup import LOOKUP_REFRESH_SECONDS, SeatIndex
+from seat_allocator.reporting import SEAT_CELL, render_seat_map_html
+from seat_allocator.snapshot import load_manifest, snapshot_connection
 
 load_dotenv()  # optional .env
 
@@ -28,83 +51,376 @@ st.write("ACTIVE DB CONFIG:", DB_CONFIG)
 
 
 
+# ------------------ CONNECTION POOL ------------------
+# The pool and the query helpers live in seat_allocator.db, shared with the CLI.
+@st.cache_resource
+def get_db():
+    return Database(DB_CONFIG, POOL_CONFIG, on_call=_record_call)
+
+def get_pool():
+    return get_db().pool
+
 @contextmanager
 def get_conn():
-    conn = None
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        yield conn
+        with get_db().connection() as conn:
+            yield conn
     except mysql.connector.Error as e:
         st.error(f"Database error: {e}")
         st.stop()
+
+# ---------- INSTRUMENTATION ----------
+PERF_LOG_SIZE = int(os.getenv("PERF_LOG_SIZE", "5000"))
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# optional JSON-lines file every DB call and page render is appended to (in batches, see PerfLog)
+PERF_METRICS_FILE = os.getenv("PERF_METRICS_FILE", "")
+# DB helpers skipped when looking for the caller of a query
+DB_HELPERS = {"run_select", "run_query", "cached_select", "reload_table", "fetch_row", "table_columns",
+              "select", "execute", "_record_call", "_caller", "_fetch_cached", "load_page_data", "snapshot_select"}
+
+
+class PerfLog:
+    """
+    Process-wide ring buffer of DB calls (latency, rows, bytes, page and
+    calling function) and page renders, shared by every session. Records
+    are dicts; the Performance page aggregates them. With `metrics_file`
+    records are also appended to it as JSON lines, in batches: at the end of
+    every page render, every `flush_every` records and at exit. Recording
+    only appends to memory; serialising and writing happen in flush(),
+    outside the lock recorders take.
+    """
+
+    def __init__(self, size=5000, metrics_file=None, flush_every=500):
+        self.metrics_file = metrics_file
+        self.flush_every = flush_every
+        self._calls = deque(maxlen=size)
+        self._pages = deque(maxlen=size)
+        self._unwritten = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # keeps batches in order in the file
+        if metrics_file:
+            atexit.register(self.flush)
+
+    def _append(self, buffer, rec, flush=False):
+        with self._lock:
+            buffer.append(rec)
+            if not self.metrics_file:
+                return
+            self._unwritten.append(rec)
+            flush = flush or len(self._unwritten) >= self.flush_every
+        if flush:
+            self.flush()
+
+    def flush(self):
+        """Append the records not yet written to the metrics file."""
+        with self._write_lock:
+            with self._lock:
+                recs, self._unwritten = self._unwritten, []
+            if recs:
+                with open(self.metrics_file, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(rec, default=str) + "\n" for rec in recs))
+
+    def record_call(self, rec):
+        self._append(self._calls, {"type": "db", **rec})
+
+    def record_page(self, rec):
+        self._append(self._pages, {"type": "page", **rec}, flush=True)
+
+    def calls(self):
+        with self._lock:
+            return list(self._calls)
+
+    def pages(self):
+        with self._lock:
+            return list(self._pages)
+
+    def reset(self):
+        with self._lock:
+            self._calls.clear()
+            self._pages.clear()
+
+
+class PageContext:
+    """
+    The page being rendered and the DB calls it made so far. Cached like the
+    PerfLog: the Database cached by get_db() keeps the _record_call of the
+    run that created it, and every rerun executes the script in a fresh
+    namespace, so per-run globals would never see those calls.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()      # load_page_data workers record calls concurrently
+        self.local = threading.local()    # .caller: the page query a load_page_data worker is running
+        self.start(None)
+
+    def start(self, page):
+        with self.lock:
+            self.page, self.calls, self.db_ms, self.data_ms = page, 0, 0.0, 0.0
+
+    def add_call(self, ms):
+        with self.lock:
+            self.calls += 1
+            self.db_ms += ms
+
+    def add_wait(self, ms):
+        with self.lock:
+            self.data_ms += ms
+
+
+@st.cache_resource
+def get_perf_log():
+    return PerfLog(PERF_LOG_SIZE, PERF_METRICS_FILE or None)
+
+@st.cache_resource
+def get_page_context():
+    return PageContext()
+
+def _caller():
+    """('function:line', helper) of the nearest frame outside the DB helpers and the last helper it went through."""
+    loader_caller = getattr(get_page_context().local, "caller", None)
+    if loader_caller:
+        return loader_caller, "load_page_data"
+    frame, via = sys._getframe(1), None
+    while frame and frame.f_code.co_name in DB_HELPERS:
+        if frame.f_code.co_name not in ("_record_call", "_caller"):
+            via = frame.f_code.co_name
+        frame = frame.f_back
+    return (f"{frame.f_code.co_name}:{frame.f_lineno}" if frame else "?"), via
+
+def _record_call(kind, query, started, rows=None, nbytes=None):
+    ms = (time.perf_counter() - started) * 1000
+    caller, via = _caller()
+    context = get_page_context()
+    context.add_call(ms)
+    get_perf_log().record_call({"at": datetime.now(), "page": context.page, "caller": caller, "via": via,
+                                "kind": kind, "sql": " ".join(query.split())[:300], "ms": round(ms, 3),
+                                "rows": rows, "bytes": nbytes})
+
+def timed_page(render):
+    """Run a page function and record its render time and the DB calls it made (also when it calls st.stop())."""
+    context = get_page_context()
+    context.start(page)
+    started = time.perf_counter()
+    try:
+        render()
     finally:
-        if conn:
-            conn.close()
+        get_perf_log().record_page({"at": datetime.now(), "page": page,
+                                    "ms": round((time.perf_counter() - started) * 1000, 3),
+                                    "db_calls": context.calls, "db_ms": round(context.db_ms, 3),
+                                    "data_ms": round(context.data_ms, 3)})
 
 def run_select(query, params=None):
-    with get_conn() as conn:
-        df = pd.read_sql(query, conn, params=params)
-    return df
+    try:
+        return get_db().select(query, params)
+    except mysql.connector.Error as e:
+        st.error(f"Database error: {e}")
+        st.stop()
 
 def run_query(query, params=None, commit=True):
     """
     Execute a query (INSERT, UPDATE, DELETE, CALL procedure, etc.)
     Returns results for procedures, None for DML statements.
     """
-    with get_conn() as conn:
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute(query, params or ())
-            
-            # Check if it's a stored procedure call
-            if query.strip().lower().startswith("call"):
-                results = []
-                
-                # Fetch results from the first result set (if any)
-                try:
-                    results = cursor.fetchall()
-                except mysql.connector.Error:
-                    # No results in first set, that's okay
-                    pass
-                
-                # CRITICAL: Consume all remaining result sets
-                while cursor.nextset():
-                    try:
-                        cursor.fetchall()  # Consume but don't store
-                    except mysql.connector.Error:
-                        pass
-                
-                if commit:
-                    conn.commit()
-                
-                return results if results else None
-            
-            else:
-                # Regular DML query (INSERT, UPDATE, DELETE, DDL)
-                if commit:
-                    conn.commit()
-                
-                # Try to fetch results (for SELECT-like queries)
-                try:
-                    return cursor.fetchall()
-                except mysql.connector.Error as e:
-                    # Expected for INSERT/UPDATE/DELETE which don't return results
-                    if e.errno == mysql.connector.errorcode.CR_NO_RESULT_SET:
-                        return None
-                    else:
-                        raise
-                        
-        except mysql.connector.Error as e:
-            st.error(f"Database error: {e}")
-            raise
-        finally:
-            cursor.close()
+    try:
+        result = get_db().execute(query, params, commit)
+    except mysql.connector.Error as e:
+        st.error(f"Database error: {e}")
+        raise
+    if commit:
+        invalidate_tables(written_tables(query))
+    return result
+
+
+# ---------- QUERY CACHE ----------
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "60"))
+
+# Tables whose rows change when a table is written, via triggers or FK cascades
+TABLE_DEPENDENTS = {
+    "students": ("allocations",),
+    "exams": ("hall_assignments", "allocations", "exam_hall_stats"),
+    "halls": ("seats", "hall_assignments", "exam_hall_stats"),
+    "seats": ("allocations", "exam_hall_stats"),
+    "invigilators": ("hall_assignments", "seat_checks", "allocations"),
+    "hall_assignments": ("invigilators", "exam_hall_stats"),
+    "allocations": ("seat_checks", "exam_hall_stats"),
+    "seat_checks": ("allocations", "exam_hall_stats"),
+}
+# Tables written by the stored procedures; unknown procedures invalidate everything
+PROCEDURE_WRITES = {
+    "allocate_student_to_seat": ("allocations",),
+    "remove_allocation": ("allocations",),
+    "auto_allocate_exam": ("allocations",),
+    "sync_id_sequences": ("id_sequences",),
+    "rebuild_exam_hall_stats": ("exam_hall_stats",),
+    "transition_hall_checks": ("seat_checks",),
+}
+READ_TABLES_RE = re.compile(r"\b(?:FROM|JOIN)\s+`?(\w+)`?", re.I)
+WRITE_TABLE_RE = re.compile(r"^\s*(?:INSERT\s+(?:IGNORE\s+)?INTO|REPLACE\s+INTO|UPDATE|DELETE\s+FROM|"
+                            r"TRUNCATE(?:\s+TABLE)?|ALTER\s+TABLE|DROP\s+TABLE(?:\s+IF\s+EXISTS)?)\s+`?(\w+)`?", re.I)
+# Statements that change table definitions, and so the column lists cached from information_schema
+SCHEMA_CHANGE_RE = re.compile(r"^\s*(?:ALTER|CREATE|DROP|RENAME)\s+(?:TEMPORARY\s+)?TABLE\b", re.I)
+CALL_RE = re.compile(r"^\s*CALL\s+`?(\w+)`?", re.I)
+
+
+class QueryCache:
+    """
+    Process-wide cache of SELECT results keyed by (query, params). Every entry
+    records the tables it reads; writing to a table drops the entries that read
+    it. Entries also expire after `ttl` seconds as a safety net for writes made
+    outside the app. A read that overlaps an invalidation of one of its tables
+    may have seen the old rows, so `put` refuses results read before it (see
+    generations()).
+    """
+
+    def __init__(self, ttl=60.0):
+        self.ttl = ttl
+        self._entries = {}   # key -> (df, tables, expires_at)
+        self._by_table = {}  # table -> set of keys
+        self._generations = {}  # table -> invalidations so far
+        self._epoch = 0         # clear() calls so far
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {"hits": 0, "misses": 0, "expired": 0, "invalidations": 0, "entries_dropped": 0,
+                          "stale_puts": 0}
+            self.table_stats = {}
+
+    def _count(self, tables, key):
+        for t in tables:
+            self.table_stats.setdefault(t, {"hits": 0, "misses": 0, "invalidations": 0})[key] += 1
+
+    def get(self, key, tables):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[2] < time.monotonic():
+                self._drop(key)
+                self.stats["expired"] += 1
+                entry = None
+            self.stats["hits" if entry else "misses"] += 1
+            self._count(tables, "hits" if entry else "misses")
+            return entry[0] if entry else None
+
+    def _generation(self, tables):
+        return self._epoch, tuple(self._generations.get(t, 0) for t in tables)
+
+    def generations(self, tables):
+        """Token to take before reading `tables` from the database and to pass to put()."""
+        with self._lock:
+            return self._generation(tables)
+
+    def put(self, key, tables, df, ttl=None, generations=None):
+        """Cache `df`, unless `tables` were invalidated since `generations` was taken (then the result may be stale)."""
+        with self._lock:
+            if generations is not None and generations != self._generation(tables):
+                self.stats["stale_puts"] += 1
+                return
+            self._entries[key] = (df, tables, time.monotonic() + (self.ttl if ttl is None else ttl))
+            for t in tables:
+                self._by_table.setdefault(t, set()).add(key)
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry:
+            for t in entry[1]:
+                self._by_table.get(t, set()).discard(key)
+            self.stats["entries_dropped"] += 1
+
+    def invalidate(self, tables):
+        with self._lock:
+            for t in tables:
+                self._generations[t] = self._generations.get(t, 0) + 1
+                for key in list(self._by_table.pop(t, ())):
+                    self._drop(key)
+            self.stats["invalidations"] += 1
+            self._count(tables, "invalidations")
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self._by_table.clear()
+
+    def snapshot(self):
+        with self._lock:
+            snap = dict(self.stats)
+            snap["entries"] = len(self._entries)
+            tables = {t: dict(v) for t, v in self.table_stats.items()}
+        lookups = snap["hits"] + snap["misses"]
+        snap["hit_rate"] = snap["hits"] / lookups if lookups else 0.0
+        return snap, tables
+
+
+@st.cache_resource
+def get_query_cache():
+    return QueryCache(ttl=QUERY_CACHE_TTL)
+
+def written_tables(query):
+    """Tables a statement writes directly; None when unknown (treat as every table)."""
+    call = CALL_RE.match(query)
+    if call:
+        return PROCEDURE_WRITES.get(call.group(1).lower())
+    m = WRITE_TABLE_RE.match(query)
+    if SCHEMA_CHANGE_RE.match(query):
+        return ((m.group(1).lower(),) if m else ()) + ("information_schema",)
+    if not m:
+        return ()
+    tables = {m.group(1).lower()}
+    if re.match(r"^\s*(UPDATE|DELETE)\b", query, re.I):
+        tables |= {t.lower() for t in READ_TABLES_RE.findall(query)}
+    return tuple(tables)
+
+def invalidate_tables(tables):
+    """
+    Drop cached results that read any of `tables` or of the tables their
+    triggers/cascades touch; None drops everything. run_query calls this after
+    each commit; call it yourself after committing on a connection from get_conn().
+    """
+    cache = get_query_cache()
+    if tables is None:
+        cache.clear()
+        get_hall_grid.clear()
+        return
+    affected, todo = set(), list(tables)
+    while todo:
+        t = todo.pop()
+        if t not in affected:
+            affected.add(t)
+            todo.extend(TABLE_DEPENDENTS.get(t, ()))
+    if not affected:
+        return
+    cache.invalidate(sorted(affected))
+    if {"seats", "halls"} & affected:
+        get_hall_grid.clear()
+
+def _fetch_cached(cache, db, query, params=None, tables=None, ttl=None):
+    """cached_select without Streamlit calls, so worker threads can run it; raises mysql.connector.Error."""
+    tables = tuple(sorted({t.lower() for t in (tables or READ_TABLES_RE.findall(query))}))
+    key = (query, tuple(params) if params else ())
+    started = time.perf_counter()
+    df = cache.get(key, tables)
+    if df is None:
+        generations = cache.generations(tables)
+        df = db.select(query, params)
+        cache.put(key, tables, df, ttl, generations)
+    else:
+        _record_call("cache hit", query, started, len(df))
+    # shallow copy: callers may add or drop columns without touching the cached frame
+    return df.copy(deep=False)
+
+def cached_select(query, params=None, tables=None, ttl=None):
+    """run_select through the query cache. `tables` defaults to the tables named after FROM/JOIN."""
+    try:
+        return _fetch_cached(get_query_cache(), get_db(), query, params, tables, ttl)
+    except mysql.connector.Error as e:
+        st.error(f"Database error: {e}")
+        st.stop()
 
 
 # ---------- HELPERS ----------
 def reload_table(table_name):
-    return run_select(f"SELECT * FROM {table_name} ORDER BY 1")
+    return cached_select(f"SELECT * FROM {table_name} ORDER BY 1", tables=(table_name,))
 
 def safe_int(x):
     try:
@@ -112,6 +428,291 @@ def safe_int(x):
     except:
         return None
 
+def reserve_ids(table, count=1):
+    """First of `count` consecutive primary keys reserved for `table` (see Database.reserve_ids)."""
+    return get_db().reserve_ids(table, count)
+
+def advance_id_sequence(conn, table, used_id):
+    """
+    Move the sequence of `table` past an id that was inserted explicitly (never
+    backwards), on the caller's connection. Commits, like reserve_id_block.
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute("UPDATE id_sequences SET next_id = GREATEST(next_id, %s) WHERE seq_name = %s",
+                    (used_id + 1, table))
+        conn.commit()
+    finally:
+        cur.close()
+
+# ---------- SEAT GRID ----------
+@st.cache_resource(ttl=600, show_spinner=False)
+def get_hall_grid(hall_id):
+    """Cached HallGrid for a hall; cleared by invalidate_tables() whenever seats or halls are written."""
+    return load_hall_grid(get_db(), hall_id)
+
+# ---------- PAGE DATA ----------
+# Threads shared by every session; half the connection pool, so concurrent
+# page loads never starve the rest of the app of connections
+PAGE_DATA_WORKERS = int(os.getenv("PAGE_DATA_WORKERS", str(max(1, POOL_CONFIG["size"] // 2))))
+
+@st.cache_resource
+def get_page_data_executor():
+    return ThreadPoolExecutor(PAGE_DATA_WORKERS, thread_name_prefix="page-data")
+
+def _load_one(context, caller, load):
+    context.local.caller = caller
+    try:
+        return load()
+    finally:
+        context.local.caller = None
+
+def load_page_data(specs):
+    """
+    Run the independent reads of a page concurrently; returns {name: result}
+    in the order of `specs`. A spec is a table name (as reload_table),
+    (query, params[, tables[, ttl]]) (as cached_select), or a callable that
+    makes no Streamlit calls, such as lambda: get_hall_grid(h). Queries go through the query
+    cache on pooled connections, so the page waits for the slowest read
+    instead of the sum of them. Each read is logged as '<page function>[name]'
+    on the Performance page, and the wait as the page's data_ms.
+    """
+    caller, _ = _caller()
+    cache, db, executor, context = get_query_cache(), get_db(), get_page_data_executor(), get_page_context()
+    loads = {}
+    for name, spec in specs.items():
+        if isinstance(spec, str):
+            spec = (f"SELECT * FROM {spec} ORDER BY 1", None, (spec,))
+        if callable(spec):
+            loads[name] = spec
+        else:
+            query, params, tables, ttl = (tuple(spec) + (None, None))[:4]
+            loads[name] = lambda q=query, p=params, t=tables, ttl=ttl: _fetch_cached(cache, db, q, p, t, ttl)
+    started = time.perf_counter()
+    futures = {name: executor.submit(_load_one, context, f"{caller}[{name}]", load) for name, load in loads.items()}
+    try:
+        return {name: f.result() for name, f in futures.items()}
+    except mysql.connector.Error as e:
+        st.error(f"Database error: {e}")
+        st.stop()
+    finally:
+        context.add_wait((time.perf_counter() - started) * 1000)
+
+# ---------- ANALYTICS SNAPSHOT ----------
+# Parquet snapshot written by `python -m seat_allocator snapshot --out <dir>`;
+# when set, the dashboard and the ad-hoc query box can read it with DuckDB
+# instead of querying the live tables
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "")
+
+@st.cache_resource(max_entries=1)
+def get_snapshot_connection(out_dir, seq):
+    """DuckDB views over snapshot `seq`; a newer export replaces the cached connection."""
+    return snapshot_connection(out_dir)
+
+def snapshot_manifest():
+    """Manifest of the snapshot in SNAPSHOT_DIR, or None when there is none."""
+    return load_manifest(SNAPSHOT_DIR) if SNAPSHOT_DIR else None
+
+def get_snapshot_db():
+    """DuckDB connection to the latest snapshot; stops the page with an error when there is none."""
+    manifest = snapshot_manifest()
+    if manifest is None:
+        st.error(f"No snapshot in {SNAPSHOT_DIR or '(SNAPSHOT_DIR is not set)'}.")
+        st.stop()
+    try:
+        return get_snapshot_connection(SNAPSHOT_DIR, manifest["seq"])
+    except ImportError:
+        st.error("Reading snapshots needs DuckDB: pip install duckdb pyarrow")
+        st.stop()
+
+def snapshot_select(query, params=None):
+    """Run a DuckDB query (? placeholders) on the latest snapshot and return a DataFrame."""
+    con = get_snapshot_db()
+    started = time.perf_counter()
+    # a cursor per call: one DuckDB connection must not be used by two sessions at once
+    df = con.cursor().execute(query, params or []).df()
+    _record_call("snapshot", query, started, len(df), int(df.memory_usage(index=False, deep=True).sum()))
+    return df
+
+# ---------- PAGED TABLES & TYPEAHEAD ----------
+TABLE_KEYS = {
+    "students": "student_id",
+    "exams": "exam_id",
+    "halls": "hall_id",
+    "seats": "seat_id",
+    "invigilators": "invigilator_id",
+    "hall_assignments": "assignment_id",
+    "allocations": "allocation_id",
+    "seat_checks": "check_id",
+}
+NUMERIC_TYPES = {"tinyint", "smallint", "mediumint", "int", "bigint", "decimal", "float", "double"}
+SEARCH_LIMIT = 20
+# entity -> (SELECT id, label ..., id column, indexed columns matched by prefix)
+SEARCH_SPECS = {
+    "students": ("SELECT student_id AS id, CONCAT(srn, ' — ', full_name) AS label FROM students",
+                 "student_id", ["srn"]),
+    "exams": ("SELECT exam_id AS id, CONCAT(course_code, ' — ', course_name, ' (', exam_date, ')') AS label FROM exams",
+              "exam_id", ["course_code"]),
+    "seats": ("SELECT se.seat_id AS id, CONCAT(h.hall_name, ' ', se.seat_number) AS label "
+              "FROM seats se JOIN halls h ON h.hall_id = se.hall_id",
+              "se.seat_id", ["h.hall_name"]),
+    "allocations": ("SELECT a.allocation_id AS id, CONCAT('#', a.allocation_id, ' ', COALESCE(s.srn, '(no student)'), "
+                    "' — exam ', a.exam_id, ', seat ', a.seat_id) AS label "
+                    "FROM allocations a LEFT JOIN students s ON s.student_id = a.student_id",
+                    "a.allocation_id", ["s.srn"]),
+}
+
+Q_TABLE_COLUMNS = """SELECT COLUMN_NAME AS name, DATA_TYPE AS type, IS_NULLABLE = 'YES' AS nullable
+                     FROM information_schema.COLUMNS
+                     WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+                     ORDER BY ORDINAL_POSITION"""
+
+Q_SCHEMA_VERSION = "SELECT COALESCE(MAX(version), 0) AS version FROM schema_migrations"
+
+@st.cache_resource
+def get_seen_schema_version():
+    return {"version": None}
+
+def check_schema_version():
+    """
+    Drop the cached column lists when the latest applied migration changed,
+    e.g. after migrate.py ran outside the app. The version is read through
+    the query cache, so such a change shows up within QUERY_CACHE_TTL.
+    A database without schema_migrations counts as version 0.
+    """
+    try:
+        version = int(_fetch_cached(get_query_cache(), get_db(), Q_SCHEMA_VERSION, tables=("schema_migrations",)).iloc[0, 0])
+    except mysql.connector.Error:
+        version = 0
+    seen = get_seen_schema_version()
+    if seen["version"] != version:
+        if seen["version"] is not None:
+            invalidate_tables(("information_schema",))
+        seen["version"] = version
+
+def table_columns(table):
+    """
+    Column name, type and nullability of a table, cached for an hour or until
+    a schema change through run_query or a new migration version.
+    """
+    check_schema_version()
+    return cached_select(Q_TABLE_COLUMNS, params=(table,), tables=("information_schema",), ttl=3600)
+
+def _py(value):
+    """numpy/pandas scalar -> plain Python value the MySQL driver accepts."""
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if isinstance(value, pd.Timedelta):
+        return value.to_pytimedelta()
+    return value.item() if hasattr(value, "item") else value
+
+def paged_table(table, key, page_sizes=(25, 50, 100, 250)):
+    """
+    Show `table` one page at a time. Filtering and sorting run in MySQL, and
+    pages use keyset pagination on (sort column, primary key), so each page
+    costs one indexed range read of page_size + 1 rows however deep you go.
+    Sorting is offered on NOT NULL columns only, which keeps the keyset exact.
+    Returns the rows on screen.
+    """
+    cols = table_columns(table)
+    pk = TABLE_KEYS[table]
+    names = cols["name"].tolist()
+    sortable = [pk] + [c for c, nullable in zip(cols["name"], cols["nullable"]) if not nullable and c != pk]
+    f1, f2, f3, f4, f5 = st.columns([2, 2, 2, 1, 1])
+    filter_col = f1.selectbox("Filter column", [None] + names, key=f"{key}_fcol")
+    filter_val = f2.text_input("Filter value (numbers exact, text by prefix)", key=f"{key}_fval").strip()
+    sort_col = f3.selectbox("Sort by", sortable, key=f"{key}_sort")
+    desc = f4.checkbox("Desc", key=f"{key}_desc")
+    page_size = f5.selectbox("Rows", page_sizes, key=f"{key}_size")
+
+    where, params = [], []
+    if filter_col and filter_val:
+        if cols.loc[cols["name"] == filter_col, "type"].iloc[0] in NUMERIC_TYPES:
+            where.append(f"`{filter_col}` = %s")
+            params.append(filter_val)
+        else:
+            where.append(f"`{filter_col}` LIKE %s")
+            params.append(filter_val.replace("%", "\\%").replace("_", "\\_") + "%")
+
+    state_key = f"{key}_pages"
+    signature = (filter_col, filter_val, sort_col, desc, page_size)
+    state = st.session_state.get(state_key)
+    if not state or state["sig"] != signature:
+        # cursors[i] is the (sort value, pk) of the last row before page i+1
+        state = {"sig": signature, "cursors": [None]}
+        st.session_state[state_key] = state
+
+    page_where, page_params = list(where), list(params)
+    cursor = state["cursors"][-1]
+    op = "<" if desc else ">"
+    if cursor is not None:
+        if sort_col == pk:
+            page_where.append(f"`{pk}` {op} %s")
+            page_params.append(cursor[1])
+        else:
+            page_where.append(f"(`{sort_col}` {op} %s OR (`{sort_col}` = %s AND `{pk}` {op} %s))")
+            page_params += [cursor[0], cursor[0], cursor[1]]
+    direction = " DESC" if desc else ""
+    order_by = f"`{sort_col}`{direction}" + ("" if sort_col == pk else f", `{pk}`{direction}")
+    q = (f"SELECT * FROM `{table}`" + (" WHERE " + " AND ".join(page_where) if page_where else "")
+         + f" ORDER BY {order_by} LIMIT {int(page_size) + 1}")
+    df = cached_select(q, params=page_params, tables=(table,))
+    has_next = len(df) > page_size
+    df = df.iloc[:page_size]
+    st.dataframe(df)
+
+    page_no = len(state["cursors"])
+    n1, n2, n3, n4 = st.columns([1, 1, 1, 3])
+    if n1.button("⏮ First", key=f"{key}_first", disabled=page_no == 1):
+        state["cursors"] = [None]
+        st.rerun()
+    if n2.button("◀ Prev", key=f"{key}_prev", disabled=page_no == 1):
+        state["cursors"].pop()
+        st.rerun()
+    if n3.button("Next ▶", key=f"{key}_next", disabled=not has_next):
+        last = df.iloc[-1]
+        state["cursors"].append((_py(last[sort_col]), _py(last[pk])))
+        st.rerun()
+    caption = f"Page {page_no} · {len(df)} rows"
+    if n4.checkbox("Count matching rows", key=f"{key}_count"):
+        count_q = f"SELECT COUNT(*) AS n FROM `{table}`" + (" WHERE " + " AND ".join(where) if where else "")
+        caption += f" of {int(cached_select(count_q, params=params, tables=(table,)).iloc[0, 0])}"
+    n4.caption(caption)
+    return df
+
+def search_select(label, entity, key):
+    """
+    Typeahead replacement for a selectbox listing every id: type an id, or the
+    start of an indexed column (e.g. an SRN), and pick from the first matches.
+    Returns the chosen id or None.
+    """
+    base, id_col, prefix_cols = SEARCH_SPECS[entity]
+    text = st.text_input(label, key=f"{key}_q", placeholder="id or " + " / ".join(c.split(".")[-1] for c in prefix_cols) + " prefix").strip()
+    if not text:
+        return None
+    conds, params = [], []
+    if text.isdigit():
+        conds.append(f"{id_col} = %s")
+        params.append(int(text))
+    for col in prefix_cols:
+        conds.append(f"{col} LIKE %s")
+        params.append(text.replace("%", "\\%").replace("_", "\\_") + "%")
+    # one indexed branch per condition: an OR across joined tables (id on one,
+    # prefix on the other) cannot use either index and scans the whole join
+    branches = [f"({base} WHERE {c} ORDER BY 1 LIMIT {SEARCH_LIMIT})" for c in conds]
+    matches = cached_select(" UNION ".join(branches) + f" ORDER BY id LIMIT {SEARCH_LIMIT}", params=params)
+    if matches.empty:
+        st.caption("No matches.")
+        return None
+    labels = dict(zip(matches["id"], matches["label"]))
+    return st.selectbox(f"Matches ({len(matches)}{'+' if len(matches) == SEARCH_LIMIT else ''})",
+                        options=list(labels), format_func=lambda i: f"{i} · {labels[i]}", key=f"{key}_pick")
+
+def fetch_row(table, row_id):
+    """One row of `table` by primary key as a dict (None if gone)."""
+    df = cached_select(f"SELECT * FROM `{table}` WHERE `{TABLE_KEYS[table]}` = %s", params=(row_id,), tables=(table,))
+    return df.iloc[0].to_dict() if not df.empty else None
+
 # ---------- UI: Sidebar Navigation ----------
 st.sidebar.title("Exam Hall Seat Allocator")
 page = st.sidebar.radio("Navigate", [
@@ -119,14 +720,18 @@ page = st.sidebar.radio("Navigate", [
     "Students",
     "Exams",
     "Halls & Seats",
+    "Bulk Import",
     "Invigilators",
     "Hall Assignments",
     "Allocations",
     "Seat Checks",
     "Auto-Allocate",
+    "Batch Allocate",
     "Seat Map",
+    "Seat Lookup",
     "Queries & Procedures",
     "Dashboard",
+    "Performance",
     "DB Admin"
 ])
 
@@ -150,7 +755,6 @@ def students_ui():
     with col1:
         st.subheader("Add student")
         with st.form("add_student"):
-            sid = st.number_input("student_id (int)", min_value=1, step=1)
             srn = st.text_input("SRN")
             name = st.text_input("Full name")
             dept = st.text_input("Department", value="CSE")
@@ -159,23 +763,24 @@ def students_ui():
             phone = st.text_input("Phone")
             gender = st.selectbox("Gender", ["M", "F", "O"])
             dob = st.date_input("Date of birth")
+            needs_access = st.checkbox("Needs accessible seat")
             submitted = st.form_submit_button("Add student")
             if submitted:
                 try:
-                    q = """INSERT INTO students (student_id, srn, full_name, department, year_of_study, email, phone, gender, dob)
-                           VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)"""
-                    run_query(q, (sid, srn, name, dept, year, email or None, phone or None, gender, dob))
-                    st.success("Student added")
+                    sid = reserve_ids("students")
+                    q = """INSERT INTO students (student_id, srn, full_name, department, year_of_study, email, phone, gender, dob, needs_accessible_seat)
+                           VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)"""
+                    run_query(q, (sid, srn, name, dept, year, email or None, phone or None, gender, dob, int(needs_access)))
+                    st.success(f"Student {sid} added")
                 except Exception as e:
                     st.error(f"Error: {e}")
     with col2:
         st.subheader("Existing students")
-        df = reload_table("students")
-        st.dataframe(df)
+        paged_table("students", "students_tbl")
         st.markdown("**Update / Delete**")
-        sel = st.selectbox("Select student_id to edit/delete", options=[None]+df['student_id'].tolist())
-        if sel:
-            rec = df[df['student_id']==sel].iloc[0].to_dict()
+        sel = search_select("Find student to edit/delete", "students", "student_edit")
+        rec = fetch_row("students", sel) if sel else None
+        if rec:
             with st.form("edit_student"):
                 name = st.text_input("Full name", value=rec.get('full_name',''))
                 dept = st.text_input("Department", value=rec.get('department',''))
@@ -183,11 +788,12 @@ def students_ui():
                 email = st.text_input("Email", value=rec.get('email') or "")
                 phone = st.text_input("Phone", value=rec.get('phone') or "")
                 gender = st.selectbox("Gender", ["M","F","O"], index=["M","F","O"].index(rec.get('gender','O')))
+                needs_access = st.checkbox("Needs accessible seat", value=bool(rec.get('needs_accessible_seat')))
                 submitted2 = st.form_submit_button("Update")
                 if submitted2:
                     try:
-                        q = """UPDATE students SET full_name=%s, department=%s, year_of_study=%s, email=%s, phone=%s, gender=%s WHERE student_id=%s"""
-                        run_query(q, (name, dept, year, email or None, phone or None, gender, sel))
+                        q = """UPDATE students SET full_name=%s, department=%s, year_of_study=%s, email=%s, phone=%s, gender=%s, needs_accessible_seat=%s WHERE student_id=%s"""
+                        run_query(q, (name, dept, year, email or None, phone or None, gender, int(needs_access), sel))
                         st.success("Updated")
                     except Exception as e:
                         st.error(f"Error: {e}")
@@ -199,7 +805,7 @@ def students_ui():
                     st.error(f"Error: {e}")
 
 if page == "Students":
-    students_ui()
+    timed_page(students_ui)
 
 # ---------- EXAMS CRUD ----------
 def exams_ui():
@@ -208,7 +814,6 @@ def exams_ui():
     with col1:
         st.subheader("Add exam")
         with st.form("add_exam"):
-            exam_id = st.number_input("exam_id", min_value=1, step=1)
             code = st.text_input("Course code")
             name = st.text_input("Course name")
             date = st.date_input("Exam date")
@@ -218,19 +823,19 @@ def exams_ui():
             submitted = st.form_submit_button("Add exam")
             if submitted:
                 try:
+                    exam_id = reserve_ids("exams")
                     q = """INSERT INTO exams (exam_id, course_code, course_name, exam_date, start_time, end_time, total_marks)
                            VALUES (%s,%s,%s,%s,%s,%s,%s)"""
                     run_query(q, (exam_id, code, name, date, start, end, marks))
-                    st.success("Exam added")
+                    st.success(f"Exam {exam_id} added")
                 except Exception as e:
                     st.error(f"Error: {e}")
     with col2:
         st.subheader("Existing exams")
-        df = reload_table("exams")
-        st.dataframe(df)
-        sel = st.selectbox("Select exam_id to edit/delete", options=[None]+df['exam_id'].tolist())
-        if sel:
-            rec = df[df['exam_id']==sel].iloc[0].to_dict()
+        paged_table("exams", "exams_tbl")
+        sel = search_select("Find exam to edit/delete", "exams", "exam_edit")
+        rec = fetch_row("exams", sel) if sel else None
+        if rec:
             with st.form("edit_exam"):
                 code = st.text_input("Course code", value=rec.get('course_code',''))
                 name = st.text_input("Course name", value=rec.get('course_name',''))
@@ -254,30 +859,86 @@ def exams_ui():
                     st.error(f"Error: {e}")
 
 if page == "Exams":
-    exams_ui()
+    timed_page(exams_ui)
 
 # ---------- HALLS & SEATS ----------
+def parse_int_list(text):
+    return sorted({int(p) for p in re.split(r"[,\s]+", text or "") if p.strip()})
+
+def seat_layout(rows, seats_per_row, aisles_after=(), accessible=()):
+    """
+    Seat labels for a rows x seats_per_row block: rows A, B, ..., seats numbered
+    from 1. An aisle after seat k skips one number, so the hall grid sees a gap
+    there and the seats either side are not neighbours. `accessible` lists
+    labels (e.g. 'A1') to flag. Returns DataFrame(seat_number, is_accessible).
+    """
+    numbers = [c + sum(1 for a in aisles_after if a < c) for c in range(1, seats_per_row + 1)]
+    labels = [f"{row_label(r)}{n}" for r in range(rows) for n in numbers]
+    wanted = {a.strip().upper() for a in accessible if a.strip()}
+    unknown = wanted - set(labels)
+    if unknown:
+        raise ValueError(f"Accessible seats not in the layout: {', '.join(sorted(unknown))}")
+    return pd.DataFrame({"seat_number": labels, "is_accessible": [l in wanted for l in labels]})
+
+def generate_hall_seats(hall_id, layout, remarks=None, update_capacity=False):
+    """
+    Insert every seat of `layout` (from seat_layout) into a hall in one
+    transaction. Labels the hall already has are skipped. The result must fit
+    halls.capacity unless `update_capacity`, which raises capacity to the new
+    seat count. Returns a summary dict.
+    """
+    started = time.perf_counter()
+    # ids for the whole layout, reserved before the hall row is locked; those of labels that exist are skipped
+    base = reserve_ids("seats", len(layout)) - 1 if len(layout) else 0
+    with get_conn() as conn:
+        cur = conn.cursor(buffered=True)
+        try:
+            cur.execute("SELECT capacity FROM halls WHERE hall_id = %s FOR UPDATE", (hall_id,))
+            row = cur.fetchone()
+            if not row:
+                raise ValueError(f"Hall {hall_id} does not exist")
+            capacity = row[0]
+            cur.execute("SELECT seat_number FROM seats WHERE hall_id = %s", (hall_id,))
+            existing = {r[0].strip().upper() for r in cur.fetchall()}
+            new = layout[~layout["seat_number"].str.upper().isin(existing)]
+            total = len(existing) + len(new)
+            if total > capacity and not update_capacity:
+                raise ValueError(f"Hall {hall_id} would have {total} seats but its capacity is {capacity}")
+            if total != capacity and update_capacity:
+                cur.execute("UPDATE halls SET capacity = %s WHERE hall_id = %s", (total, hall_id))
+                capacity = total
+            params = [(base + i, hall_id, label, int(acc), remarks or None)
+                      for i, (label, acc) in enumerate(zip(new["seat_number"], new["is_accessible"]), start=1)]
+            for i in range(0, len(params), 1000):
+                cur.executemany("INSERT INTO seats (seat_id, hall_id, seat_number, is_accessible, remarks) VALUES (%s,%s,%s,%s,%s)",
+                                params[i:i+1000])
+            conn.commit()
+        finally:
+            cur.close()
+    invalidate_tables(("seats", "halls"))
+    return {"created": len(new), "skipped": len(layout) - len(new), "total": total, "capacity": capacity,
+            "seconds": time.perf_counter() - started}
+
 def halls_seats_ui():
     st.header("Halls & Seats")
     c1, c2 = st.columns([1,2])
     with c1:
         st.subheader("Add hall")
         with st.form("add_hall"):
-            hid = st.number_input("hall_id", min_value=1)
             name = st.text_input("Hall name")
             capacity = st.number_input("Capacity", min_value=1, value=30)
             loc = st.text_input("Location")
             sub = st.form_submit_button("Add hall")
             if sub:
                 try:
+                    hid = reserve_ids("halls")
                     run_query("INSERT INTO halls (hall_id, hall_name, capacity, location) VALUES (%s,%s,%s,%s)",
                               (hid, name, capacity, loc or None))
-                    st.success("Hall added")
+                    st.success(f"Hall {hid} added")
                 except Exception as e:
                     st.error(f"Error: {e}")
         st.subheader("Add seat")
         with st.form("add_seat"):
-            sid = st.number_input("seat_id", min_value=1, step=1, key="seat_id")
             hall_choices = reload_table("halls")
             hall_options = hall_choices['hall_id'].tolist()
             hall_sel = st.selectbox("Select hall_id", options=[None]+hall_options)
@@ -287,10 +948,33 @@ def halls_seats_ui():
             sub2 = st.form_submit_button("Add seat")
             if sub2:
                 try:
+                    sid = reserve_ids("seats")
                     run_query("""INSERT INTO seats (seat_id, hall_id, seat_number, is_accessible, remarks)
                                  VALUES (%s,%s,%s,%s,%s)""",
                               (sid, hall_sel, seat_num, int(accessible), remarks or None))
-                    st.success("Seat added")
+                    st.success(f"Seat {sid} added")
+                except Exception as e:
+                    st.error(f"Error: {e}")
+
+        st.subheader("Generate seats from a layout")
+        with st.form("generate_seats"):
+            gen_hall = st.selectbox("Hall", options=[None]+hall_options, key="gen_hall")
+            g1, g2 = st.columns(2)
+            n_rows = g1.number_input("Rows", min_value=1, max_value=200, value=10)
+            per_row = g2.number_input("Seats per row", min_value=1, max_value=200, value=10)
+            aisles = st.text_input("Aisle after seat (e.g. 4, 8)")
+            accessible_txt = st.text_input("Accessible seats (e.g. A1, A2)")
+            gen_remarks = st.text_input("Remarks for generated seats")
+            fit_capacity = st.checkbox("Set hall capacity to the resulting seat count")
+            sub3 = st.form_submit_button("Generate seats")
+            if sub3:
+                try:
+                    layout = seat_layout(int(n_rows), int(per_row), parse_int_list(aisles), accessible_txt.split(","))
+                    result = generate_hall_seats(gen_hall, layout, gen_remarks, update_capacity=fit_capacity)
+                    st.success(f"Created {result['created']} seats ({result['skipped']} already existed) in "
+                               f"{result['seconds'] * 1000:.0f} ms. Hall now has {result['total']} seats, capacity {result['capacity']}.")
+                    if result["total"] < result["capacity"]:
+                        st.warning("The hall has fewer seats than its capacity.")
                 except Exception as e:
                     st.error(f"Error: {e}")
 
@@ -298,13 +982,12 @@ def halls_seats_ui():
         st.subheader("Halls table")
         st.dataframe(reload_table("halls"))
         st.subheader("Seats table")
-        st.dataframe(reload_table("seats"))
+        paged_table("seats", "seats_tbl")
 
         st.markdown("**Edit or delete seat**")
-        seats_df = reload_table("seats")
-        sel = st.selectbox("Select seat_id", options=[None]+seats_df['seat_id'].tolist())
-        if sel:
-            rec = seats_df[seats_df['seat_id']==sel].iloc[0].to_dict()
+        sel = search_select("Find seat", "seats", "seat_edit")
+        rec = fetch_row("seats", sel) if sel else None
+        if rec:
             with st.form("edit_seat"):
                 seat_number = st.text_input("Seat number", value=rec.get('seat_number'))
                 is_access = st.checkbox("Accessible", value=bool(rec.get('is_accessible')))
@@ -325,7 +1008,315 @@ def halls_seats_ui():
                     st.error(f"Error: {e}")
 
 if page == "Halls & Seats":
-    halls_seats_ui()
+    timed_page(halls_seats_ui)
+
+# ---------- BULK IMPORT ----------
+IMPORT_CHUNK_ROWS = 5000
+IMPORT_MAX_REPORTED_ERRORS = 10000
+# column -> (kind, required, max length); ids may be left out and are then assigned
+IMPORT_SPECS = {
+    "students": {
+        "columns": {
+            "student_id": ("int", False, None),
+            "srn": ("str", True, 20),
+            "full_name": ("str", True, 100),
+            "department": ("str", True, 50),
+            "year_of_study": ("int", True, None),
+            "email": ("str", False, 150),
+            "phone": ("str", False, 20),
+            "gender": ("str", False, 1),
+            "dob": ("date", False, None),
+            "needs_accessible_seat": ("bool", False, None),
+        },
+        "unique": [("srn",), ("email",)],
+        "ranges": {"year_of_study": (1, 8)},
+        "choices": {"gender": ("M", "F", "O")},
+        "defaults": {"gender": "O", "needs_accessible_seat": False},
+        "references": {},
+    },
+    "halls": {
+        "columns": {
+            "hall_id": ("int", False, None),
+            "hall_name": ("str", True, 100),
+            "capacity": ("int", True, None),
+            "location": ("str", False, 150),
+        },
+        "unique": [("hall_name",)],
+        "ranges": {"capacity": (1, None)},
+        "choices": {},
+        "defaults": {},
+        "references": {},
+    },
+    "seats": {
+        "columns": {
+            "seat_id": ("int", False, None),
+            "hall_id": ("int", True, None),
+            "seat_number": ("str", True, 10),
+            "is_accessible": ("bool", False, None),
+            "remarks": ("str", False, 255),
+        },
+        "unique": [("hall_id", "seat_number")],
+        "ranges": {},
+        "choices": {},
+        "defaults": {"is_accessible": False},
+        "references": {"hall_id": ("halls", "hall_id")},
+    },
+}
+TRUE_WORDS = {"1", "true", "t", "yes", "y"}
+FALSE_WORDS = {"0", "false", "f", "no", "n"}
+
+def iter_upload_chunks(name, data, chunk_rows):
+    """Yield the rows of an uploaded CSV/Excel file as DataFrames of at most `chunk_rows` rows (all values as text)."""
+    if name.lower().endswith((".xlsx", ".xlsm")):
+        from openpyxl import load_workbook
+        sheet = load_workbook(BytesIO(data), read_only=True, data_only=True).active
+        rows = sheet.iter_rows(values_only=True)
+        header = [str(h).strip().lower() if h is not None else f"unnamed_{i}" for i, h in enumerate(next(rows, ()))]
+        batch = []
+        for row in rows:
+            batch.append([None if v is None else str(v) for v in row[:len(header)]])
+            if len(batch) == chunk_rows:
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+    else:
+        for chunk in pd.read_csv(BytesIO(data), chunksize=chunk_rows, dtype=str, keep_default_na=False, na_values=[""]):
+            chunk.columns = [str(c).strip().lower() for c in chunk.columns]
+            yield chunk
+
+def _unique_key(df, cols):
+    """Comparable key per row for a (possibly composite) unique constraint; NA where any part is missing."""
+    parts = [df[c].astype("string").str.casefold() if df[c].dtype == "string" else df[c].astype("string") for c in cols]
+    key = parts[0] if len(parts) == 1 else pd.Series(list(zip(*parts)), index=df.index, dtype=object)
+    missing = pd.concat([df[c].isna() for c in cols], axis=1).any(axis=1)
+    return key.where(~missing)
+
+def _existing_keys(cur, table, cols, keys):
+    """Which of `keys` (tuples of values for `cols`) already exist in `table`, as casefolded keys."""
+    found = set()
+    keys = list(keys)
+    for i in range(0, len(keys), 1000):
+        part = keys[i:i + 1000]
+        if len(cols) == 1:
+            cur.execute(f"SELECT `{cols[0]}` FROM `{table}` WHERE `{cols[0]}` IN ({','.join(['%s'] * len(part))})",
+                        [k[0] for k in part])
+        else:
+            row = "(" + ",".join(["%s"] * len(cols)) + ")"
+            cur.execute(f"SELECT {','.join(f'`{c}`' for c in cols)} FROM `{table}` "
+                        f"WHERE ({','.join(f'`{c}`' for c in cols)}) IN ({','.join([row] * len(part))})",
+                        [v for k in part for v in k])
+        for rec in cur.fetchall():
+            found.add(tuple(str(v).casefold() for v in rec))
+    return found
+
+def validate_import_chunk(cur, table, df, first_row, seen):
+    """
+    Vectorised checks of one chunk against the schema constraints. `first_row`
+    is the file line of the chunk's first row; `seen` carries unique keys of
+    earlier chunks. Returns (valid rows ready to insert, list of error dicts).
+    """
+    spec = IMPORT_SPECS[table]
+    pk = TABLE_KEYS[table]
+    df = df.reset_index(drop=True)
+    line = pd.Series(range(first_row, first_row + len(df)))
+    out = pd.DataFrame(index=df.index)
+    problems = []  # (mask, column, message)
+
+    for col, (kind, required, max_len) in spec["columns"].items():
+        raw = df[col].astype("string").str.strip().replace("", pd.NA) if col in df else pd.Series(pd.NA, index=df.index, dtype="string")
+        if kind == "int":
+            val = pd.to_numeric(raw, errors="coerce")
+            bad = raw.notna() & (val.isna() | (val % 1 != 0))
+            problems.append((bad, col, "not a whole number"))
+            val = val.where(~bad).astype("Int64")
+        elif kind == "date":
+            val = pd.to_datetime(raw, errors="coerce").dt.date
+            bad = raw.notna() & val.isna()
+            problems.append((bad, col, "not a date"))
+        elif kind == "bool":
+            low = raw.str.lower()
+            val = low.map(lambda v: True if v in TRUE_WORDS else False if v in FALSE_WORDS else None if pd.isna(v) else "?")
+            bad = val == "?"
+            problems.append((bad, col, "not true/false"))
+            val = val.where(~bad, None)
+        else:
+            val = raw
+            if max_len:
+                problems.append((raw.str.len() > max_len, col, f"longer than {max_len} characters"))
+        if required:
+            problems.append((raw.isna(), col, "required"))
+        if col in spec["defaults"]:
+            val = val.where(raw.notna(), spec["defaults"][col])
+        out[col] = val
+
+    for col, (lo, hi) in spec["ranges"].items():
+        v = out[col].astype("Float64")
+        problems.append(((v < lo) | (v > hi) if hi is not None else (v < lo), col, f"must be {'between ' + str(lo) + ' and ' + str(hi) if hi is not None else 'at least ' + str(lo)}"))
+    for col, allowed in spec["choices"].items():
+        problems.append((out[col].notna() & ~out[col].isin(allowed), col, f"must be one of {', '.join(allowed)}"))
+
+    for cols in [(pk,)] + spec["unique"]:
+        key = _unique_key(out, cols)
+        name = "/".join(cols)
+        dup_in_file = key.notna() & (key.duplicated(keep="first") | key.isin(seen.setdefault(cols, set())))
+        problems.append((dup_in_file, name, "duplicate within the file"))
+        candidates = out.loc[key.notna() & ~dup_in_file, list(cols)]
+        if not candidates.empty:
+            existing = _existing_keys(cur, table, cols, {tuple(_py(v) for v in r) for r in candidates.itertuples(index=False)})
+            as_tuple = key if len(cols) > 1 else key.map(lambda k: (k,), na_action="ignore")
+            problems.append((as_tuple.isin(existing).fillna(False), name, "already exists in the database"))
+    for col, (ref_table, ref_col) in spec["references"].items():
+        ids = {int(v) for v in out[col].dropna().unique()}
+        known = {k[0] for k in _existing_keys(cur, ref_table, (ref_col,), {(i,) for i in ids})} if ids else set()
+        problems.append((out[col].notna() & ~out[col].astype("string").isin(known), col, f"no such {ref_table} row"))
+
+    errors, rejected = [], pd.Series(False, index=df.index)
+    for mask, col, message in problems:
+        mask = mask.fillna(False).astype(bool)
+        if mask.any():
+            rejected |= mask
+            errors.extend({"line": int(n), "column": col, "error": message} for n in line[mask])
+    valid = out[~rejected]
+    for cols in [(pk,)] + spec["unique"]:
+        seen[cols].update(_unique_key(valid, cols).dropna())
+    return valid, errors
+
+def find_import_job(table, sha):
+    df = run_select("""SELECT job_id, file_name, rows_processed, rows_inserted, rows_rejected, status, updated_at
+                       FROM import_jobs WHERE file_sha256 = %s AND table_name = %s
+                       ORDER BY job_id DESC LIMIT 1""", params=(sha, table))
+    return df.iloc[0].to_dict() if not df.empty else None
+
+def bulk_import(table, file_name, data, chunk_rows=IMPORT_CHUNK_ROWS, resume=True, on_progress=None):
+    """
+    Stream an uploaded CSV/Excel file into `table` chunk by chunk. Invalid rows
+    are skipped and reported; valid rows go in with multi-row INSERTs. Each
+    chunk commits together with its import_jobs checkpoint, so a failed import
+    re-run on the same file (same SHA-256) resumes after the last committed chunk.
+    Returns a summary dict with an `errors` DataFrame.
+    """
+    spec = IMPORT_SPECS[table]
+    pk = TABLE_KEYS[table]
+    sha = hashlib.sha256(data).hexdigest()
+    job = find_import_job(table, sha) if resume else None
+    started = time.perf_counter()
+    with get_conn() as conn:
+        cur = conn.cursor(buffered=True)
+        if job and job["status"] != "DONE":
+            job_id, skip = int(job["job_id"]), int(job["rows_processed"])
+            inserted, rejected = int(job["rows_inserted"]), int(job["rows_rejected"])
+            cur.execute("UPDATE import_jobs SET status = 'RUNNING' WHERE job_id = %s", (job_id,))
+        else:
+            cur.execute("INSERT INTO import_jobs (table_name, file_name, file_sha256) VALUES (%s,%s,%s)",
+                        (table, file_name[:255], sha))
+            job_id, skip, inserted, rejected = cur.lastrowid, 0, 0, 0
+        conn.commit()
+        resumed_from = skip
+
+        errors, seen, processed, this_run = [], {}, 0, 0
+        try:
+            for chunk in iter_upload_chunks(file_name, data, chunk_rows):
+                missing = [c for c, (_, required, _) in spec["columns"].items() if required and c not in chunk]
+                if missing:
+                    raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+                if processed + len(chunk) <= skip:
+                    processed += len(chunk)
+                    continue
+                if processed < skip:
+                    chunk = chunk.iloc[skip - processed:]
+                    processed = skip
+                valid, chunk_errors = validate_import_chunk(cur, table, chunk, processed + 2, seen)
+                if len(errors) < IMPORT_MAX_REPORTED_ERRORS:
+                    errors.extend(chunk_errors[:IMPORT_MAX_REPORTED_ERRORS - len(errors)])
+                if not valid.empty:
+                    valid = valid.copy()
+                    # on the import's connection, before the chunk's inserts: both commit, and
+                    # a second connection per chunk would deadlock the pool under concurrent imports
+                    if valid[pk].notna().any():
+                        advance_id_sequence(conn, table, int(valid[pk].max()))
+                    need = valid[pk].isna()
+                    if need.any():
+                        first = reserve_id_block(conn, table, int(need.sum()))
+                        valid.loc[need, pk] = list(range(first, first + int(need.sum())))
+                    cols = list(spec["columns"])
+                    rows = [tuple(_py(v) if not pd.isna(v) else None for v in r)
+                            for r in valid[cols].astype(object).itertuples(index=False)]
+                    sql = (f"INSERT INTO `{table}` ({', '.join(f'`{c}`' for c in cols)}) "
+                           f"VALUES ({', '.join(['%s'] * len(cols))})")
+                    for i in range(0, len(rows), 1000):
+                        cur.executemany(sql, rows[i:i + 1000])
+                processed += len(chunk)
+                inserted += len(valid)
+                rejected += len(chunk) - len(valid)
+                this_run += len(chunk)
+                cur.execute("""UPDATE import_jobs SET rows_processed = %s, rows_inserted = %s, rows_rejected = %s
+                               WHERE job_id = %s""", (processed, inserted, rejected, job_id))
+                conn.commit()
+                invalidate_tables((table,))
+                if on_progress:
+                    on_progress(processed, inserted, rejected, time.perf_counter() - started)
+            cur.execute("UPDATE import_jobs SET status = 'DONE' WHERE job_id = %s", (job_id,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            cur.execute("UPDATE import_jobs SET status = 'FAILED' WHERE job_id = %s", (job_id,))
+            conn.commit()
+            raise
+        finally:
+            cur.close()
+    elapsed = time.perf_counter() - started
+    return {"job_id": job_id, "resumed_from": resumed_from, "processed": processed, "inserted": inserted,
+            "rejected": rejected, "seconds": elapsed, "rows_per_second": this_run / elapsed if elapsed else 0.0,
+            "errors": pd.DataFrame(errors, columns=["line", "column", "error"])}
+
+def bulk_import_ui():
+    st.header("Bulk Import (CSV / Excel)")
+    table = st.selectbox("Import into", list(IMPORT_SPECS))
+    spec = IMPORT_SPECS[table]
+    st.markdown("Columns: " + ", ".join(f"`{c}`" + ("" if required else " (optional)")
+                                        for c, (_, required, _) in spec["columns"].items())
+                + f". Leave `{TABLE_KEYS[table]}` out to have ids assigned. Invalid rows are skipped and listed below.")
+    upload = st.file_uploader("File", type=["csv", "xlsx", "xlsm"])
+    chunk_rows = st.number_input("Rows per chunk", min_value=100, max_value=100000, value=IMPORT_CHUNK_ROWS, step=500)
+    if not upload:
+        st.stop()
+    data = upload.getvalue()
+    job = find_import_job(table, hashlib.sha256(data).hexdigest())
+    resume = True
+    if job and job["status"] == "DONE":
+        st.warning(f"This file was already imported into {table} (job {job['job_id']}, {job['rows_inserted']} rows inserted).")
+        resume = False
+    elif job:
+        st.info(f"A previous import of this file stopped after {job['rows_processed']} rows (status {job['status']}); it will resume from there.")
+        resume = not st.checkbox("Start over from the first row instead")
+    if st.button("Start import"):
+        bar = st.progress(0.0)
+        status = st.empty()
+        approx_rows = max(1, data.count(b"\n")) if not upload.name.lower().endswith((".xlsx", ".xlsm")) else None
+
+        def progress(processed, inserted, rejected, elapsed):
+            status.write(f"{processed} rows read · {inserted} inserted · {rejected} rejected · {processed / elapsed:.0f} rows/s")
+            if approx_rows:
+                bar.progress(min(1.0, processed / approx_rows))
+
+        try:
+            result = bulk_import(table, upload.name, data, int(chunk_rows), resume=resume, on_progress=progress)
+        except Exception as e:
+            st.error(f"Import stopped: {e}. Committed chunks are kept; run the import again to resume.")
+            st.stop()
+        bar.progress(1.0)
+        st.success(f"Job {result['job_id']}: {result['inserted']} rows inserted, {result['rejected']} rejected "
+                   f"in {result['seconds']:.2f}s ({result['rows_per_second']:.0f} rows/s)"
+                   + (f", resumed after row {result['resumed_from']}" if result["resumed_from"] else "") + ".")
+        if not result["errors"].empty:
+            st.subheader("Rejected rows")
+            st.dataframe(result["errors"])
+            st.download_button("Download error report", result["errors"].to_csv(index=False),
+                               file_name=f"import_{table}_errors.csv", mime="text/csv")
+
+if page == "Bulk Import":
+    timed_page(bulk_import_ui)
 
 # ---------- INVIGILATORS ----------
 def invigilators_ui():
@@ -334,7 +1325,6 @@ def invigilators_ui():
     with left:
         st.subheader("Add Invigilator")
         with st.form("add_inv"):
-            iid = st.number_input("invigilator_id", min_value=1)
             name = st.text_input("Full name")
             email = st.text_input("Email")
             phone = st.text_input("Phone")
@@ -342,9 +1332,10 @@ def invigilators_ui():
             sub = st.form_submit_button("Add")
             if sub:
                 try:
+                    iid = reserve_ids("invigilators")
                     run_query("INSERT INTO invigilators (invigilator_id, full_name, email, phone, assigned) VALUES (%s,%s,%s,%s,%s)",
                               (iid, name, email or None, phone or None, int(assigned)))
-                    st.success("Added")
+                    st.success(f"Invigilator {iid} added")
                 except Exception as e:
                     st.error(f"Error: {e}")
     with right:
@@ -375,17 +1366,15 @@ def invigilators_ui():
                     st.error(f"Error: {e}")
 
 if page == "Invigilators":
-    invigilators_ui()
+    timed_page(invigilators_ui)
 
 # ---------- HALL ASSIGNMENTS ----------
 def hall_assignments_ui():
     st.header("Hall Assignments (Link exam <-> hall)")
-    df_exams = reload_table("exams")
-    df_halls = reload_table("halls")
-    df_inv = reload_table("invigilators")
+    data = load_page_data({"exams": "exams", "halls": "halls", "invigilators": "invigilators"})
+    df_exams, df_halls, df_inv = data["exams"], data["halls"], data["invigilators"]
 
     with st.form("add_assignment"):
-        aid = st.number_input("assignment_id", min_value=1)
         exam_sel = st.selectbox("Exam", options=[None]+df_exams['exam_id'].tolist())
         hall_sel = st.selectbox("Hall", options=[None]+df_halls['hall_id'].tolist())
         inv_sel = st.selectbox("Invigilator (optional)", options=[None]+df_inv['invigilator_id'].tolist())
@@ -394,10 +1383,11 @@ def hall_assignments_ui():
         sub = st.form_submit_button("Add assignment")
         if sub:
             try:
+                aid = reserve_ids("hall_assignments")
                 run_query("""INSERT INTO hall_assignments (assignment_id, exam_id, hall_id, invigilator_id, start_time, end_time)
                              VALUES (%s,%s,%s,%s,%s,%s)""",
                           (aid, exam_sel, hall_sel, inv_sel, start, end))
-                st.success("Assignment added")
+                st.success(f"Assignment {aid} added")
             except Exception as e:
                 st.error(f"Error: {e}")
 
@@ -405,34 +1395,32 @@ def hall_assignments_ui():
     st.dataframe(reload_table("hall_assignments"))
 
 if page == "Hall Assignments":
-    hall_assignments_ui()
+    timed_page(hall_assignments_ui)
 
 # ---------- ALLOCATIONS CRUD & ALLOCATION VIEW ----------
 def allocations_ui():
     st.header("Allocations")
     st.markdown("Manual allocate student to seat for an exam (CRUD)")
-    df_exams = reload_table("exams")
-    with st.form("manual_alloc"):
-        alloc_id = st.number_input("allocation_id", min_value=1)
-        exam_sel = st.selectbox("Exam", options=[None]+df_exams['exam_id'].tolist(), key="alloc_exam")
-        students = reload_table("students")
-        student_sel = st.selectbox("Student (optional)", options=[None]+students['student_id'].tolist())
-        seats_all = reload_table("seats")
-        seat_sel = st.selectbox("Seat", options=[None]+seats_all['seat_id'].tolist())
-        sub = st.form_submit_button("Create allocation")
-        if sub:
-            try:
-                run_query("INSERT INTO allocations (allocation_id, exam_id, student_id, seat_id) VALUES (%s,%s,%s,%s)",
-                          (alloc_id, exam_sel, student_sel, seat_sel))
-                st.success("Allocated")
-            except Exception as e:
-                st.error(f"Error: {e}")
+    # the column list is what paged_table reads first; fetch it alongside the exams
+    check_schema_version()
+    df_exams = load_page_data({"exams": "exams",
+                               "columns": (Q_TABLE_COLUMNS, ("allocations",), ("information_schema",), 3600)})["exams"]
+    exam_sel = st.selectbox("Exam", options=[None]+df_exams['exam_id'].tolist(), key="alloc_exam")
+    student_sel = search_select("Student (optional)", "students", "alloc_student")
+    seat_sel = search_select("Seat", "seats", "alloc_seat")
+    if st.button("Create allocation"):
+        try:
+            alloc_id = reserve_ids("allocations")
+            run_query("INSERT INTO allocations (allocation_id, exam_id, student_id, seat_id) VALUES (%s,%s,%s,%s)",
+                      (alloc_id, exam_sel, student_sel, seat_sel))
+            st.success(f"Allocation {alloc_id} created")
+        except Exception as e:
+            st.error(f"Error: {e}")
 
     st.subheader("Existing allocations")
-    allocs = reload_table("allocations")
-    st.dataframe(allocs)
+    paged_table("allocations", "allocs_tbl")
 
-    sel = st.selectbox("Select allocation_id to delete", options=[None]+allocs['allocation_id'].tolist())
+    sel = search_select("Find allocation to delete", "allocations", "alloc_delete")
     if sel and st.button("Delete allocation"):
         try:
             run_query("DELETE FROM allocations WHERE allocation_id=%s", (sel,))
@@ -441,39 +1429,226 @@ def allocations_ui():
             st.error(f"Error: {e}")
 
 if page == "Allocations":
-    allocations_ui()
+    timed_page(allocations_ui)
 
 # ---------- SEAT CHECKS ----------
+CONSOLE_REFRESH_SECONDS = float(os.getenv("CONSOLE_REFRESH_SECONDS", "5"))
+# re-read this much before the watermark: checked_at has one-second
+# resolution and a check committed late can carry an earlier timestamp
+CONSOLE_OVERLAP_SECONDS = 2
+CHECK_STATUSES = ["OK", "MISMATCH", "ABSENT", "OTHER"]
+Q_HALL_CHECKS = """
+    SELECT a.allocation_id, se.seat_id, se.seat_number, s.srn, s.full_name,
+           a.check_status AS status, a.check_remarks AS remarks, a.checked_at
+    FROM allocations a
+    JOIN seats se ON se.seat_id = a.seat_id
+    LEFT JOIN students s ON s.student_id = a.student_id
+    WHERE a.exam_id = %s AND se.hall_id = %s
+"""
+Q_CHECKS_SINCE = """
+    SELECT a.allocation_id, a.check_status AS status, a.check_remarks AS remarks, a.checked_at
+    FROM allocations a
+    JOIN seats se ON se.seat_id = a.seat_id
+    WHERE a.exam_id = %s AND a.checked_at >= %s - INTERVAL %s SECOND AND se.hall_id = %s
+    ORDER BY a.checked_at
+"""
+
+def record_checks(allocation_ids, status, checked_by=None, remarks=None):
+    """
+    Move a set of allocations to `status`: one history block in seat_checks
+    (multi-row INSERT) applied to allocations.check_status and exam_hall_stats
+    by apply_check_block with set-based statements. Returns the count.
+    """
+    allocation_ids = list(dict.fromkeys(int(a) for a in allocation_ids))
+    if not allocation_ids:
+        return 0
+    first = reserve_ids("seat_checks", len(allocation_ids))
+    with get_conn() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute("SET @bulk_seat_checks = 1")
+            cur.executemany("INSERT INTO seat_checks (check_id, allocation_id, checked_by, status, remarks) VALUES (%s,%s,%s,%s,%s)",
+                            [(first + i, a, checked_by, status, remarks or None) for i, a in enumerate(allocation_ids)])
+            cur.execute("CALL apply_check_block(%s, %s)", (first, first + len(allocation_ids) - 1))
+            conn.commit()
+        finally:
+            cur.execute("SET @bulk_seat_checks = 0")
+            cur.close()
+    invalidate_tables(("seat_checks",))
+    return len(allocation_ids)
+
+def transition_hall(exam_id, hall_id, from_status, to_status, checked_by=None, remarks=None):
+    """
+    Every allocation of an exam in a hall still at `from_status` moves to `to_status`. Returns the count.
+    The procedure commits on entry (its id block): run_query calls it on a connection with nothing open.
+    """
+    result = run_query("CALL transition_hall_checks(%s, %s, %s, %s, %s, %s)",
+                       (exam_id, hall_id, from_status, to_status, checked_by, remarks or None))
+    return int(result[0][0]) if result else 0
+
+class HallCheckState:
+    """
+    Current check status of every allocation of one exam in one hall, kept in
+    the session. `load` reads the hall once; `poll` reads only the allocations
+    checked since the watermark (indexed on exam_id, checked_at) and folds in
+    the ones that changed.
+    """
+
+    def __init__(self, exam_id, hall_id):
+        self.exam_id, self.hall_id = int(exam_id), int(hall_id)
+        self.load()
+
+    def load(self):
+        self.watermark = run_select("SELECT NOW() AS now").iloc[0, 0]
+        df = run_select(Q_HALL_CHECKS, params=(self.exam_id, self.hall_id))
+        self.rows = {rec["allocation_id"]: rec for rec in df.to_dict("records")}
+        self.changes = []
+
+    def poll(self):
+        df = run_select(Q_CHECKS_SINCE, params=(self.exam_id, _py(self.watermark), CONSOLE_OVERLAP_SECONDS, self.hall_id))
+        fresh = 0
+        for rec in df.to_dict("records"):
+            row = self.rows.get(rec["allocation_id"])
+            if row is None:
+                continue  # allocated after load; picked up by the next full reload
+            if (row["status"], row["remarks"], row["checked_at"]) != (rec["status"], rec["remarks"], rec["checked_at"]):
+                row.update(status=rec["status"], remarks=rec["remarks"], checked_at=rec["checked_at"])
+                self.changes.append({"seat_number": row["seat_number"], "srn": row["srn"], **rec})
+                fresh += 1
+            self.watermark = max(self.watermark, rec["checked_at"])
+        del self.changes[:-50]
+        return fresh
+
+    def frame(self):
+        return pd.DataFrame(list(self.rows.values()),
+                            columns=["allocation_id", "seat_id", "seat_number", "srn", "full_name", "status", "remarks", "checked_at"])
+
+def hall_check_counts(exam_id, hall_id):
+    """Counters of one exam x hall from exam_hall_stats: a single primary-key read."""
+    df = run_select("""SELECT allocated, checks_pending, checks_ok, checks_mismatch, checks_absent, checks_other
+                       FROM exam_hall_stats WHERE exam_id = %s AND hall_id = %s""", params=(exam_id, hall_id))
+    return df.iloc[0].to_dict() if not df.empty else None
+
+def exam_day_console():
+    st.subheader("Exam-day console")
+    exams = reload_table("exams")
+    halls = reload_table("halls")
+    c1, c2 = st.columns(2)
+    exam_sel = c1.selectbox("Exam", options=[None] + exams["exam_id"].tolist(), key="console_exam")
+    hall_sel = c2.selectbox("Hall", options=[None] + halls["hall_id"].tolist(), key="console_hall")
+    if not (exam_sel and hall_sel):
+        st.stop()
+    state = st.session_state.get("console_state")
+    if not state or (state.exam_id, state.hall_id) != (exam_sel, hall_sel) or st.button("Reload hall"):
+        state = HallCheckState(exam_sel, hall_sel)
+        st.session_state["console_state"] = state
+    grid = get_hall_grid(hall_sel)
+
+    @st.fragment(run_every=CONSOLE_REFRESH_SECONDS)
+    def live_panel():
+        state.poll()
+        counts = hall_check_counts(exam_sel, hall_sel)
+        if counts:
+            m = st.columns(5)
+            m[0].metric("Allocated", int(counts["allocated"]))
+            m[1].metric("Pending", int(counts["checks_pending"]))
+            m[2].metric("OK", int(counts["checks_ok"]))
+            m[3].metric("Absent", int(counts["checks_absent"]))
+            m[4].metric("Mismatch / other", int(counts["checks_mismatch"] + counts["checks_other"]))
+        st.caption(f"Refreshes every {CONSOLE_REFRESH_SECONDS:g}s; last change seen at {state.watermark}.")
+        if state.changes:
+            st.dataframe(pd.DataFrame(state.changes[::-1])[["checked_at", "seat_number", "srn", "status", "remarks"]])
+
+    live_panel()
+
+    st.markdown("**Mark a row of seats**")
+    df = state.frame()
+    by_seat = dict(zip(df["seat_id"], df["allocation_id"]))
+    row = st.selectbox("Row", grid.row_labels, key="console_row")
+    in_row = [sid for sid in grid.row_seat_ids(row) if sid in by_seat]
+    status_of = dict(zip(df["allocation_id"], df["status"]))
+    labels = {sid: grid.by_id[sid]["seat_number"] for sid in in_row}
+    pending_only = st.checkbox("Only seats still PENDING", value=True, key="console_pending")
+    default = [sid for sid in in_row if not pending_only or status_of.get(by_seat[sid]) == "PENDING"]
+    with st.form("console_mark"):
+        seats = st.multiselect("Seats", in_row, default=default, format_func=lambda sid: labels[sid])
+        s1, s2 = st.columns(2)
+        status = s1.selectbox("Status", CHECK_STATUSES)
+        checked_by = s2.number_input("Invigilator id", min_value=1, step=1)
+        remarks = st.text_input("Remarks")
+        if st.form_submit_button("Mark selected seats"):
+            try:
+                n = record_checks([by_seat[sid] for sid in seats], status, int(checked_by), remarks)
+                state.poll()
+                st.success(f"Marked {n} seats {status}.")
+            except Exception as e:
+                st.error(f"Error: {e}")
+    st.dataframe(df[df["seat_id"].isin(in_row)].drop(columns=["seat_id"]))
+
+    st.markdown("**Whole hall**")
+    with st.form("console_hall"):
+        h1, h2, h3 = st.columns(3)
+        from_status = h1.selectbox("Seats now", ["PENDING"] + CHECK_STATUSES)
+        to_status = h2.selectbox("Move to", CHECK_STATUSES)
+        hall_by = h3.number_input("Invigilator id", min_value=1, step=1, key="console_hall_by")
+        hall_remarks = st.text_input("Remarks", key="console_hall_remarks")
+        if st.form_submit_button("Move every seat in the hall"):
+            try:
+                n = transition_hall(exam_sel, hall_sel, from_status, to_status, int(hall_by), hall_remarks)
+                state.poll()
+                st.success(f"Moved {n} seats from {from_status} to {to_status}.")
+            except Exception as e:
+                st.error(f"Error: {e}")
+
 def seat_checks_ui():
     st.header("Seat Checks (invigilator checks)")
+    if st.radio("Mode", ["Records", "Exam-day console"], horizontal=True) == "Exam-day console":
+        exam_day_console()
+        return
     st.subheader("Add seat check record")
-    df_allocs = reload_table("allocations")
     df_inv = reload_table("invigilators")
+    alloc_sel = search_select("Allocation", "allocations", "check_alloc")
     with st.form("add_check"):
-        cid = st.number_input("check_id", min_value=1)
-        alloc_sel = st.selectbox("Allocation", options=[None]+df_allocs['allocation_id'].tolist())
         inv_sel = st.selectbox("Checked by (invigilator)", options=[None]+df_inv['invigilator_id'].tolist())
         status = st.selectbox("Status", ["OK","MISMATCH","ABSENT","OTHER"])
         remarks = st.text_input("Remarks")
         sub = st.form_submit_button("Add check")
         if sub:
             try:
+                cid = reserve_ids("seat_checks")
                 run_query("INSERT INTO seat_checks (check_id, allocation_id, checked_by, status, remarks) VALUES (%s,%s,%s,%s,%s)",
                           (cid, alloc_sel, inv_sel, status, remarks or None))
-                st.success("Added")
+                st.success(f"Seat check {cid} added")
             except Exception as e:
                 st.error(f"Error: {e}")
 
-    st.subheader("Existing seat checks")
-    st.dataframe(reload_table("seat_checks"))
+    st.subheader("Seat check history")
+    st.caption("Append-only: a new check supersedes the allocation's current status, older rows stay as they were.")
+    paged_table("seat_checks", "checks_tbl")
 
 if page == "Seat Checks":
-    seat_checks_ui()
+    timed_page(seat_checks_ui)
 
 # ---------- AUTO-ALLOCATION ALGORITHM ----------
+# Planning and writing live in seat_allocator.allocation (also behind the
+# CLI); the wrappers below bind them to the app's Database and grid cache
+# and drop cached reads after a write.
+def plan_allocation(exam_id):
+    return allocator.plan_allocation(get_db(), exam_id)
+
+def commit_plan(plan):
+    n = allocator.commit_plan(get_db(), plan)
+    invalidate_tables(("allocations",))
+    return n
+
+def auto_allocate_exam(exam_id):
+    n = allocator.auto_allocate_exam(get_db(), exam_id)
+    invalidate_tables(("allocations",))
+    return n
+
 def auto_allocate_ui():
     st.header("Auto-Allocate Seats for an Exam")
-    st.markdown("Greedy allocator: assigns unallocated students to free seats in halls assigned for the exam. Respects unique constraints (one seat per student & one allocation per seat per exam).")
+    st.markdown("Greedy allocator: assigns unallocated students to free seats in halls assigned for the exam. Respects unique constraints (one seat per student & one allocation per seat per exam). Runs as a single set-based transaction in MySQL.")
     exams = reload_table("exams")
     exam_choices = exams['exam_id'].tolist()
     exam_selected = st.selectbox("Choose exam_id to auto-allocate", options=[None]+exam_choices)
@@ -481,129 +1656,334 @@ def auto_allocate_ui():
     if exam_selected:
         st.write("Exam details:")
         st.table(exams[exams['exam_id']==exam_selected])
-        if st.button("Simulate allocation (show how many will be allocated)"):
-            # compute unallocated students and free seats
-            q_unallocated = """
-                SELECT s.student_id FROM students s
-                WHERE s.student_id NOT IN (SELECT student_id FROM allocations WHERE exam_id = %s)
-                ORDER BY s.student_id
-            """
-            q_free_seats = """
-                SELECT seat_id, hall_id, seat_number FROM seats
-                WHERE seat_id NOT IN (SELECT seat_id FROM allocations WHERE exam_id = %s)
-                AND hall_id IN (SELECT hall_id FROM hall_assignments WHERE exam_id = %s)
-                ORDER BY hall_id, seat_number
-            """
-            students = run_select(q_unallocated, params=(exam_selected,))
-            seats = run_select(q_free_seats, params=(exam_selected, exam_selected))
-            st.write(f"Unallocated students count: {len(students)}")
-            st.write(f"Available seats in assigned halls: {len(seats)}")
-            st.dataframe(students)
-            st.dataframe(seats)
+        c1, c2 = st.columns(2)
+        if c1.button("Plan allocation (dry run)"):
+            started = time.perf_counter()
+            st.session_state["alloc_plan"] = plan_allocation(exam_selected)
+            st.session_state["alloc_plan_ms"] = (time.perf_counter() - started) * 1000
+        plan = st.session_state.get("alloc_plan")
+        if plan is not None and plan.exam_id == exam_selected:
+            st.write(f"Plan {plan.fingerprint} from {plan.planned_at:%H:%M:%S} "
+                     f"({st.session_state['alloc_plan_ms']:.0f} ms): allocates {len(plan)} students, "
+                     f"{plan.unplaced} left without a seat.")
+            st.dataframe(plan.hall_diff())
+            if c2.button("Commit this plan", disabled=not len(plan)):
+                try:
+                    n = commit_plan(plan)
+                    st.session_state.pop("alloc_plan")
+                    st.success(f"Allocated {n} students exactly as planned.")
+                except ValueError as e:
+                    st.session_state.pop("alloc_plan")
+                    st.warning(str(e))
+                except Exception as e:
+                    st.error(f"Error during allocation: {e}")
         if st.button("Run auto-allocate now"):
-            # run allocation in a transaction, assign sequentially
-            q_students = "SELECT student_id FROM students WHERE student_id NOT IN (SELECT student_id FROM allocations WHERE exam_id=%s) ORDER BY student_id"
-            q_seats = """SELECT seat_id FROM seats
-                         WHERE seat_id NOT IN (SELECT seat_id FROM allocations WHERE exam_id=%s)
-                         AND hall_id IN (SELECT hall_id FROM hall_assignments WHERE exam_id = %s)
-                         ORDER BY hall_id, seat_number"""
-            studs = run_select(q_students, params=(exam_selected,))
-            seats = run_select(q_seats, params=(exam_selected, exam_selected))
-            studs_list = studs['student_id'].tolist()
-            seats_list = seats['seat_id'].tolist()
-            if not seats_list:
-                st.warning("No free seats available for this exam's assigned halls.")
-            if not studs_list:
-                st.info("No unallocated students for this exam.")
-            allocate_count = min(len(studs_list), len(seats_list))
-            if allocate_count == 0:
-                st.stop()
-            # insert allocations with next available allocation_id
-            next_alloc_q = "SELECT COALESCE(MAX(allocation_id), 0) + 1 FROM allocations"
-            next_alloc_id = run_select(next_alloc_q).iloc[0,0]
-            params = []
-            for i in range(allocate_count):
-                params.append((next_alloc_id + i, exam_selected, studs_list[i], seats_list[i]))
             try:
-                # bulk insert
-                with get_conn() as conn:
-                    cur = conn.cursor()
-                    cur.executemany("INSERT INTO allocations (allocation_id, exam_id, student_id, seat_id) VALUES (%s,%s,%s,%s)", params)
-                    conn.commit()
+                allocate_count = auto_allocate_exam(exam_selected)
+            except Exception as e:
+                st.error(f"Error during allocation: {e}")
+                st.stop()
+            if allocate_count:
                 st.success(f"Allocated {allocate_count} students.")
+            else:
+                st.info("Nothing to allocate: no unallocated students or no free seats in this exam's assigned halls.")
+
+        st.markdown("---")
+        st.subheader("Constraint-aware allocation")
+        rule_keys = st.multiselect("Rules", options=list(ALLOCATION_RULES), default=["mix_cohorts", "accessible"],
+                                   format_func=lambda k: ALLOCATION_RULES[k].name)
+        c1, c2 = st.columns(2)
+        plan_only = c1.button("Plan with rules")
+        commit = c2.button("Allocate with rules")
+        if plan_only or commit:
+            started = time.perf_counter()
+            try:
+                result = allocate_with_rules(exam_selected, rule_keys, dry_run=not commit)
             except Exception as e:
                 st.error(f"Error during allocation: {e}")
+                st.stop()
+            elapsed = time.perf_counter() - started
+            verb = "Allocated" if commit else "Would allocate"
+            st.success(f"{verb} {len(result['pairs'])} students in {elapsed:.2f}s.")
+            st.write(f"Students left unplaced: {len(result['unplaced'])}; usable seats left empty by the rules: {result['left_empty']}")
+            if result["unplaced"]:
+                st.dataframe(pd.DataFrame({"student_id": result["unplaced"]}))
+
+        st.markdown("---")
+        st.subheader("Repair after changes")
+        st.markdown("After seats are removed, a hall assignment is dropped or students are added: seats the "
+                    "students who lost their seat or sit in a hall no longer assigned, and places new students. "
+                    "Everyone else keeps their seat. All moves are written in one transaction.")
+        repair_rules = st.multiselect("Rules to enforce", options=list(ALLOCATION_RULES),
+                                      format_func=lambda k: ALLOCATION_RULES[k].name, key="repair_rules")
+        c1, c2 = st.columns(2)
+        preview = c1.button("Preview repair")
+        apply = c2.button("Apply repair")
+        if preview or apply:
+            started = time.perf_counter()
+            try:
+                plan = reallocate_exam(exam_selected, repair_rules, dry_run=not apply)
+            except Exception as e:
+                st.error(f"Error during re-allocation: {e}")
+                st.stop()
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            counts = plan["diff"]["action"].value_counts().to_dict() if not plan["diff"].empty else {}
+            summary = ", ".join(f"{n} {a}" for a, n in sorted(counts.items())) or "nothing to change"
+            if apply:
+                st.success(f"Applied: {summary} ({elapsed_ms:.0f} ms).")
+            else:
+                st.info(f"Plan: {summary} ({elapsed_ms:.0f} ms).")
+            if not plan["diff"].empty:
+                st.dataframe(plan["diff"])
+
+# ---------- CONSTRAINT-AWARE ALLOCATION ----------
+def allocate_with_rules(exam_id, rule_keys, dry_run=False):
+    """Constraint-aware allocation for one exam (seat_allocator.engine.solve_allocation); writes unless `dry_run`."""
+    result = allocator.allocate_with_rules(get_db(), exam_id, rule_keys, dry_run, get_grid=get_hall_grid)
+    if not dry_run and result["pairs"]:
+        invalidate_tables(("allocations",))
+    return result
+
+# ---------- BATCH ALLOCATION (DATE RANGE) ----------
+def batch_allocate(date_from, date_to, dry_run=False):
+    """Allocate every exam with exam_date in [date_from, date_to] in one pass; writes in one transaction unless `dry_run`."""
+    plan = allocator.batch_allocate(get_db(), date_from, date_to, dry_run, get_grid=get_hall_grid)
+    if not dry_run and plan["rows"]:
+        invalidate_tables(("allocations",))
+    return plan
+
+def batch_allocate_ui():
+    st.header("Batch Allocate (exam day / week)")
+    st.markdown("Allocates every exam whose `exam_date` falls in the range in one pass. Exams whose times overlap never share a seat; such exams are listed in the clash report.")
+    c1, c2 = st.columns(2)
+    date_from = c1.date_input("From exam_date")
+    date_to = c2.date_input("To exam_date", value=date_from)
+    if date_to < date_from:
+        st.error("'To' date must not be before 'From' date.")
+        st.stop()
+    preview = st.button("Preview batch")
+    run = st.button("Run batch allocation")
+    if preview or run:
+        started = time.perf_counter()
+        try:
+            plan = batch_allocate(date_from, date_to, dry_run=not run)
+        except Exception as e:
+            st.error(f"Error during batch allocation: {e}")
+            st.stop()
+        elapsed = time.perf_counter() - started
+        if plan["summary"].empty:
+            st.info("No exams in this date range.")
+            st.stop()
+        if run:
+            st.success(f"Allocated {len(plan['rows'])} seats across {len(plan['summary'])} exams in {elapsed:.2f}s.")
+        else:
+            st.info(f"Would allocate {len(plan['rows'])} seats across {len(plan['summary'])} exams (planned in {elapsed:.2f}s).")
+        st.subheader("Per-exam summary")
+        st.dataframe(plan["summary"])
+        st.subheader("Clash report (overlapping exams)")
+        if plan["clashes"].empty:
+            st.write("No overlapping exams in this range.")
+        else:
+            st.dataframe(plan["clashes"])
+
+if page == "Batch Allocate":
+    timed_page(batch_allocate_ui)
+
+# ---------- INCREMENTAL RE-ALLOCATION ----------
+def reallocate_exam(exam_id, rule_keys=(), dry_run=False):
+    """Repair the seating of one exam after seats, hall assignments or students changed; applies unless `dry_run`."""
+    plan = allocator.reallocate_exam(get_db(), exam_id, rule_keys, dry_run, get_grid=get_hall_grid)
+    if not dry_run and (plan["moves"] or plan["adds"] or plan["releases"]):
+        invalidate_tables(("allocations",))
+    return plan
 
 if page == "Auto-Allocate":
-    auto_allocate_ui()
+    timed_page(auto_allocate_ui)
 
 # ---------- VISUAL SEAT MAP ----------
 def seat_map_ui():
     st.header("Seat Map for a Hall & Exam")
-    halls = reload_table("halls")
-    exams = reload_table("exams")
+    data = load_page_data({"halls": "halls", "exams": "exams"})
+    halls, exams = data["halls"], data["exams"]
     hall_sel = st.selectbox("Select hall_id", options=[None]+halls['hall_id'].tolist())
     exam_sel = st.selectbox("Select exam_id (to show allocated students)", options=[None]+exams['exam_id'].tolist())
+    colour_by = st.radio("Colour seats by", ["Allocation", "Seat check"], horizontal=True)
 
     if hall_sel:
-        seats = run_select("SELECT seat_id, seat_number, is_accessible FROM seats WHERE hall_id=%s ORDER BY seat_number", params=(hall_sel,))
-        if seats.empty:
-            st.info("No seats in this hall.")
-            st.stop()
-        # fetch allocations for this exam & hall
+        # the hall's grid and the exam's allocations (with their current check status) in parallel
+        specs = {"grid": lambda: get_hall_grid(hall_sel)}
         if exam_sel:
-            allocs_q = """SELECT a.allocation_id, a.seat_id, a.student_id, s.srn, s.full_name
+            allocs_q = """SELECT a.allocation_id, a.seat_id, a.student_id, s.srn, s.full_name, a.check_status
                           FROM allocations a
                           LEFT JOIN students s ON a.student_id = s.student_id
                           JOIN seats se ON a.seat_id = se.seat_id
                           WHERE a.exam_id=%s AND se.hall_id=%s"""
-            allocs = run_select(allocs_q, params=(exam_sel, hall_sel))
-            alloc_map = {row['seat_id']: row for _, row in allocs.iterrows()}
-        else:
-            alloc_map = {}
-
-        st.write("Seat layout (simple list) — click to view details in table below")
-        # create a grid with 6 seats per row visually using columns
-        seat_list = seats.to_dict('records')
-        per_row = 6
-        rows = [seat_list[i:i+per_row] for i in range(0, len(seat_list), per_row)]
-        for r in rows:
-            cols = st.columns(len(r))
-            for c, seat in zip(cols, r):
-                sid = seat['seat_id']
-                slabel = seat['seat_number']
-                allocated = sid in alloc_map
-                label = f"{slabel}\n({'A' if allocated else 'Free'})"
-                if allocated:
-                    student = alloc_map[sid]
-                    c.button(label, key=f"seat_{sid}", help=f"Allocated to: {student.get('full_name')} ({student.get('srn')})")
-                else:
-                    c.button(label, key=f"seat_free_{sid}")
+            specs["allocs"] = (allocs_q, (exam_sel, hall_sel))
+        data = load_page_data(specs)
+        grid = data["grid"]
+        if not len(grid):
+            st.info("No seats in this hall.")
+            st.stop()
+        seats = pd.DataFrame(grid.seats)[['seat_id', 'seat_number', 'is_accessible']]
+        allocs = data.get("allocs", pd.DataFrame(columns=['allocation_id', 'seat_id', 'student_id', 'srn', 'full_name',
+                                                          'check_status']))
+
+        started = time.perf_counter()
+        seat_map = render_seat_map_html(grid, allocs, colour_by)
+        render_ms = (time.perf_counter() - started) * 1000
+        components.html(seat_map, height=min(720, len(grid.row_labels) * SEAT_CELL + 110), scrolling=True)
+        st.caption(f"{len(grid)} seats, {len(allocs)} allocated — rendered in {render_ms:.0f} ms. "
+                   "Hover or click a seat for details; Ctrl+scroll or +/− to zoom.")
 
         st.subheader("Seat detail table")
-        display = seats.merge(allocs[['seat_id','student_id','srn','full_name']], how='left', on='seat_id')
+        display = seats.merge(allocs[['seat_id','student_id','srn','full_name','check_status']], how='left', on='seat_id')
         st.dataframe(display)
 
 if page == "Seat Map":
-    seat_map_ui()
+    timed_page(seat_map_ui)
+
+# ---------- SEAT LOOKUP ----------
+@st.cache_resource(show_spinner="Building the seat index...")
+def get_seat_index(date_from, date_to):
+    """In-memory srn -> seats index of one exam session, shared by every session of the app."""
+    return SeatIndex(get_db(), date_from, date_to)
+
+def seat_lookup_ui():
+    st.header("Seat Lookup")
+    st.markdown("A student's seats for an exam session, answered from an in-memory index instead of a query per "
+                "lookup. The index is refreshed incrementally when it is older than "
+                f"{LOOKUP_REFRESH_SECONDS:g}s. For exam-morning traffic run `python -m seat_allocator lookup-server`.")
+    c1, c2 = st.columns(2)
+    date_from = c1.date_input("Session from", key="lookup_from")
+    date_to = c2.date_input("Session to", value=date_from, key="lookup_to")
+    if date_to < date_from:
+        st.error("'To' date must not be before 'From' date.")
+        st.stop()
+    index = get_seat_index(date_from, date_to)
+    if (datetime.now() - index.refreshed_at).total_seconds() > LOOKUP_REFRESH_SECONDS:
+        index.refresh()
+    srn = st.text_input("SRN")
+    if srn:
+        seats = index.lookup(srn)
+        if seats:
+            st.table(pd.DataFrame(seats))
+        else:
+            st.info("No seat allocated to this SRN in the session.")
+    stats = index.stats()
+    st.caption(f"{stats['allocations']} seats of {stats['students']} students in {stats['exams']} exams; "
+               f"refreshed {stats['refreshed_at']}, {stats['lookups']} lookups served.")
+
+if page == "Seat Lookup":
+    timed_page(seat_lookup_ui)
 
 # ---------- QUERIES & PROCEDURES ----------
-def procedures_ui():
-    st.header("Queries & Procedures")
-    st.markdown("You can run ad-hoc SELECT queries (read-only) and 'procedures' we create.")
+def adhoc_query_ui():
+    """
+    Ad-hoc SELECT box (see seat_allocator.adhoc). On MySQL the query is
+    checked and costed with EXPLAIN first, then streamed into the table a
+    page at a time under a row limit and max_execution_time. On the snapshot
+    it is checked, not costed, and streamed the same way by DuckDB under the
+    same limits. Export CSV writes the rows to a temporary file as they
+    arrive, never to a DataFrame.
+    """
     st.subheader("Run a SELECT query")
+    manifest = snapshot_manifest()
+    source = "MySQL"
+    if manifest:
+        source = st.radio("Run against", ["MySQL", "Snapshot"], horizontal=True, key="adhoc_source",
+                          help=f"Snapshot: DuckDB SQL over the Parquet export of {', '.join(manifest['tables'])} "
+                               f"as of {manifest['watermark']}, which keeps heavy queries off the live tables.")
     qtext = st.text_area("SELECT query", value="SELECT * FROM allocations LIMIT 100")
-    if st.button("Run SELECT"):
-        if not qtext.strip().lower().startswith("select"):
-            st.error("Only SELECT queries allowed here.")
-        else:
+    max_rows = int(st.number_input("Row limit", min_value=1, max_value=ADHOC_MAX_ROWS, value=ADHOC_MAX_ROWS, step=100))
+    if source == "Snapshot":
+        st.caption(f"Reads only the snapshot files, stopped after {ADHOC_TIMEOUT_MS / 1000:g}s; not costed, as it "
+                   f"does not touch the live tables. Export CSV writes up to {ADHOC_EXPORT_MAX_ROWS:,} rows.")
+    else:
+        st.caption(f"Read-only, stopped after {ADHOC_TIMEOUT_MS / 1000:g}s; queries the optimizer costs above "
+                   f"{ADHOC_MAX_COST:,.0f} are refused. Export CSV writes up to {ADHOC_EXPORT_MAX_ROWS:,} rows.")
+    b1, b2, b3 = st.columns([1, 1, 4])
+    run = b1.button("Run SELECT")
+    export = b2.button("Export CSV")
+    if not (run or export):
+        return
+    try:
+        sql = check_select(qtext)
+    except ValueError as e:
+        st.error(str(e))
+        return
+
+    if source == "Snapshot":
+        con = get_snapshot_db()
+
+        def on_wait(seconds):
+            # a Streamlit call while DuckDB works: a click on Cancel (a rerun) raises here and interrupts it
+            status.caption(f"Running for {seconds:.0f}s...")
+
+        open_cursor = partial(snapshot_cursor, con, sql, max_rows, on_wait=on_wait)
+        export_rows = partial(export_snapshot_csv, con, sql, on_wait=on_wait)
+        errors, kind = (Exception,), "snapshot"  # duckdb.Error or TimeoutError; duckdb is imported lazily
+    else:
+        db = get_db()
+        try:
+            plan = explain_select(db, sql)
+        except mysql.connector.Error as e:
+            st.error(f"Error: {e}")
+            return
+        scans = ", ".join(f"{table} ({int(n):,} rows)" for table, n in plan["scans"])
+        st.caption(f"Estimated cost {plan['cost']:,.0f}, about {plan['rows']:,} rows"
+                   + (f"; full scan of {scans}" if scans else "") + ".")
+        if plan["cost"] > ADHOC_MAX_COST:
+            st.error(f"Refused: estimated cost {plan['cost']:,.0f} is above {ADHOC_MAX_COST:,.0f}. Filter on an "
+                     "indexed column, join on keys" + (", or run it against the snapshot." if manifest else "."))
+            return
+        open_cursor = partial(adhoc_cursor, db, sql, max_rows)
+        export_rows = partial(export_csv, db, sql)
+        errors, kind = (mysql.connector.Error,), "adhoc"
+
+    started = time.perf_counter()
+    # clicking Cancel reruns the page: the stream stops at its next page and the query is killed
+    cancel = b3.empty()
+    table, status = st.empty(), st.empty()
+    try:
+        if export:
+            with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as f:
+                path = f.name
             try:
-                df = run_select(qtext)
-                st.dataframe(df)
-            except Exception as e:
-                st.error(f"Error: {e}")
+                with st.spinner("Exporting..."):
+                    n, truncated = export_rows(path)
+                status.empty()
+                with open(path, "rb") as f:
+                    st.download_button(f"Download CSV ({n:,} rows)", f, "query.csv", "text/csv")
+            finally:
+                os.remove(path)
+            limit = ADHOC_EXPORT_MAX_ROWS
+        else:
+            cancel.button("Cancel", key="adhoc_cancel")
+            rows = []
+            with open_cursor() as result:
+                for page_rows in result.pages():
+                    rows.extend(page_rows)
+                    table.dataframe(pd.DataFrame(rows, columns=result.columns))
+                    status.caption(f"{len(rows):,} rows so far...")
+            cancel.empty()
+            if not rows:
+                table.dataframe(pd.DataFrame(columns=result.columns))
+            n, truncated, limit = len(rows), result.truncated, max_rows
+            status.caption(f"{n:,} rows in {time.perf_counter() - started:.2f}s.")
+    except errors as e:
+        cancel.empty()
+        status.empty()
+        st.error(f"Error: {e}")
+        return
+    _record_call(kind, sql, started, n)
+    if truncated:
+        st.warning(f"More rows match; only the first {limit:,} were read.")
+
+def procedures_ui():
+    st.header("Queries & Procedures")
+    st.markdown("You can run ad-hoc SELECT queries (read-only) and 'procedures' we create.")
+    adhoc_query_ui()
 
-    
     st.markdown("---")
     st.subheader("Call Custom Stored Procedures")
 
@@ -686,35 +2066,138 @@ def procedures_ui():
                 st.error(f"Error calling function: {e}")
 
 if page == "Queries & Procedures":
-    procedures_ui()
+    timed_page(procedures_ui)
 
 # ---------- DASHBOARD ----------
+# DuckDB equivalents of the dashboard queries, over the snapshot tables
+# (which have no exam_hall_stats: the counts come from allocations)
+SNAPSHOT_DASHBOARD_SQL = {
+    "filled": """SELECT h.hall_name, COUNT(a.allocation_id) AS filled
+                 FROM halls h
+                 LEFT JOIN seats se ON se.hall_id = h.hall_id
+                 LEFT JOIN allocations a ON a.seat_id = se.seat_id
+                 GROUP BY h.hall_id, h.hall_name""",
+    "per_exam": """SELECT e.course_code, COUNT(a.allocation_id) AS allocated
+                   FROM exams e
+                   LEFT JOIN allocations a ON a.exam_id = e.exam_id
+                   GROUP BY e.course_code""",
+    "exam_halls": """SELECT h.hall_name, hs.seat_count, COUNT(*) AS allocated,
+                            ROUND(100 * COUNT(*) / NULLIF(hs.seat_count, 0), 2) AS occupancy_pct,
+                            COUNT(*) FILTER (WHERE a.check_status = 'PENDING') AS checks_pending,
+                            COUNT(*) FILTER (WHERE a.check_status = 'OK') AS checks_ok,
+                            COUNT(*) FILTER (WHERE a.check_status = 'MISMATCH') AS checks_mismatch,
+                            COUNT(*) FILTER (WHERE a.check_status = 'ABSENT') AS checks_absent,
+                            COUNT(*) FILTER (WHERE a.check_status NOT IN ('PENDING', 'OK', 'MISMATCH', 'ABSENT'))
+                                AS checks_other
+                     FROM allocations a
+                     JOIN seats se ON se.seat_id = a.seat_id
+                     JOIN halls h ON h.hall_id = se.hall_id
+                     JOIN (SELECT hall_id, COUNT(*) AS seat_count FROM seats GROUP BY hall_id) hs ON hs.hall_id = h.hall_id
+                     WHERE a.exam_id = ?
+                     GROUP BY h.hall_name, hs.seat_count
+                     ORDER BY h.hall_name""",
+}
+
 def dashboard_ui():
     st.header("Dashboard")
+    manifest = snapshot_manifest()
+    use_snapshot = bool(manifest) and st.radio(
+        "Source", ["Live", "Snapshot"], horizontal=True, key="dash_source") == "Snapshot"
+    if use_snapshot:
+        st.caption(f"Read with DuckDB from the Parquet snapshot in {SNAPSHOT_DIR} as of {manifest['watermark']} "
+                   "(export again with `python -m seat_allocator snapshot`). Halls without allocations are not listed.")
+    else:
+        st.caption("Read from exam_hall_stats, the per exam × hall summary kept current by triggers and the bulk allocators.")
     st.subheader("Seats filled per hall (all exams combined)")
     q = """
-    SELECT h.hall_name, COUNT(a.allocation_id) AS filled
+    SELECT h.hall_name, IFNULL(SUM(ehs.allocated), 0) AS filled
     FROM halls h
-    LEFT JOIN seats s ON s.hall_id = h.hall_id
-    LEFT JOIN allocations a ON a.seat_id = s.seat_id
-    GROUP BY h.hall_name
+    LEFT JOIN exam_hall_stats ehs ON ehs.hall_id = h.hall_id
+    GROUP BY h.hall_id, h.hall_name
     """
-    df = run_select(q)
+    df = snapshot_select(SNAPSHOT_DASHBOARD_SQL["filled"]) if use_snapshot else cached_select(q)
     if not df.empty:
         st.bar_chart(df.set_index('hall_name'))
     else:
         st.write("No data yet.")
 
     st.subheader("Students per exam")
-    q2 = """SELECT e.course_code, COUNT(a.allocation_id) AS allocated
+    q2 = """SELECT e.course_code, IFNULL(SUM(ehs.allocated), 0) AS allocated
             FROM exams e
-            LEFT JOIN allocations a ON a.exam_id = e.exam_id
+            LEFT JOIN exam_hall_stats ehs ON ehs.exam_id = e.exam_id
             GROUP BY e.course_code"""
-    df2 = run_select(q2)
+    df2 = snapshot_select(SNAPSHOT_DASHBOARD_SQL["per_exam"]) if use_snapshot else cached_select(q2)
     st.bar_chart(df2.set_index('course_code'))
 
+    st.subheader("Halls of an exam")
+    exam_sel = search_select("Exam", "exams", "dash_exam")
+    if exam_sel:
+        q3 = """SELECT h.hall_name, ehs.seat_count, ehs.allocated,
+                       ROUND(100 * ehs.allocated / NULLIF(ehs.seat_count, 0), 2) AS occupancy_pct,
+                       ehs.checks_pending, ehs.checks_ok, ehs.checks_mismatch, ehs.checks_absent, ehs.checks_other
+                FROM exam_hall_stats ehs
+                JOIN halls h ON h.hall_id = ehs.hall_id
+                WHERE ehs.exam_id = %s
+                ORDER BY h.hall_name"""
+        df3 = (snapshot_select(SNAPSHOT_DASHBOARD_SQL["exam_halls"], [exam_sel]) if use_snapshot
+               else cached_select(q3, params=(exam_sel,)))
+        if df3.empty:
+            st.write("No halls assigned and no allocations for this exam.")
+        else:
+            st.dataframe(df3)
+
 if page == "Dashboard":
-    dashboard_ui()
+    timed_page(dashboard_ui)
+
+
+# ---------- PERFORMANCE ----------
+def perf_ui():
+    st.header("Performance")
+    log = get_perf_log()
+    calls = pd.DataFrame(log.calls(), columns=["at", "page", "caller", "via", "kind", "sql", "ms", "rows", "bytes"])
+    pages = pd.DataFrame(log.pages(), columns=["at", "page", "ms", "db_calls", "db_ms", "data_ms"])
+    st.caption(f"Last {len(calls)} DB calls and {len(pages)} page renders of this server process "
+               f"(ring buffer of {PERF_LOG_SIZE}). Metrics file: {log.metrics_file or 'off (set PERF_METRICS_FILE)'}.")
+    if calls.empty and pages.empty:
+        st.info("Nothing recorded yet; open a few pages first.")
+        st.stop()
+
+    st.subheader("Page renders")
+    st.caption("db_ms adds up every DB call of a render; data_ms is the time spent waiting for load_page_data, "
+               "which runs a page's reads concurrently and so costs about its slowest read.")
+    if not pages.empty:
+        st.dataframe(pages.groupby("page").agg(renders=("ms", "size"), median_ms=("ms", "median"), max_ms=("ms", "max"),
+                                               db_calls=("db_calls", "mean"), db_ms=("db_ms", "mean"),
+                                               data_ms=("data_ms", "mean"))
+                     .round(1).sort_values("median_ms", ascending=False))
+
+    st.subheader("DB calls per page and caller")
+    page_sel = st.selectbox("Page", ["All"] + sorted(calls["page"].dropna().unique().tolist()), key="perf_page")
+    scope = calls if page_sel == "All" else calls[calls["page"] == page_sel]
+    if not scope.empty:
+        st.dataframe(scope.fillna({"page": "-", "via": "-"})
+                     .groupby(["page", "caller", "via", "kind"])
+                     .agg(calls=("ms", "size"), total_ms=("ms", "sum"), avg_ms=("ms", "mean"), max_ms=("ms", "max"),
+                          rows=("rows", "sum"), bytes=("bytes", "sum"))
+                     .round(1).sort_values("total_ms", ascending=False))
+
+    st.subheader("Slow query log")
+    threshold = st.number_input("Slower than (ms)", min_value=0.0, value=SLOW_QUERY_MS, step=50.0)
+    slow = calls[calls["ms"] >= threshold].sort_values("ms", ascending=False)
+    st.write(f"{len(slow)} calls of {len(calls)} took {threshold:g} ms or more.")
+    st.dataframe(slow.head(200))
+
+    c1, c2 = st.columns(2)
+    # served to the browser: the server only ever writes PERF_METRICS_FILE, which is set by whoever runs the app
+    c1.download_button(f"Download {len(pages) + len(calls)} records (JSON lines)",
+                       "".join(json.dumps(rec, default=str) + "\n" for rec in log.pages() + log.calls()),
+                       "perf_metrics.jsonl", "application/x-ndjson")
+    if c2.button("Reset"):
+        log.reset()
+        st.success("Cleared.")
+
+if page == "Performance":
+    timed_page(perf_ui)
 
 
 # ---------- DB ADMIN (USERS & TRIGGERS) ----------
@@ -725,7 +2208,8 @@ def db_admin_ui():
     
     db_name = DB_CONFIG.get('database')
     
-    tab1, tab2 = st.tabs(["User Management", "Trigger Management"])
+    tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs(["User Management", "Trigger Management", "Connection Pool",
+                                                        "Query Cache", "Id Sequences", "Migrations", "Summaries"])
 
     with tab1:
         # --- User Management ---
@@ -862,12 +2346,109 @@ def db_admin_ui():
                     st.success("Trigger creation statement executed.")
                 except Exception as e:
                     st.error(f"Error creating trigger: {e}")
+
+    with tab3:
+        # --- Connection Pool ---
+        st.subheader("Connection Pool")
+        pool = get_pool()
+        snap = pool.snapshot()
+        st.markdown(f"Pool size **{snap['size']}**, checkout timeout **{pool.timeout:g}s**, "
+                    f"ping after **{pool.ping_after:.0f}s** idle, recycle after **{pool.recycle_after:.0f}s**.")
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Checkouts", snap["checkouts"])
+        m2.metric("In use / idle", f"{snap['in_use']} / {snap['idle']}")
+        m3.metric("Avg wait (ms)", f"{snap['wait_time_avg_ms']:.2f}")
+        m4.metric("Exhaustion events", snap["exhaustion_events"])
+        st.dataframe(pd.DataFrame(sorted(snap.items()), columns=["metric", "value"]).astype({"value": str}))
+        if st.button("Reset pool metrics"):
+            pool.reset_stats()
+            st.success("Pool metrics reset.")
+
+    with tab4:
+        # --- Query Cache ---
+        st.subheader("Query Cache")
+        cache = get_query_cache()
+        snap, per_table = cache.snapshot()
+        st.markdown(f"Entries expire after **{cache.ttl:g}s** and are dropped as soon as a committed write touches one of their tables. "
+                    f"Results read while one of their tables was invalidated are not cached ({snap['stale_puts']} so far).")
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Hits", snap["hits"])
+        m2.metric("Misses", snap["misses"])
+        m3.metric("Hit rate", f"{snap['hit_rate']:.0%}")
+        m4.metric("Cached results", snap["entries"])
+        if per_table:
+            st.dataframe(pd.DataFrame.from_dict(per_table, orient="index").rename_axis("table").reset_index())
+        c1, c2 = st.columns(2)
+        if c1.button("Clear query cache"):
+            invalidate_tables(None)
+            st.success("Query cache cleared.")
+        if c2.button("Reset cache metrics"):
+            cache.reset_stats()
+            st.success("Cache metrics reset.")
+
+    with tab5:
+        # --- Id Sequences ---
+        st.subheader("Id Sequences")
+        st.markdown("New rows take their primary key from these sequences. Sync after inserting rows with "
+                    "explicit ids outside the app, so the sequences move past them.")
+        st.dataframe(run_select("SELECT seq_name, next_id FROM id_sequences ORDER BY seq_name"))
+        if st.button("Sync id sequences"):
+            try:
+                run_query("CALL sync_id_sequences()")
+                st.success("Sequences synced.")
+            except Exception as e:
+                st.error(f"Error: {e}")
+
+    with tab6:
+        # --- Schema Migrations ---
+        st.subheader("Schema Migrations")
+        st.markdown("Versioned changes in `migrations/`, recorded in `schema_migrations`. "
+                    "Same as running `python migrations/migrate.py`.")
+        with get_conn() as conn:
+            status = pd.DataFrame(migration_status(conn), columns=["version", "name", "applied", "changed"])
+        st.dataframe(status)
+        if status["changed"].any():
+            st.warning("Some applied migration files were edited afterwards; add a new migration instead.")
+        pending = int((~status["applied"]).sum())
+        if pending and st.button(f"Apply {pending} pending migration(s)"):
+            try:
+                with get_conn() as conn:
+                    done = migrate(conn)
+                invalidate_tables(None)
+                st.success("Applied " + ", ".join(f"{v:04d}_{n} ({ms} ms)" for v, n, ms in done))
+            except Exception as e:
+                st.error(f"Error: {e}")
+
+    with tab7:
+        # --- Exam x Hall Summary ---
+        st.subheader("Exam × Hall Summary")
+        st.markdown("`exam_hall_stats` is updated by triggers and the bulk allocators. Rebuild it after "
+                    "writing to allocations, seats or seat_checks outside the app with triggers disabled, "
+                    "or when the drift check below reports rows.")
+        if st.button("Check for drift"):
+            drift = run_select("""SELECT ehs.exam_id, ehs.hall_id, ehs.allocated, COUNT(a.allocation_id) AS actual
+                                  FROM exam_hall_stats ehs
+                                  LEFT JOIN seats se ON se.hall_id = ehs.hall_id
+                                  LEFT JOIN allocations a ON a.exam_id = ehs.exam_id AND a.seat_id = se.seat_id
+                                  GROUP BY ehs.exam_id, ehs.hall_id, ehs.allocated
+                                  HAVING ehs.allocated <> actual""")
+            if drift.empty:
+                st.success("Allocated counts match the allocations table.")
+            else:
+                st.dataframe(drift)
+        if st.button("Rebuild summary"):
+            try:
+                started = time.perf_counter()
+                run_query("CALL rebuild_exam_hall_stats(NULL)")
+                st.success(f"Rebuilt in {time.perf_counter() - started:.2f}s.")
+            except Exception as e:
+                st.error(f"Error: {e}")
 if page == "Export":
     export_ui()
 
 # ---------- ADD THIS BLOCK ----------
 if page == "DB Admin":
-    db_admin_ui()
+    timed_page(db_admin_ui)
 # ------------------------------------
 
 # ---------- QUERIES: General safety ----------
@@ -0,0 +1,127 @@
+"""
+Benchmark for the set-based `auto_allocate_exam` procedure.
+
+Clones the schema (tables, triggers, procedures; no data) of the app database
+into a scratch database, then for each size seeds N students, N seats in
+500-seat halls and one exam, and times `CALL auto_allocate_exam` + COMMIT.
+
+    python benchmarks/bench_auto_allocate.py --sizes 1000 10000 50000 100000
+
+The scratch database is dropped and recreated on every run, so it must not be
+the app database.
+"""
+
+import argparse
+import os
+import time
+
+import mysql.connector
+
+TABLES = ["students", "exams", "halls", "seats", "invigilators",
+          "hall_assignments", "allocations", "seat_checks", "id_sequences", "import_jobs", "exam_hall_stats"]
+SEATS_PER_HALL = 500
+BATCH = 5000
+
+
+def connect(args, database=None):
+    return mysql.connector.connect(host=args.host, user=args.user, password=args.password,
+                                   database=database, auth_plugin="mysql_native_password")
+
+
+def clone_schema(cur, source, target):
+    """Recreate `target` with the tables, triggers and procedures of `source`."""
+    cur.execute(f"DROP DATABASE IF EXISTS `{target}`")
+    cur.execute(f"CREATE DATABASE `{target}`")
+    for table in TABLES:
+        cur.execute(f"SHOW CREATE TABLE `{source}`.`{table}`")
+        ddl = cur.fetchone()[1]
+        cur.execute(f"USE `{target}`")
+        cur.execute(ddl)
+    cur.execute("SELECT ROUTINE_NAME, ROUTINE_TYPE FROM information_schema.ROUTINES "
+                "WHERE ROUTINE_SCHEMA = %s", (source,))
+    for name, kind in cur.fetchall():
+        cur.execute(f"SHOW CREATE {kind} `{source}`.`{name}`")
+        cur.execute(f"USE `{target}`")
+        cur.execute(cur.fetchone()[2])
+    cur.execute("SELECT TRIGGER_NAME FROM information_schema.TRIGGERS WHERE TRIGGER_SCHEMA = %s", (source,))
+    for (name,) in cur.fetchall():
+        cur.execute(f"SHOW CREATE TRIGGER `{source}`.`{name}`")
+        cur.execute(f"USE `{target}`")
+        cur.execute(cur.fetchone()[2])
+
+
+def insert_batched(cur, sql, rows):
+    for i in range(0, len(rows), BATCH):
+        cur.executemany(sql, rows[i:i + BATCH])
+
+
+def seed(conn, n):
+    cur = conn.cursor()
+    for table in reversed(TABLES):
+        cur.execute(f"DELETE FROM {table}")
+    halls = (n + SEATS_PER_HALL - 1) // SEATS_PER_HALL
+    insert_batched(cur, "INSERT INTO students (student_id, srn, full_name, department, year_of_study) "
+                        "VALUES (%s,%s,%s,%s,%s)",
+                   [(i, f"BENCH{i:07d}", f"Student {i}", "CSE", 1 + i % 4) for i in range(1, n + 1)])
+    cur.execute("INSERT INTO exams (exam_id, course_code, course_name, exam_date, start_time, end_time) "
+                "VALUES (1, 'BENCH', 'Benchmark', '2030-01-01', '09:00:00', '12:00:00')")
+    insert_batched(cur, "INSERT INTO halls (hall_id, hall_name, capacity) VALUES (%s,%s,%s)",
+                   [(h, f"Bench Hall {h}", SEATS_PER_HALL) for h in range(1, halls + 1)])
+    insert_batched(cur, "INSERT INTO seats (seat_id, hall_id, seat_number) VALUES (%s,%s,%s)",
+                   [(i, 1 + (i - 1) // SEATS_PER_HALL, f"R{(i - 1) % SEATS_PER_HALL}")
+                    for i in range(1, n + 1)])
+    insert_batched(cur, "INSERT INTO hall_assignments (assignment_id, exam_id, hall_id, start_time, end_time) "
+                        "VALUES (%s,1,%s,'09:00:00','12:00:00')",
+                   [(h, h) for h in range(1, halls + 1)])
+    cur.execute("CALL sync_id_sequences()")
+    conn.commit()
+    cur.close()
+
+
+def run_once(conn):
+    cur = conn.cursor()
+    started = time.perf_counter()
+    cur.execute("CALL auto_allocate_exam(1)")
+    allocated = cur.fetchall()[0][0]
+    while cur.nextset():
+        pass
+    conn.commit()
+    elapsed = time.perf_counter() - started
+    cur.execute("SELECT COUNT(*) FROM allocations WHERE check_status = 'PENDING'")
+    checks = cur.fetchone()[0]
+    cur.close()
+    return allocated, checks, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("DB_HOST", "localhost"))
+    parser.add_argument("--user", default=os.getenv("DB_USER", "root"))
+    parser.add_argument("--password", default=os.getenv("DB_PASSWORD", ""))
+    parser.add_argument("--source-database", default="exam_seat_allocator")
+    parser.add_argument("--database", default="exam_seat_allocator_bench")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000, 50000, 100000])
+    args = parser.parse_args()
+    if args.database == args.source_database:
+        parser.error("--database must differ from --source-database (it is dropped)")
+
+    admin = connect(args)
+    clone_schema(admin.cursor(), args.source_database, args.database)
+    admin.close()
+
+    conn = connect(args, args.database)
+    print(f"{'students':>10} {'allocated':>10} {'seconds':>9} {'rows/s':>10} {'growth':>7}")
+    previous = None
+    for n in args.sizes:
+        seed(conn, n)
+        allocated, checks, elapsed = run_once(conn)
+        assert allocated == n and checks == n, (allocated, checks)
+        # time ratio divided by size ratio: ~1.0 means linear growth
+        growth = (elapsed / previous[1]) / (n / previous[0]) if previous else 1.0
+        print(f"{n:>10} {allocated:>10} {elapsed:>9.3f} {n / elapsed:>10.0f} {growth:>7.2f}")
+        previous = (n, elapsed)
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
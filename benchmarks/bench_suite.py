@@ -0,0 +1,205 @@
+"""
+Benchmark suite for the allocator, the heavy pages and the SQL functions.
+
+Clones the schema of the app database into a scratch database, fills it with
+synthetic_data.generate (same dataset options and --seed, same rows), then
+times against the local MySQL:
+
+  - the reads behind the Auto-Allocate, Seat Map, Dashboard and exam-day
+    console pages (taken from app.py and seat_allocator, so they stay the
+    queries the app runs),
+  - count_allocated_students, hall_occupancy and get_student_seat,
+  - CALL auto_allocate_exam on exams the dataset left partly allocated.
+
+Results are written as JSON (median / p95 / min / max ms per benchmark, plus
+the dataset, MySQL version and git commit) so runs of different commits can
+be compared:
+
+    python benchmarks/bench_suite.py --password '...' --output before.json
+    git checkout my-branch
+    python benchmarks/bench_suite.py --password '...' --output after.json --baseline before.json
+
+With --baseline the medians are compared and the run fails when one is more
+than --max-regression times slower. Only SQL is timed: page rendering in
+Streamlit is not part of it.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+
+from bench_auto_allocate import clone_schema, connect
+from check_query_plans import collect_queries
+from synthetic_data import add_dataset_arguments, dataset_options, generate
+
+# benchmark name -> (function or constant in app.py or seat_allocator, n-th SELECT in it, parameter names)
+PAGE_QUERIES = {
+    "auto_allocate.unallocated_students": ("Q_UNALLOCATED_STUDENTS", 0, ("exam_id",)),
+    "auto_allocate.free_seats": ("Q_FREE_SEATS", 0, ("exam_id", "exam_id")),
+    "seat_map.hall_grid": ("load_hall_grid", 0, ("hall_id",)),
+    "seat_map.allocations": ("seat_map_ui", 0, ("exam_id", "hall_id")),
+    "dashboard.hall_fill": ("dashboard_ui", 0, ()),
+    "dashboard.students_per_exam": ("dashboard_ui", 1, ()),
+    "dashboard.halls_of_exam": ("dashboard_ui", 2, ("exam_id",)),
+    "console.hall_checks": ("Q_HALL_CHECKS", 0, ("exam_id", "hall_id")),
+}
+FUNCTIONS = {
+    "function.count_allocated_students": ("SELECT count_allocated_students(%s)", ("exam_id",)),
+    "function.hall_occupancy": ("SELECT hall_occupancy(%s, %s)", ("exam_id", "hall_id")),
+    "function.get_student_seat": ("SELECT get_student_seat(%s)", ("srn",)),
+}
+
+
+def page_queries():
+    """PAGE_QUERIES resolved to SQL text from app.py and seat_allocator."""
+    by_context = {}
+    for context, _, sql in collect_queries()[0]:
+        by_context.setdefault(context, []).append(sql)
+    resolved = {}
+    for name, (context, index, params) in PAGE_QUERIES.items():
+        found = by_context.get(context, [])
+        if index >= len(found):
+            raise SystemExit(f"{name}: no SELECT #{index} in {context}; update PAGE_QUERIES")
+        resolved[name] = (found[index], params)
+    return resolved
+
+
+def sample_params(cur):
+    """The busiest exam, its busiest hall and an allocated student: the worst case for each page."""
+    cur.execute("""SELECT exam_id, hall_id FROM exam_hall_stats
+                   ORDER BY allocated DESC, exam_id, hall_id LIMIT 1""")
+    exam_id, hall_id = cur.fetchone()
+    cur.execute("""SELECT s.srn FROM allocations a JOIN students s ON s.student_id = a.student_id
+                   WHERE a.exam_id = %s ORDER BY a.allocation_id LIMIT 1""", (exam_id,))
+    return {"exam_id": exam_id, "hall_id": hall_id, "srn": cur.fetchone()[0]}
+
+
+def summarize(samples_ms, rows=None):
+    ordered = sorted(samples_ms)
+    result = {"runs": len(ordered), "median_ms": round(statistics.median(ordered), 3),
+              "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 3),
+              "min_ms": round(ordered[0], 3), "max_ms": round(ordered[-1], 3)}
+    if rows is not None:
+        result["rows"] = rows
+    return result
+
+
+def time_select(cur, sql, params, runs):
+    samples, rows = [], 0
+    for _ in range(runs):
+        started = time.perf_counter()
+        cur.execute(sql, params)
+        rows = len(cur.fetchall())
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples, rows)
+
+
+def time_auto_allocate(conn, runs):
+    """CALL auto_allocate_exam + COMMIT on up to `runs` exams that still have students and free seats."""
+    cur = conn.cursor()
+    cur.execute("""SELECT exam_id FROM exam_hall_stats GROUP BY exam_id
+                   HAVING SUM(seat_count) > SUM(allocated) ORDER BY exam_id LIMIT %s""", (runs,))
+    exams = [r[0] for r in cur.fetchall()]
+    samples, allocated = [], 0
+    for exam_id in exams:
+        started = time.perf_counter()
+        cur.execute("CALL auto_allocate_exam(%s)", (exam_id,))
+        allocated += cur.fetchall()[0][0]
+        while cur.nextset():
+            pass
+        conn.commit()
+        samples.append((time.perf_counter() - started) * 1000)
+    cur.close()
+    return summarize(samples, allocated) if samples else None
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, max_regression):
+    """Print median ratios against a baseline run; returns the names slower than max_regression."""
+    slower = []
+    print(f"{'benchmark':<40} {'baseline ms':>12} {'now ms':>10} {'ratio':>7}")
+    for name, now in results.items():
+        before = baseline.get("results", {}).get(name)
+        if not before or not before["median_ms"]:
+            print(f"{name:<40} {'-':>12} {now['median_ms']:>10.2f} {'new':>7}")
+            continue
+        ratio = now["median_ms"] / before["median_ms"]
+        print(f"{name:<40} {before['median_ms']:>12.2f} {now['median_ms']:>10.2f} {ratio:>7.2f}")
+        if ratio > max_regression:
+            slower.append(name)
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("DB_HOST", "localhost"))
+    parser.add_argument("--user", default=os.getenv("DB_USER", "root"))
+    parser.add_argument("--password", default=os.getenv("DB_PASSWORD", ""))
+    parser.add_argument("--source-database", default="exam_seat_allocator")
+    parser.add_argument("--database", default="exam_seat_allocator_suite")
+    add_dataset_arguments(parser)
+    parser.add_argument("--runs", type=int, default=20, help="timed runs per read benchmark")
+    parser.add_argument("--allocation-runs", type=int, default=3, help="exams to auto-allocate")
+    parser.add_argument("--output", help="write the JSON results here (default: stdout)")
+    parser.add_argument("--baseline", help="JSON of an earlier run to compare medians against")
+    parser.add_argument("--max-regression", type=float, default=1.5)
+    args = parser.parse_args()
+    if args.database == args.source_database:
+        parser.error("--database must differ from --source-database (it is dropped)")
+
+    queries = page_queries()
+    admin = connect(args)
+    clone_schema(admin.cursor(), args.source_database, args.database)
+    admin.close()
+    conn = connect(args, args.database)
+    started = time.perf_counter()
+    counts = generate(conn, **dataset_options(args))
+    generate_s = time.perf_counter() - started
+
+    cur = conn.cursor()
+    cur.execute("SELECT VERSION()")
+    mysql_version = cur.fetchone()[0]
+    params = sample_params(cur)
+    results = {}
+    for name, (sql, names) in queries.items():
+        results[name] = time_select(cur, sql, tuple(params[p] for p in names), args.runs)
+    for name, (sql, names) in FUNCTIONS.items():
+        results[name] = time_select(cur, sql, tuple(params[p] for p in names), args.runs)
+    cur.close()
+    allocation = time_auto_allocate(conn, args.allocation_runs)
+    if allocation:
+        results["allocate.auto_allocate_exam"] = allocation
+    conn.close()
+
+    report = {"commit": git_commit(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "mysql_version": mysql_version, "python": platform.python_version(),
+              "dataset": {**dataset_options(args), "rows": counts, "generate_seconds": round(generate_s, 2)},
+              "params": params, "results": results}
+    text = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            slower = compare(results, json.load(f), args.max_regression)
+        if slower:
+            print(f"\nSlower than {args.max_regression}x the baseline: {', '.join(slower)}")
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Check that the Performance page keeps attributing DB calls to the page that
+made them when the page is rerun.
+
+Runs app.py headless with Streamlit's AppTest (against the database app.py
+is configured for), opens a page, reruns it a few times and reads the page
+and DB call records from a temporary PERF_METRICS_FILE. The query cache is
+turned off (QUERY_CACHE_TTL=0), so every render reads the database through
+the Database cached by get_db(), which keeps the _record_call of the first
+run. Every render must report the DB calls it made, and that many calls must
+carry its page name; when per-run state leaks into cached resources, renders
+after the first report none.
+
+    python benchmarks/check_perf_attribution.py
+    python benchmarks/check_perf_attribution.py --page "Hall Assignments" --reruns 3
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+APP_PATH = os.path.join(ROOT, "app.py")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page", default="Dashboard", help="sidebar page to render (one that reads the database)")
+    parser.add_argument("--reruns", type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        metrics = os.path.join(tmp, "perf_metrics.jsonl")
+        os.environ["PERF_METRICS_FILE"] = metrics
+        os.environ["QUERY_CACHE_TTL"] = "0"
+        sys.path.insert(0, ROOT)
+        from streamlit.testing.v1 import AppTest
+
+        app = AppTest.from_file(APP_PATH, default_timeout=60)
+        app.run()
+        app.sidebar.radio[0].set_value(args.page).run()
+        for _ in range(args.reruns):
+            app.run()
+        if app.exception:
+            raise SystemExit(f"{args.page} failed: {app.exception[0].message}")
+        with open(metrics, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+
+    renders = [r for r in records if r["type"] == "page" and r["page"] == args.page]
+    calls = [r for r in records if r["type"] == "db" and r["page"] == args.page]
+    print(f"{args.page}: {len(renders)} renders with " + ", ".join(str(r["db_calls"]) for r in renders)
+          + f" DB calls; {len(calls)} call records carry the page name.")
+    if len(renders) != args.reruns + 1:
+        raise SystemExit(f"Expected {args.reruns + 1} renders of {args.page}.")
+    if any(r["db_calls"] == 0 for r in renders):
+        raise SystemExit("A render reported no DB calls: calls are being counted outside the page being rendered.")
+    if len(calls) != sum(r["db_calls"] for r in renders):
+        raise SystemExit("The call records of the page do not add up to the calls its renders reported.")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Query-plan regression check for app.py and the seat_allocator package.
+
+Collects every static SELECT in app.py and seat_allocator/*.py (string
+literals and constants joined with +, also constants imported from another
+of these files; f-strings are built at runtime and only counted), clones the schema
+of the app database into a scratch database, seeds it like
+bench_auto_allocate.py (N students and seats, one allocated exam) and runs
+EXPLAIN on each query. A query that reads a large table with a full table
+scan (type=ALL) fails the check unless ALLOWED_SCANS lists it.
+
+    python benchmarks/check_query_plans.py --password '...' --students 20000
+    python benchmarks/check_query_plans.py --password '...' --verbose   # every plan
+
+Run it after adding or changing a query in either, or after a migration that
+touches indexes. The scratch database is dropped and recreated on every run,
+so it must not be the app database.
+"""
+
+import argparse
+import ast
+import os
+import re
+
+import mysql.connector
+
+from bench_auto_allocate import clone_schema, connect, seed
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+APP_PATH = os.path.join(ROOT, "app.py")
+LIBRARY_DIR = os.path.join(ROOT, "seat_allocator")
+LARGE_TABLES = {"students", "seats", "allocations", "seat_checks"}
+# function or constant name -> large tables it may scan, because it reads all of them by design
+ALLOWED_SCANS = {
+    "Q_UNALLOCATED_STUDENTS": {"students"},  # every student is a candidate
+    "load_exam_seating": {"students"},       # same candidate list, with cohort columns
+    "load_exam_repair": {"students"},        # same candidate list, for re-allocation
+    "adhoc_query_ui": {"allocations"},       # default text of the ad-hoc query box
+}
+# fragments completed at runtime with an indexed WHERE; not queries on their own,
+# and DuckDB queries over the Parquet snapshot
+SKIP_CONTEXTS = {"SEARCH_SPECS", "SEAT_ORDER_SQL", "SLIP_SELECT", "SEAT_SELECT", "SNAPSHOT_DASHBOARD_SQL"}
+SELECT_RE = re.compile(r"^\s*SELECT\b.*\bFROM\b", re.S)
+ALIAS_RE = re.compile(r"\b(?:FROM|JOIN)\s+`?(\w+)`?(?:\s+(?:AS\s+)?(?!ON\b|WHERE\b|JOIN\b|LEFT\b|INNER\b|GROUP\b|"
+                      r"ORDER\b|LIMIT\b|USING\b|UNION\b|HAVING\b)(\w+))?", re.I)
+# every %s becomes this literal: a valid date for exam_date ranges, and MySQL
+# converts it to 2030 for INT columns, so each filter stays index-friendly
+SAMPLE_PARAM = "'2030-01-01'"
+
+
+class QueryCollector(ast.NodeVisitor):
+    """Static SELECT strings of a module with the function or constant they belong to."""
+
+    def __init__(self, tree, constants=None):
+        self.constants = constants if constants is not None else {}
+        self.add_constants(tree)
+        self.context = ["<module>"]
+        self.queries = []  # (context, line, sql)
+        self.dynamic = 0
+
+    def add_constants(self, tree):
+        """Module-level string constants of `tree`; returns how many were new."""
+        added = 0
+        for node in tree.body:
+            if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+                value = self.evaluate(node.value)
+                if value is not None and node.targets[0].id not in self.constants:
+                    self.constants[node.targets[0].id] = value
+                    added += 1
+        return added
+
+    def evaluate(self, node):
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            return node.value
+        if isinstance(node, ast.Name):
+            return self.constants.get(node.id)
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+            left, right = self.evaluate(node.left), self.evaluate(node.right)
+            if left is not None and right is not None:
+                return left + right
+        return None
+
+    def _scoped(self, name, node):
+        self.context.append(name)
+        self.generic_visit(node)
+        self.context.pop()
+
+    def visit_FunctionDef(self, node):
+        self._scoped(node.name, node)
+
+    def visit_Assign(self, node):
+        if len(self.context) == 1 and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            self._scoped(node.targets[0].id, node)
+        else:
+            self.generic_visit(node)
+
+    def visit_JoinedStr(self, node):
+        if any(isinstance(v, ast.Constant) and SELECT_RE.match(str(v.value)) for v in node.values[:1]):
+            self.dynamic += 1
+
+    def visit_BinOp(self, node):
+        text = self.evaluate(node)
+        if text is None:
+            self.generic_visit(node)
+        else:
+            self._found(node, text)
+
+    def visit_Constant(self, node):
+        if isinstance(node.value, str):
+            self._found(node, node.value)
+
+    def _found(self, node, text):
+        if SELECT_RE.match(text) and self.context[-1] not in SKIP_CONTEXTS:
+            self.queries.append((self.context[-1], node.lineno, text))
+
+
+def source_paths():
+    """seat_allocator/*.py, then app.py."""
+    library = sorted(os.path.join(LIBRARY_DIR, name) for name in os.listdir(LIBRARY_DIR) if name.endswith(".py"))
+    return library + [APP_PATH]
+
+
+def collect_queries(paths=None):
+    """(context, 'file:line', sql) of every static SELECT, and the number of SELECTs built at runtime."""
+    trees = {}
+    for path in paths or source_paths():
+        with open(path, encoding="utf-8") as f:
+            trees[path] = ast.parse(f.read(), path)
+    # constants shared across files: resolve until no file adds one (imports may go either way)
+    constants = {}
+    collectors = {path: QueryCollector(tree, constants) for path, tree in trees.items()}
+    while sum(collector.add_constants(trees[path]) for path, collector in collectors.items()):
+        pass
+    queries, dynamic = [], 0
+    for path, collector in collectors.items():
+        collector.visit(trees[path])
+        where = os.path.relpath(path, ROOT)
+        queries.extend((context, f"{where}:{line}", sql) for context, line, sql in collector.queries)
+        dynamic += collector.dynamic
+    return queries, dynamic
+
+
+def sample_sql(query):
+    return query.replace("%%", "\0").replace("%s", SAMPLE_PARAM).replace("\0", "%")
+
+
+def table_aliases(query):
+    """alias (or table name) -> table for every FROM/JOIN in the query."""
+    aliases = {}
+    for table, alias in ALIAS_RE.findall(query):
+        aliases[table.lower()] = table.lower()
+        if alias:
+            aliases[alias.lower()] = table.lower()
+    return aliases
+
+
+def full_scans(cur, context, query):
+    """EXPLAIN rows of `query` and the large tables it reads with type=ALL that are not allowed."""
+    cur.execute("EXPLAIN " + sample_sql(query))
+    plan = cur.fetchall()
+    aliases = table_aliases(query)
+    offenders = []
+    for row in plan:
+        table = aliases.get(str(row["table"]).lower())
+        if row["type"] == "ALL" and table in LARGE_TABLES and table not in ALLOWED_SCANS.get(context, ()):
+            offenders.append(table)
+    return plan, offenders
+
+
+def print_plan(plan):
+    for row in plan:
+        print(f"    {str(row['table']):<14} type={str(row['type']):<7} key={str(row['key']):<28} "
+              f"rows={str(row['rows']):<8} {row.get('Extra') or ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("DB_HOST", "localhost"))
+    parser.add_argument("--user", default=os.getenv("DB_USER", "root"))
+    parser.add_argument("--password", default=os.getenv("DB_PASSWORD", ""))
+    parser.add_argument("--source-database", default="exam_seat_allocator")
+    parser.add_argument("--database", default="exam_seat_allocator_plans")
+    parser.add_argument("--students", type=int, default=20000, help="students (and seats) to seed")
+    parser.add_argument("--verbose", action="store_true", help="print the plan of every query")
+    args = parser.parse_args()
+    if args.database == args.source_database:
+        parser.error("--database must differ from --source-database (it is dropped)")
+
+    queries, dynamic = collect_queries()
+    admin = connect(args)
+    clone_schema(admin.cursor(), args.source_database, args.database)
+    admin.close()
+    conn = connect(args, args.database)
+    seed(conn, args.students)
+    cur = conn.cursor()
+    cur.execute("CALL auto_allocate_exam(1)")
+    cur.fetchall()
+    while cur.nextset():
+        pass
+    conn.commit()
+    cur.execute("ANALYZE TABLE students, exams, halls, seats, hall_assignments, allocations, seat_checks")
+    cur.fetchall()
+    cur.close()
+
+    cur = conn.cursor(dictionary=True)
+    failures = 0
+    for context, line, query in queries:
+        try:
+            plan, offenders = full_scans(cur, context, query)
+        except mysql.connector.Error as e:
+            failures += 1
+            print(f"EXPLAIN FAILED {line} ({context}): {e}")
+            continue
+        if offenders:
+            failures += 1
+            print(f"FULL SCAN {line} ({context}) on {', '.join(sorted(set(offenders)))}")
+            print("    " + " ".join(query.split())[:200])
+        if offenders or args.verbose:
+            if not offenders:
+                print(f"ok {line} ({context})")
+            print_plan(plan)
+    cur.close()
+    conn.close()
+
+    print(f"\n{len(queries)} queries checked, {dynamic} built at runtime (not checked), "
+          f"{failures} with full scans of {', '.join(sorted(LARGE_TABLES))}")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Load test for the seat lookup server (python -m seat_allocator lookup-server).
+
+Takes the SRNs allocated in the session from the database (or --srn-file,
+one per line), then N threads each send lookups over one keep-alive
+connection, picking SRNs at random (--miss-rate of them unknown, to exercise
+the 404 path). Prints throughput, latency percentiles and status counts:
+
+    python -m seat_allocator lookup-server --from 2030-01-01 &
+    python benchmarks/load_test_lookup.py --password '...' --from 2030-01-01 --threads 32 --requests 100000
+
+With --min-rps the run fails when throughput is lower, so it can gate a
+change. Start the server on a different machine or pin it to other cores for
+numbers that are not limited by this client.
+"""
+
+import argparse
+import datetime
+import http.client
+import os
+import random
+import statistics
+import threading
+import time
+from urllib.parse import quote, urlparse
+
+from bench_auto_allocate import connect
+
+
+def session_srns(args):
+    conn = connect(args, args.database)
+    cur = conn.cursor()
+    cur.execute("""SELECT DISTINCT s.srn FROM exams e
+                   JOIN allocations a ON a.exam_id = e.exam_id
+                   JOIN students s ON s.student_id = a.student_id
+                   WHERE e.exam_date BETWEEN %s AND %s""", (args.date_from, args.date_to or args.date_from))
+    srns = [r[0] for r in cur.fetchall()]
+    cur.close()
+    conn.close()
+    return srns
+
+
+def worker(url, srns, miss_rate, count, seed, latencies, statuses, lock):
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=10)
+    mine, codes = [], {}
+    for i in range(count):
+        srn = f"UNKNOWN{seed}-{i}" if rng.random() < miss_rate else rng.choice(srns)
+        started = time.perf_counter()
+        try:
+            conn.request("GET", f"/seat?srn={quote(srn)}")
+            resp = conn.getresponse()
+            resp.read()
+            code = resp.status
+        except (OSError, http.client.HTTPException):
+            code = "error"
+            conn.close()
+            conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=10)
+        mine.append((time.perf_counter() - started) * 1000)
+        codes[code] = codes.get(code, 0) + 1
+    conn.close()
+    with lock:
+        latencies.extend(mine)
+        for code, n in codes.items():
+            statuses[code] = statuses.get(code, 0) + n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("DB_HOST", "localhost"))
+    parser.add_argument("--user", default=os.getenv("DB_USER", "root"))
+    parser.add_argument("--password", default=os.getenv("DB_PASSWORD", ""))
+    parser.add_argument("--database", default=os.getenv("DB_NAME", "exam_seat_allocator"))
+    parser.add_argument("--from", dest="date_from", type=datetime.date.fromisoformat, default=datetime.date.today())
+    parser.add_argument("--to", dest="date_to", type=datetime.date.fromisoformat)
+    parser.add_argument("--srn-file", help="SRNs to look up, one per line (instead of reading the database)")
+    parser.add_argument("--url", default="http://127.0.0.1:8502")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=50000, help="lookups in total")
+    parser.add_argument("--miss-rate", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--min-rps", type=float, help="fail when fewer lookups per second are served")
+    args = parser.parse_args()
+
+    if args.srn_file:
+        with open(args.srn_file, encoding="utf-8") as f:
+            srns = [line.strip() for line in f if line.strip()]
+    else:
+        srns = session_srns(args)
+    if not srns:
+        raise SystemExit("No SRNs to look up: nothing is allocated in this session.")
+
+    url = urlparse(args.url)
+    latencies, statuses, lock = [], {}, threading.Lock()
+    per_thread = max(1, args.requests // args.threads)
+    threads = [threading.Thread(target=worker, args=(url, srns, args.miss_rate, per_thread, args.seed + i,
+                                                     latencies, statuses, lock))
+               for i in range(args.threads)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    pct = lambda p: ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+    rps = len(ordered) / elapsed
+    print(f"{len(ordered)} lookups of {len(srns)} SRNs from {args.threads} threads in {elapsed:.2f}s: {rps:,.0f}/s")
+    print(f"latency ms: median {statistics.median(ordered):.2f}  p95 {pct(0.95):.2f}  p99 {pct(0.99):.2f}  "
+          f"max {ordered[-1]:.2f}")
+    print("responses: " + ", ".join(f"{code}: {n}" for code, n in sorted(statuses.items(), key=str)))
+    if args.min_rps and rps < args.min_rps:
+        print(f"Below --min-rps {args.min_rps:g}")
+        raise SystemExit(1)
+    if "error" in statuses:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
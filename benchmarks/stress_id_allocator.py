@@ -0,0 +1,230 @@
+"""
+Concurrency stress test for the id_sequences allocator.
+
+Clones the schema of the app database into a scratch database, seeds one exam
+(with its own hall) per worker, then starts all workers at once. Each worker
+fills its exam through every writer that takes ids from the sequences:
+
+  1. single allocations via CALL allocate_student_to_seat,
+  2. block inserts the way app.insert_allocations does them (allocation id
+     blocks reserved in their own short transactions), each block then marked
+     OK the way app.record_checks does it (a seat_check id block applied with
+     CALL apply_check_block),
+  3. CALL auto_allocate_exam for the remaining students.
+
+    python benchmarks/stress_id_allocator.py --workers 16 --students 1000
+
+Afterwards it checks that every student of every exam is allocated exactly
+once, every allocation's check_status matches its latest seat check (PENDING
+when it has none), and the sequences
+are ahead of the highest ids. Duplicate keys, deadlocks and lock wait
+timeouts are counted per worker; a correct allocator reports none.
+"""
+
+import argparse
+import os
+import threading
+import time
+
+import mysql.connector
+
+from bench_auto_allocate import TABLES, clone_schema, connect, insert_batched
+
+BLOCK_ROWS = 200
+
+
+def seed(conn, workers, students):
+    cur = conn.cursor()
+    for table in reversed(TABLES):
+        cur.execute(f"DELETE FROM {table}")
+    insert_batched(cur, "INSERT INTO students (student_id, srn, full_name, department, year_of_study) "
+                        "VALUES (%s,%s,%s,%s,%s)",
+                   [(i, f"STRESS{i:07d}", f"Student {i}", "CSE", 1 + i % 4) for i in range(1, students + 1)])
+    for w in range(1, workers + 1):
+        cur.execute("INSERT INTO exams (exam_id, course_code, course_name, exam_date, start_time, end_time) "
+                    "VALUES (%s, %s, 'Stress', '2030-01-01', '09:00:00', '12:00:00')", (w, f"STRESS{w}"))
+        cur.execute("INSERT INTO halls (hall_id, hall_name, capacity) VALUES (%s,%s,%s)",
+                    (w, f"Stress Hall {w}", students))
+        cur.execute("INSERT INTO hall_assignments (assignment_id, exam_id, hall_id, start_time, end_time) "
+                    "VALUES (%s,%s,%s,'09:00:00','12:00:00')", (w, w, w))
+    insert_batched(cur, "INSERT INTO seats (seat_id, hall_id, seat_number) VALUES (%s,%s,%s)",
+                   [((w - 1) * students + i, w, f"R{i}")
+                    for w in range(1, workers + 1) for i in range(1, students + 1)])
+    cur.execute("CALL sync_id_sequences()")
+    conn.commit()
+    cur.close()
+
+
+def reserve_ids(conn, table, count):
+    """Same statement and transaction shape as app.reserve_ids."""
+    cur = conn.cursor()
+    cur.execute("UPDATE id_sequences SET next_id = LAST_INSERT_ID(next_id) + %s WHERE seq_name = %s",
+                (count, table))
+    cur.execute("SELECT LAST_INSERT_ID()")
+    first = cur.fetchone()[0]
+    conn.commit()
+    cur.close()
+    return first
+
+
+def drain(cur):
+    rows = cur.fetchall() if cur.with_rows else []
+    while cur.nextset():
+        if cur.with_rows:
+            cur.fetchall()
+    return rows
+
+
+class Worker(threading.Thread):
+    def __init__(self, args, exam_id, barrier):
+        super().__init__()
+        self.args, self.exam_id, self.barrier = args, exam_id, barrier
+        self.stats = {"singles": 0, "blocks": 0, "auto": 0, "duplicate": 0, "deadlock": 0,
+                      "lock_wait": 0, "other_errors": 0, "seconds": 0.0}
+
+    def _count_error(self, e):
+        key = {1062: "duplicate", 1213: "deadlock", 1205: "lock_wait"}.get(getattr(e, "errno", None), "other_errors")
+        self.stats[key] += 1
+
+    def run(self):
+        args, exam_id = self.args, self.exam_id
+        conn = connect(args, args.database)
+        seq_conn = connect(args, args.database)
+        seat_base = (exam_id - 1) * args.students
+        self.barrier.wait()
+        started = time.perf_counter()
+        student = 1
+        # 1. one row at a time through the procedure and the trigger
+        for _ in range(args.singles):
+            cur = conn.cursor()
+            try:
+                cur.execute("CALL allocate_student_to_seat(%s,%s,%s)", (exam_id, student, seat_base + student))
+                drain(cur)
+                conn.commit()
+                self.stats["singles"] += 1
+            except mysql.connector.Error as e:
+                conn.rollback()
+                self._count_error(e)
+            finally:
+                cur.close()
+            student += 1
+        # 2. blocks of explicit ids, as app.insert_allocations does
+        for _ in range(args.blocks):
+            rows = [(exam_id, s, seat_base + s) for s in range(student, min(student + BLOCK_ROWS, args.students + 1))]
+            if not rows:
+                break
+            cur = conn.cursor()
+            try:
+                base_alloc = reserve_ids(seq_conn, "allocations", len(rows)) - 1
+                cur.execute("SET @bulk_seat_checks = 1")
+                cur.executemany("INSERT INTO allocations (allocation_id, exam_id, student_id, seat_id) "
+                                "VALUES (%s,%s,%s,%s)",
+                                [(base_alloc + i, *r) for i, r in enumerate(rows, start=1)])
+                cur.execute("CALL apply_allocation_block_stats(%s, %s)", (base_alloc + 1, base_alloc + len(rows)))
+                conn.commit()
+                base_check = reserve_ids(seq_conn, "seat_checks", len(rows)) - 1
+                cur.executemany("INSERT INTO seat_checks (check_id, allocation_id, checked_by, status, remarks) "
+                                "VALUES (%s,%s,NULL,'OK',NULL)",
+                                [(base_check + i, base_alloc + i) for i in range(1, len(rows) + 1)])
+                cur.execute("CALL apply_check_block(%s, %s)", (base_check + 1, base_check + len(rows)))
+                conn.commit()
+                self.stats["blocks"] += len(rows)
+            except mysql.connector.Error as e:
+                conn.rollback()
+                self._count_error(e)
+            finally:
+                cur.execute("SET @bulk_seat_checks = 0")
+                cur.close()
+            student += len(rows)
+        # 3. the rest set-based
+        cur = conn.cursor()
+        try:
+            cur.execute("CALL auto_allocate_exam(%s)", (exam_id,))
+            self.stats["auto"] += drain(cur)[0][0]
+            conn.commit()
+        except mysql.connector.Error as e:
+            conn.rollback()
+            self._count_error(e)
+        finally:
+            cur.close()
+        self.stats["seconds"] = time.perf_counter() - started
+        seq_conn.close()
+        conn.close()
+
+
+def verify(conn, workers, students):
+    cur = conn.cursor()
+    problems = []
+    cur.execute("SELECT exam_id, COUNT(*), COUNT(DISTINCT student_id), COUNT(DISTINCT seat_id) "
+                "FROM allocations GROUP BY exam_id")
+    per_exam = {r[0]: r[1:] for r in cur.fetchall()}
+    for w in range(1, workers + 1):
+        if per_exam.get(w) != (students, students, students):
+            problems.append(f"exam {w}: (allocations, students, seats) = {per_exam.get(w)}, expected {students} each")
+    cur.execute("""SELECT COUNT(*) FROM allocations a
+                   LEFT JOIN seat_checks c ON c.check_id =
+                       (SELECT MAX(check_id) FROM seat_checks WHERE allocation_id = a.allocation_id)
+                   WHERE a.check_status <> IFNULL(c.status, 'PENDING')""")
+    bad_checks = cur.fetchone()[0]
+    if bad_checks:
+        problems.append(f"{bad_checks} allocations whose check_status is not their latest seat check")
+    cur.execute("""SELECT s.seq_name, s.next_id, m.max_id FROM id_sequences s
+                   JOIN (SELECT 'allocations' AS seq_name, MAX(allocation_id) AS max_id FROM allocations
+                         UNION ALL SELECT 'seat_checks', MAX(check_id) FROM seat_checks) m
+                     ON m.seq_name = s.seq_name""")
+    for name, next_id, max_id in cur.fetchall():
+        if max_id is not None and next_id <= max_id:
+            problems.append(f"sequence {name} at {next_id} but table has id {max_id}")
+    cur.close()
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("DB_HOST", "localhost"))
+    parser.add_argument("--user", default=os.getenv("DB_USER", "root"))
+    parser.add_argument("--password", default=os.getenv("DB_PASSWORD", ""))
+    parser.add_argument("--source-database", default="exam_seat_allocator")
+    parser.add_argument("--database", default="exam_seat_allocator_stress")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--students", type=int, default=1000, help="students (and seats) per exam")
+    parser.add_argument("--singles", type=int, default=50, help="single allocations per worker")
+    parser.add_argument("--blocks", type=int, default=2, help=f"{BLOCK_ROWS}-row blocks per worker")
+    args = parser.parse_args()
+    if args.database == args.source_database:
+        parser.error("--database must differ from --source-database (it is dropped)")
+
+    admin = connect(args)
+    clone_schema(admin.cursor(), args.source_database, args.database)
+    admin.close()
+    conn = connect(args, args.database)
+    seed(conn, args.workers, args.students)
+
+    barrier = threading.Barrier(args.workers)
+    workers = [Worker(args, w, barrier) for w in range(1, args.workers + 1)]
+    started = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+
+    cols = ["singles", "blocks", "auto", "duplicate", "deadlock", "lock_wait", "other_errors"]
+    print(f"{'exam':>5} " + " ".join(f"{c:>12}" for c in cols) + f" {'seconds':>8}")
+    for w in workers:
+        print(f"{w.exam_id:>5} " + " ".join(f"{w.stats[c]:>12}" for c in cols) + f" {w.stats['seconds']:>8.2f}")
+    total = args.workers * args.students
+    print(f"\n{total} allocations by {args.workers} workers in {elapsed:.2f}s ({total / elapsed:.0f} rows/s)")
+
+    problems = verify(conn, args.workers, args.students)
+    conn.close()
+    errors = sum(w.stats[c] for w in workers for c in cols[3:])
+    for p in problems:
+        print("FAIL:", p)
+    if problems or errors:
+        raise SystemExit(1)
+    print("OK: no collisions, check statuses match the history, sequences ahead of all ids")
+
+
+if __name__ == "__main__":
+    main()
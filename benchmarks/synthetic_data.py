@@ -0,0 +1,163 @@
+"""
+Deterministic synthetic dataset for benchmarks.
+
+Fills a (scratch) database that has the app schema with students, halls laid
+out in rows of seats, exams spread over days in a morning and an afternoon
+slot, hall assignments, allocations and seat checks. The same arguments and
+--seed always produce the same rows, so timings from different commits are
+comparable.
+
+    python benchmarks/synthetic_data.py --password '...' --students 20000 --halls 40 \\
+        --seats-per-hall 500 --days 5 --exams-per-day 4 --density 0.8 --checked 0.3
+
+Exams held in the same slot of a day split the halls between them. Each exam
+gets `density` x min(students, its seats) allocations (a seeded sample of the
+students, on the first seats of its halls in row-major order); `checked` of
+those have a seat check (mostly OK, some ABSENT or MISMATCH). The target
+database is dropped and recreated from --source-database, so it must not be
+the app database.
+"""
+
+import argparse
+import datetime
+import os
+import random
+
+from bench_auto_allocate import clone_schema, connect, insert_batched, TABLES
+
+DEPARTMENTS = ["CSE", "ECE", "EEE", "ME", "CV", "BT"]
+SEATS_PER_ROW = 20
+SLOTS = [("09:00:00", "12:00:00"), ("14:00:00", "17:00:00")]
+FIRST_DAY = datetime.date(2030, 1, 1)
+
+
+def row_label(i):
+    """0 -> A, 25 -> Z, 26 -> AA (same scheme as the app's seat layouts)."""
+    label = ""
+    i += 1
+    while i:
+        i, r = divmod(i - 1, 26)
+        label = chr(65 + r) + label
+    return label
+
+
+def generate(conn, students=20000, halls=40, seats_per_hall=500, days=5, exams_per_day=4,
+             density=0.8, checked=0.3, seed=42):
+    """Replace the data of every app table with a synthetic dataset. Returns row counts per table."""
+    rng = random.Random(seed)
+    cur = conn.cursor()
+    for table in reversed(TABLES):
+        cur.execute(f"DELETE FROM {table}")
+
+    insert_batched(cur, "INSERT INTO students (student_id, srn, full_name, department, year_of_study, "
+                        "needs_accessible_seat) VALUES (%s,%s,%s,%s,%s,%s)",
+                   [(i, f"SYN{i:07d}", f"Student {i}", rng.choice(DEPARTMENTS), rng.randint(1, 4),
+                     rng.random() < 0.02) for i in range(1, students + 1)])
+    insert_batched(cur, "INSERT INTO halls (hall_id, hall_name, capacity) VALUES (%s,%s,%s)",
+                   [(h, f"Hall {h:03d}", seats_per_hall) for h in range(1, halls + 1)])
+    hall_seats = {}
+    seat_rows = []
+    for h in range(1, halls + 1):
+        ids = []
+        for i in range(seats_per_hall):
+            seat_id = (h - 1) * seats_per_hall + i + 1
+            row, col = divmod(i, SEATS_PER_ROW)
+            # the two aisle-end seats of the front row are accessible
+            seat_rows.append((seat_id, h, f"{row_label(row)}{col + 1}", row == 0 and col in (0, SEATS_PER_ROW - 1)))
+            ids.append(seat_id)
+        hall_seats[h] = ids
+    insert_batched(cur, "INSERT INTO seats (seat_id, hall_id, seat_number, is_accessible) VALUES (%s,%s,%s,%s)",
+                   seat_rows)
+    insert_batched(cur, "INSERT INTO invigilators (invigilator_id, full_name, email) VALUES (%s,%s,%s)",
+                   [(h, f"Invigilator {h}", f"inv{h}@example.edu") for h in range(1, halls + 1)])
+
+    exams, assignments, exam_halls = [], [], {}
+    exam_id = 0
+    for day in range(days):
+        date = FIRST_DAY + datetime.timedelta(days=day)
+        for slot, (start, end) in enumerate(SLOTS):
+            in_slot = [exam_id + 1 + k for k in range(slot, exams_per_day, len(SLOTS))]
+            for e in in_slot:
+                exams.append((e, f"SYN{e:04d}", f"Synthetic course {e}", date, start, end))
+                exam_halls[e] = [h for h in range(1, halls + 1) if (h - 1) % len(in_slot) == in_slot.index(e)]
+                assignments.extend((e, h, h, start, end) for h in exam_halls[e])
+        exam_id += exams_per_day
+    exams.sort()
+    insert_batched(cur, "INSERT INTO exams (exam_id, course_code, course_name, exam_date, start_time, end_time) "
+                        "VALUES (%s,%s,%s,%s,%s,%s)", exams)
+    insert_batched(cur, "INSERT INTO hall_assignments (assignment_id, exam_id, hall_id, invigilator_id, "
+                        "start_time, end_time) VALUES (%s,%s,%s,%s,%s,%s)",
+                   [(i, *a) for i, a in enumerate(assignments, start=1)])
+
+    # bulk load: the per-row allocation and seat-check triggers are skipped,
+    # the summary is rebuilt once at the end
+    cur.execute("SET @bulk_seat_checks = 1")
+    allocations, checks = [], []
+    for e, *_ in exams:
+        seats = [s for h in exam_halls[e] for s in hall_seats[h]]
+        count = round(density * min(students, len(seats)))
+        for student_id, seat_id in zip(sorted(rng.sample(range(1, students + 1), count)), seats):
+            allocation_id = len(allocations) + 1
+            status, checked_by = "PENDING", None
+            if rng.random() < checked:
+                status = rng.choices(["OK", "ABSENT", "MISMATCH"], weights=[90, 8, 2])[0]
+                checked_by = (seat_id - 1) // seats_per_hall + 1
+                checks.append((len(checks) + 1, allocation_id, checked_by, status, "PENDING"))
+            allocations.append((allocation_id, e, student_id, seat_id, status, checked_by))
+    insert_batched(cur, "INSERT INTO allocations (allocation_id, exam_id, student_id, seat_id, check_status, "
+                        "checked_by, checked_at) VALUES (%s,%s,%s,%s,%s,%s,IF(%s IS NULL, NULL, NOW()))",
+                   [(*a, a[5]) for a in allocations])
+    insert_batched(cur, "INSERT INTO seat_checks (check_id, allocation_id, checked_by, status, previous_status) "
+                        "VALUES (%s,%s,%s,%s,%s)", checks)
+    cur.execute("SET @bulk_seat_checks = 0")
+
+    cur.execute("CALL sync_id_sequences()")
+    cur.execute("CALL rebuild_exam_hall_stats(NULL)")
+    conn.commit()
+    cur.execute("ANALYZE TABLE students, exams, halls, seats, hall_assignments, allocations, seat_checks, exam_hall_stats")
+    cur.fetchall()
+    cur.close()
+    return {"students": students, "halls": halls, "seats": len(seat_rows), "exams": len(exams),
+            "hall_assignments": len(assignments), "allocations": len(allocations), "seat_checks": len(checks)}
+
+
+def add_dataset_arguments(parser):
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--halls", type=int, default=40)
+    parser.add_argument("--seats-per-hall", type=int, default=500)
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--exams-per-day", type=int, default=4)
+    parser.add_argument("--density", type=float, default=0.8, help="share of each exam's seatable students allocated")
+    parser.add_argument("--checked", type=float, default=0.3, help="share of allocations with a seat check")
+    parser.add_argument("--seed", type=int, default=42)
+
+
+def dataset_options(args):
+    return {"students": args.students, "halls": args.halls, "seats_per_hall": args.seats_per_hall,
+            "days": args.days, "exams_per_day": args.exams_per_day, "density": args.density,
+            "checked": args.checked, "seed": args.seed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("DB_HOST", "localhost"))
+    parser.add_argument("--user", default=os.getenv("DB_USER", "root"))
+    parser.add_argument("--password", default=os.getenv("DB_PASSWORD", ""))
+    parser.add_argument("--source-database", default="exam_seat_allocator")
+    parser.add_argument("--database", default="exam_seat_allocator_synthetic")
+    add_dataset_arguments(parser)
+    args = parser.parse_args()
+    if args.database == args.source_database:
+        parser.error("--database must differ from --source-database (it is dropped)")
+
+    admin = connect(args)
+    clone_schema(admin.cursor(), args.source_database, args.database)
+    admin.close()
+    conn = connect(args, args.database)
+    counts = generate(conn, **dataset_options(args))
+    conn.close()
+    print(", ".join(f"{n} {table}" for table, n in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
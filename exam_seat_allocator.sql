@@ -42,7 +42,8 @@ CREATE TABLE students (
   email VARCHAR(150) UNIQUE,
   phone VARCHAR(20),
   gender CHAR(1) DEFAULT 'O',
-  dob DATE
+  dob DATE,
+  needs_accessible_seat BOOLEAN NOT NULL DEFAULT FALSE
 );
 
 -- Exams Table
@@ -54,7 +55,8 @@ CREATE TABLE exams (
   start_time TIME NOT NULL,
   end_time TIME NOT NULL,
   total_marks INT DEFAULT 100 CHECK (total_marks > 0),
-  UNIQUE (course_code, exam_date)
+  UNIQUE (course_code, exam_date),
+  KEY idx_exams_date (exam_date, start_time)
 );
 
 -- Halls Table
@@ -118,6 +120,10 @@ CREATE TABLE allocations (
   student_id INT,
   seat_id INT NOT NULL,
   allocated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  check_status VARCHAR(20) NOT NULL DEFAULT 'PENDING',
+  checked_by INT NULL,
+  checked_at TIMESTAMP NULL,
+  check_remarks VARCHAR(255),
   CONSTRAINT fk_alloc_exam FOREIGN KEY (exam_id)
     REFERENCES exams(exam_id)
     ON DELETE CASCADE
@@ -131,17 +137,31 @@ CREATE TABLE allocations (
     ON DELETE CASCADE
     ON UPDATE CASCADE,
   UNIQUE (exam_id, seat_id),
-  UNIQUE (exam_id, student_id)
+  UNIQUE (exam_id, student_id),
+  KEY idx_alloc_student_exam (student_id, exam_id, seat_id),
+  KEY idx_alloc_exam_checked_at (exam_id, checked_at),
+  KEY idx_alloc_exam_allocated_at (exam_id, allocated_at),
+  KEY idx_alloc_allocated_at (allocated_at),
+  KEY idx_alloc_checked_at (checked_at),
+  CONSTRAINT fk_alloc_checked_by FOREIGN KEY (checked_by)
+    REFERENCES invigilators(invigilator_id)
+    ON DELETE SET NULL
+    ON UPDATE CASCADE
 );
 
--- Seat Checks Table
+-- Seat Checks Table (append-only history; the current status of an
+-- allocation is allocations.check_status)
 CREATE TABLE seat_checks (
   check_id INT PRIMARY KEY,
   allocation_id INT NOT NULL,
   checked_by INT,
   status VARCHAR(20) NOT NULL DEFAULT 'OK',
+  previous_status VARCHAR(20),
   remarks VARCHAR(255),
   checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  KEY idx_checks_alloc_status (allocation_id, status),
+  KEY idx_checks_status (status, allocation_id),
+  KEY idx_checks_checked_at (checked_at),
   CONSTRAINT fk_check_alloc FOREIGN KEY (allocation_id)
     REFERENCES allocations(allocation_id)
     ON DELETE CASCADE
@@ -152,6 +172,72 @@ CREATE TABLE seat_checks (
     ON UPDATE CASCADE
 );
 
+-- Exam x Hall Summary Table (see EXAM x HALL SUMMARY below)
+CREATE TABLE exam_hall_stats (
+  exam_id INT NOT NULL,
+  hall_id INT NOT NULL,
+  seat_count INT NOT NULL DEFAULT 0,
+  allocated INT NOT NULL DEFAULT 0,
+  checks_pending INT NOT NULL DEFAULT 0,
+  checks_ok INT NOT NULL DEFAULT 0,
+  checks_mismatch INT NOT NULL DEFAULT 0,
+  checks_absent INT NOT NULL DEFAULT 0,
+  checks_other INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (exam_id, hall_id),
+  KEY idx_ehs_hall (hall_id),
+  CONSTRAINT fk_ehs_exam FOREIGN KEY (exam_id)
+    REFERENCES exams(exam_id)
+    ON DELETE CASCADE
+    ON UPDATE CASCADE,
+  CONSTRAINT fk_ehs_hall FOREIGN KEY (hall_id)
+    REFERENCES halls(hall_id)
+    ON DELETE CASCADE
+    ON UPDATE CASCADE
+);
+
+-- Import Jobs Table (bulk CSV/Excel import checkpoints)
+CREATE TABLE import_jobs (
+  job_id INT AUTO_INCREMENT PRIMARY KEY,
+  table_name VARCHAR(30) NOT NULL,
+  file_name VARCHAR(255) NOT NULL,
+  file_sha256 CHAR(64) NOT NULL,
+  rows_processed INT NOT NULL DEFAULT 0,
+  rows_inserted INT NOT NULL DEFAULT 0,
+  rows_rejected INT NOT NULL DEFAULT 0,
+  status VARCHAR(20) NOT NULL DEFAULT 'RUNNING',
+  started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  KEY idx_import_jobs_file (file_sha256, table_name)
+);
+
+-- Id Sequences Table (next free primary key per table)
+-- Writers reserve a block of ids with one single-row UPDATE instead of
+-- scanning or locking MAX(id) on the target table.
+CREATE TABLE id_sequences (
+  seq_name VARCHAR(30) PRIMARY KEY,
+  next_id INT NOT NULL
+);
+
+-- Schema Migrations Table (versions applied by migrations/migrate.py)
+-- This script already contains every migration listed below; databases
+-- created from it only need the ones added later.
+CREATE TABLE schema_migrations (
+  version INT PRIMARY KEY,
+  name VARCHAR(100) NOT NULL,
+  checksum CHAR(64),
+  duration_ms INT,
+  applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO schema_migrations (version, name) VALUES
+(1, 'catch_up_with_schema_script'),
+(2, 'query_indexes'),
+(3, 'exam_hall_stats'),
+(4, 'seat_check_polling'),
+(5, 'seat_check_status'),
+(6, 'seat_lookup_refresh'),
+(7, 'snapshot_export');
+
 -- =====================================================
 -- VIEW TABLE STRUCTURES
 -- =====================================================
@@ -164,6 +250,10 @@ DESC invigilators;
 DESC hall_assignments;
 DESC allocations;
 DESC seat_checks;
+DESC exam_hall_stats;
+DESC import_jobs;
+DESC id_sequences;
+DESC schema_migrations;
 
 -- =====================================================
 -- SAMPLE DATA INSERTION (DML)
@@ -231,12 +321,19 @@ INSERT INTO allocations (allocation_id, exam_id, student_id, seat_id) VALUES
 (5,1,5,5);
 
 -- Insert Seat Checks
-INSERT INTO seat_checks (check_id, allocation_id, checked_by, status, remarks) VALUES
-(1,1,1,'OK','All correct'),
-(2,2,1,'OK','All correct'),
-(3,3,2,'MISMATCH','SRN mismatch on admit card'),
-(4,4,2,'ABSENT','Student did not turn up'),
-(5,5,3,'OK','All correct');
+INSERT INTO seat_checks (check_id, allocation_id, checked_by, status, previous_status, remarks) VALUES
+(1,1,1,'OK','PENDING','All correct'),
+(2,2,1,'OK','PENDING','All correct'),
+(3,3,2,'MISMATCH','PENDING','SRN mismatch on admit card'),
+(4,4,2,'ABSENT','PENDING','Student did not turn up'),
+(5,5,3,'OK','PENDING','All correct');
+
+-- Current status of the sample allocations (the seat-check triggers that
+-- keep it in step are created below)
+UPDATE allocations a
+JOIN seat_checks sc ON sc.allocation_id = a.allocation_id
+SET a.check_status = sc.status, a.checked_by = sc.checked_by,
+    a.checked_at = sc.checked_at, a.check_remarks = sc.remarks;
 
 -- =====================================================
 -- VIEW ALL DATA
@@ -251,6 +348,56 @@ SELECT * FROM hall_assignments;
 SELECT * FROM allocations;
 SELECT * FROM seat_checks;
 
+-- =====================================================
+-- ID SEQUENCES
+-- =====================================================
+
+-- Procedure: Reserve a Block of Ids
+-- Returns the first of p_count consecutive ids. The sequence row stays
+-- locked until the caller's transaction ends, so long-running writers
+-- should reserve in a short transaction of their own and commit first.
+DELIMITER //
+CREATE PROCEDURE reserve_ids(
+    IN p_seq_name VARCHAR(30),
+    IN p_count INT,
+    OUT p_first_id INT
+)
+BEGIN
+    SELECT next_id INTO p_first_id
+    FROM id_sequences WHERE seq_name = p_seq_name FOR UPDATE;
+    
+    UPDATE id_sequences SET next_id = next_id + p_count
+    WHERE seq_name = p_seq_name;
+END;
+//
+DELIMITER ;
+
+-- Procedure: Sync Sequences with the Tables
+-- Creates missing sequences and moves each one past the highest id in its
+-- table (rows inserted with explicit ids, e.g. sample data or imports).
+-- Never moves a sequence backwards.
+DELIMITER //
+CREATE PROCEDURE sync_id_sequences()
+BEGIN
+    INSERT INTO id_sequences (seq_name, next_id)
+    SELECT * FROM (
+        SELECT 'students' AS seq_name, IFNULL(MAX(student_id), 0) + 1 AS next_id FROM students
+        UNION ALL SELECT 'exams', IFNULL(MAX(exam_id), 0) + 1 FROM exams
+        UNION ALL SELECT 'halls', IFNULL(MAX(hall_id), 0) + 1 FROM halls
+        UNION ALL SELECT 'seats', IFNULL(MAX(seat_id), 0) + 1 FROM seats
+        UNION ALL SELECT 'invigilators', IFNULL(MAX(invigilator_id), 0) + 1 FROM invigilators
+        UNION ALL SELECT 'hall_assignments', IFNULL(MAX(assignment_id), 0) + 1 FROM hall_assignments
+        UNION ALL SELECT 'allocations', IFNULL(MAX(allocation_id), 0) + 1 FROM allocations
+        UNION ALL SELECT 'seat_checks', IFNULL(MAX(check_id), 0) + 1 FROM seat_checks
+    ) AS src
+    ON DUPLICATE KEY UPDATE next_id = GREATEST(id_sequences.next_id, src.next_id);
+END;
+//
+DELIMITER ;
+
+CALL sync_id_sequences();
+SELECT * FROM id_sequences;
+
 -- =====================================================
 -- TRIGGERS
 -- =====================================================
@@ -268,19 +415,365 @@ END;
 //
 DELIMITER ;
 
--- Trigger 2: Auto Create Seat Check
+-- Trigger 2: Record the Status a Seat Check Replaces
+DELIMITER //
+CREATE TRIGGER trg_check_previous_status
+BEFORE INSERT ON seat_checks
+FOR EACH ROW
+BEGIN
+    IF NEW.previous_status IS NULL THEN
+        SET NEW.previous_status = (SELECT check_status FROM allocations WHERE allocation_id = NEW.allocation_id);
+    END IF;
+END;
+//
+DELIMITER ;
+
+-- Trigger 3: Seat Check Sets the Allocation's Current Status
+-- New allocations start PENDING (column default); no placeholder check row.
+DELIMITER //
+CREATE TRIGGER trg_check_set_status
+AFTER INSERT ON seat_checks
+FOR EACH ROW
+BEGIN
+    -- bulk writers set @bulk_seat_checks and CALL apply_check_block instead
+    IF IFNULL(@bulk_seat_checks, 0) = 0 THEN
+        UPDATE allocations
+        SET check_status = NEW.status, checked_by = NEW.checked_by,
+            checked_at = NEW.checked_at, check_remarks = NEW.remarks
+        WHERE allocation_id = NEW.allocation_id;
+    END IF;
+END;
+//
+DELIMITER ;
+
+-- Trigger 4: Seat Check History is Append-Only
 DELIMITER //
-CREATE TRIGGER trg_auto_seat_check
+CREATE TRIGGER trg_check_no_update
+BEFORE UPDATE ON seat_checks
+FOR EACH ROW
+BEGIN
+    SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'seat_checks is an append-only history; insert a new check instead';
+END;
+//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_check_no_delete
+BEFORE DELETE ON seat_checks
+FOR EACH ROW
+BEGIN
+    SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'seat_checks is an append-only history; delete the allocation instead';
+END;
+//
+DELIMITER ;
+
+-- =====================================================
+-- EXAM x HALL SUMMARY
+-- =====================================================
+
+-- exam_hall_stats holds one row per exam x hall: the hall's seat count,
+-- the allocations in it and the current seat-check status of each. The
+-- dashboard and the occupancy functions read it instead of aggregating
+-- allocations; CALL rebuild_exam_hall_stats(NULL) recomputes it.
+
+-- Procedure: Add Deltas to One Exam x Hall Row (created on first use)
+DELIMITER //
+CREATE PROCEDURE bump_exam_hall_stats(
+    IN p_exam_id INT,
+    IN p_hall_id INT,
+    IN p_allocated INT,
+    IN p_status VARCHAR(20),
+    IN p_checks INT
+)
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM exam_hall_stats WHERE exam_id = p_exam_id AND hall_id = p_hall_id) THEN
+        INSERT IGNORE INTO exam_hall_stats (exam_id, hall_id, seat_count)
+        SELECT p_exam_id, p_hall_id, COUNT(*) FROM seats WHERE hall_id = p_hall_id;
+    END IF;
+
+    UPDATE exam_hall_stats SET
+        allocated = allocated + p_allocated,
+        checks_pending = checks_pending + IF(p_status = 'PENDING', p_checks, 0),
+        checks_ok = checks_ok + IF(p_status = 'OK', p_checks, 0),
+        checks_mismatch = checks_mismatch + IF(p_status = 'MISMATCH', p_checks, 0),
+        checks_absent = checks_absent + IF(p_status = 'ABSENT', p_checks, 0),
+        checks_other = checks_other + IF(p_status NOT IN ('PENDING', 'OK', 'MISMATCH', 'ABSENT'), p_checks, 0)
+    WHERE exam_id = p_exam_id AND hall_id = p_hall_id;
+END;
+//
+DELIMITER ;
+
+-- Procedure: Count a Block of New Allocations (all PENDING) in One Statement
+-- Used by bulk writers that set @bulk_seat_checks, which the triggers skip.
+DELIMITER //
+CREATE PROCEDURE apply_allocation_block_stats(IN p_first_id INT, IN p_last_id INT)
+BEGIN
+    INSERT INTO exam_hall_stats (exam_id, hall_id, seat_count, allocated, checks_pending)
+    SELECT * FROM (
+        SELECT a.exam_id, se.hall_id,
+               (SELECT COUNT(*) FROM seats s2 WHERE s2.hall_id = se.hall_id) AS seat_count,
+               COUNT(*) AS allocated, COUNT(*) AS checks_pending
+        FROM allocations a
+        JOIN seats se ON se.seat_id = a.seat_id
+        WHERE a.allocation_id BETWEEN p_first_id AND p_last_id
+        GROUP BY a.exam_id, se.hall_id
+    ) AS blk
+    ON DUPLICATE KEY UPDATE
+        allocated = exam_hall_stats.allocated + blk.allocated,
+        checks_pending = exam_hall_stats.checks_pending + blk.checks_pending;
+END;
+//
+DELIMITER ;
+
+-- Procedure: Rebuild the Summary from Scratch (one hall, or all when NULL)
+DELIMITER //
+CREATE PROCEDURE rebuild_exam_hall_stats(IN p_hall_id INT)
+BEGIN
+    DELETE FROM exam_hall_stats WHERE p_hall_id IS NULL OR hall_id = p_hall_id;
+
+    INSERT INTO exam_hall_stats (exam_id, hall_id, seat_count, allocated, checks_pending,
+                                 checks_ok, checks_mismatch, checks_absent, checks_other)
+    SELECT p.exam_id, p.hall_id,
+           (SELECT COUNT(*) FROM seats s WHERE s.hall_id = p.hall_id),
+           IFNULL(x.allocated, 0), IFNULL(x.pending, 0), IFNULL(x.ok, 0),
+           IFNULL(x.mismatch, 0), IFNULL(x.absent, 0), IFNULL(x.other, 0)
+    FROM (
+        SELECT exam_id, hall_id FROM hall_assignments
+        WHERE p_hall_id IS NULL OR hall_id = p_hall_id
+        UNION
+        SELECT a.exam_id, se.hall_id FROM allocations a JOIN seats se ON se.seat_id = a.seat_id
+        WHERE p_hall_id IS NULL OR se.hall_id = p_hall_id
+    ) AS p
+    LEFT JOIN (
+        SELECT a.exam_id, se.hall_id, COUNT(*) AS allocated,
+               SUM(a.check_status = 'PENDING') AS pending,
+               SUM(a.check_status = 'OK') AS ok,
+               SUM(a.check_status = 'MISMATCH') AS mismatch,
+               SUM(a.check_status = 'ABSENT') AS absent,
+               SUM(a.check_status NOT IN ('PENDING', 'OK', 'MISMATCH', 'ABSENT')) AS other
+        FROM allocations a
+        JOIN seats se ON se.seat_id = a.seat_id
+        WHERE p_hall_id IS NULL OR se.hall_id = p_hall_id
+        GROUP BY a.exam_id, se.hall_id
+    ) AS x ON x.exam_id = p.exam_id AND x.hall_id = p.hall_id;
+END;
+//
+DELIMITER ;
+
+-- Triggers: Keep the Summary Current on Single-Row Writes
+DELIMITER //
+CREATE TRIGGER trg_stats_alloc_insert
 AFTER INSERT ON allocations
 FOR EACH ROW
 BEGIN
-    DECLARE next_check_id INT;
-    
-    SELECT IFNULL(MAX(check_id), 0) + 1 INTO next_check_id
-    FROM (SELECT check_id FROM seat_checks) AS temp;
-    
-    INSERT INTO seat_checks (check_id, allocation_id, checked_by, status, remarks)
-    VALUES (next_check_id, NEW.allocation_id, NULL, 'PENDING', 'Awaiting verification');
+    DECLARE v_hall INT;
+
+    IF IFNULL(@bulk_seat_checks, 0) = 0 THEN
+        SELECT hall_id INTO v_hall FROM seats WHERE seat_id = NEW.seat_id;
+        CALL bump_exam_hall_stats(NEW.exam_id, v_hall, 1, NEW.check_status, 1);
+    END IF;
+END;
+//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_stats_alloc_update
+AFTER UPDATE ON allocations
+FOR EACH ROW
+BEGIN
+    DECLARE v_old_hall INT;
+    DECLARE v_new_hall INT;
+
+    IF IFNULL(@bulk_seat_checks, 0) = 0 THEN
+        SELECT hall_id INTO v_old_hall FROM seats WHERE seat_id = OLD.seat_id;
+        IF OLD.exam_id <> NEW.exam_id OR OLD.seat_id <> NEW.seat_id THEN
+            SELECT hall_id INTO v_new_hall FROM seats WHERE seat_id = NEW.seat_id;
+            CALL bump_exam_hall_stats(OLD.exam_id, v_old_hall, -1, OLD.check_status, -1);
+            CALL bump_exam_hall_stats(NEW.exam_id, v_new_hall, 1, NEW.check_status, 1);
+        ELSEIF OLD.check_status <> NEW.check_status THEN
+            CALL bump_exam_hall_stats(OLD.exam_id, v_old_hall, 0, OLD.check_status, -1);
+            CALL bump_exam_hall_stats(OLD.exam_id, v_old_hall, 0, NEW.check_status, 1);
+        END IF;
+    END IF;
+END;
+//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_stats_alloc_delete
+BEFORE DELETE ON allocations
+FOR EACH ROW
+BEGIN
+    DECLARE v_hall INT;
+
+    SELECT hall_id INTO v_hall FROM seats WHERE seat_id = OLD.seat_id;
+    CALL bump_exam_hall_stats(OLD.exam_id, v_hall, -1, OLD.check_status, -1);
+END;
+//
+DELIMITER ;
+
+
+
+
+DELIMITER //
+CREATE TRIGGER trg_stats_seat_insert
+AFTER INSERT ON seats
+FOR EACH ROW
+BEGIN
+    UPDATE exam_hall_stats SET seat_count = seat_count + 1 WHERE hall_id = NEW.hall_id;
+END;
+//
+DELIMITER ;
+
+-- Deleting a seat cascades to its allocations without firing their
+-- triggers, so their counts are taken off here.
+DELIMITER //
+CREATE TRIGGER trg_stats_seat_delete
+BEFORE DELETE ON seats
+FOR EACH ROW
+BEGIN
+    UPDATE exam_hall_stats ehs
+    LEFT JOIN (
+        SELECT a.exam_id, a.check_status AS status
+        FROM allocations a WHERE a.seat_id = OLD.seat_id
+    ) AS gone ON gone.exam_id = ehs.exam_id
+    SET ehs.seat_count = ehs.seat_count - 1,
+        ehs.allocated = ehs.allocated - (gone.exam_id IS NOT NULL),
+        ehs.checks_pending = ehs.checks_pending - IFNULL(gone.status = 'PENDING', 0),
+        ehs.checks_ok = ehs.checks_ok - IFNULL(gone.status = 'OK', 0),
+        ehs.checks_mismatch = ehs.checks_mismatch - IFNULL(gone.status = 'MISMATCH', 0),
+        ehs.checks_absent = ehs.checks_absent - IFNULL(gone.status = 'ABSENT', 0),
+        ehs.checks_other = ehs.checks_other - IFNULL(gone.status NOT IN ('PENDING', 'OK', 'MISMATCH', 'ABSENT'), 0)
+    WHERE ehs.hall_id = OLD.hall_id;
+END;
+//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_stats_seat_update
+AFTER UPDATE ON seats
+FOR EACH ROW
+BEGIN
+    IF OLD.hall_id <> NEW.hall_id THEN
+        CALL rebuild_exam_hall_stats(OLD.hall_id);
+        CALL rebuild_exam_hall_stats(NEW.hall_id);
+    END IF;
+END;
+//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_stats_assignment_insert
+AFTER INSERT ON hall_assignments
+FOR EACH ROW
+BEGIN
+    CALL bump_exam_hall_stats(NEW.exam_id, NEW.hall_id, 0, NULL, 0);
+END;
+//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_stats_assignment_delete
+AFTER DELETE ON hall_assignments
+FOR EACH ROW
+BEGIN
+    DELETE FROM exam_hall_stats
+    WHERE exam_id = OLD.exam_id AND hall_id = OLD.hall_id AND allocated = 0;
+END;
+//
+DELIMITER ;
+
+CALL rebuild_exam_hall_stats(NULL);
+
+-- =====================================================
+-- SEAT CHECK TRANSITIONS
+-- =====================================================
+
+-- Bulk writers append a block of seat_checks rows with @bulk_seat_checks
+-- set (Trigger 3 and the summary triggers skip them) and then apply the
+-- whole block with two set-based statements.
+
+-- Procedure: Apply a Block of New Seat Checks (check ids p_first_id..p_last_id)
+-- Moves the summary counts from each allocation's current status to its new
+-- one, then sets the current status. Call with @bulk_seat_checks still set.
+DELIMITER //
+CREATE PROCEDURE apply_check_block(IN p_first_id INT, IN p_last_id INT)
+BEGIN
+    UPDATE exam_hall_stats ehs
+    JOIN (
+        SELECT a.exam_id, se.hall_id,
+               SUM(sc.status = 'PENDING') - SUM(a.check_status = 'PENDING') AS d_pending,
+               SUM(sc.status = 'OK') - SUM(a.check_status = 'OK') AS d_ok,
+               SUM(sc.status = 'MISMATCH') - SUM(a.check_status = 'MISMATCH') AS d_mismatch,
+               SUM(sc.status = 'ABSENT') - SUM(a.check_status = 'ABSENT') AS d_absent,
+               SUM(sc.status NOT IN ('PENDING', 'OK', 'MISMATCH', 'ABSENT'))
+                 - SUM(a.check_status NOT IN ('PENDING', 'OK', 'MISMATCH', 'ABSENT')) AS d_other
+        FROM seat_checks sc
+        JOIN allocations a ON a.allocation_id = sc.allocation_id
+        JOIN seats se ON se.seat_id = a.seat_id
+        WHERE sc.check_id BETWEEN p_first_id AND p_last_id
+        GROUP BY a.exam_id, se.hall_id
+    ) AS d ON d.exam_id = ehs.exam_id AND d.hall_id = ehs.hall_id
+    SET ehs.checks_pending = ehs.checks_pending + d.d_pending,
+        ehs.checks_ok = ehs.checks_ok + d.d_ok,
+        ehs.checks_mismatch = ehs.checks_mismatch + d.d_mismatch,
+        ehs.checks_absent = ehs.checks_absent + d.d_absent,
+        ehs.checks_other = ehs.checks_other + d.d_other;
+
+    UPDATE allocations a
+    JOIN seat_checks sc ON sc.allocation_id = a.allocation_id AND sc.check_id BETWEEN p_first_id AND p_last_id
+    SET a.check_status = sc.status, a.checked_by = sc.checked_by,
+        a.checked_at = sc.checked_at, a.check_remarks = sc.remarks;
+END;
+//
+DELIMITER ;
+
+-- Procedure: Move Every Allocation of an Exam in a Hall from One Status to Another
+-- e.g. CALL transition_hall_checks(1, 1, 'PENDING', 'OK', 1, NULL)
+-- The check id block is reserved and committed before the insert, so that
+-- COMMIT also commits anything the session had open before the CALL: call
+-- it outside a transaction. The checks themselves are committed by the
+-- caller.
+DELIMITER //
+CREATE PROCEDURE transition_hall_checks(
+    IN p_exam_id INT,
+    IN p_hall_id INT,
+    IN p_from_status VARCHAR(20),
+    IN p_to_status VARCHAR(20),
+    IN p_checked_by INT,
+    IN p_remarks VARCHAR(255)
+)
+proc: BEGIN
+    DECLARE n INT DEFAULT 0;
+    DECLARE base_check_id INT DEFAULT 0;
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        SET @bulk_seat_checks = 0;
+        RESIGNAL;
+    END;
+
+    SELECT COUNT(*) INTO n
+    FROM allocations a JOIN seats se ON se.seat_id = a.seat_id
+    WHERE a.exam_id = p_exam_id AND se.hall_id = p_hall_id AND a.check_status = p_from_status;
+    IF n = 0 THEN
+        SELECT 0 AS transitioned;
+        LEAVE proc;
+    END IF;
+
+    CALL reserve_ids('seat_checks', n, base_check_id);
+    COMMIT;
+
+    SET @bulk_seat_checks = 1;
+    INSERT INTO seat_checks (check_id, allocation_id, checked_by, status, previous_status, remarks)
+    SELECT base_check_id - 1 + ROW_NUMBER() OVER (ORDER BY a.allocation_id),
+           a.allocation_id, p_checked_by, p_to_status, a.check_status, p_remarks
+    FROM allocations a JOIN seats se ON se.seat_id = a.seat_id
+    WHERE a.exam_id = p_exam_id AND se.hall_id = p_hall_id AND a.check_status = p_from_status
+    LIMIT n;
+    SET n = ROW_COUNT();
+    CALL apply_check_block(base_check_id, base_check_id + n - 1);
+    SET @bulk_seat_checks = 0;
+    SELECT n AS transitioned;
 END;
 //
 DELIMITER ;
@@ -294,11 +787,16 @@ SELECT invigilator_id, full_name, assigned FROM invigilators WHERE invigilator_i
 INSERT INTO hall_assignments VALUES (6, 1, 2, 3, '09:00:00', '12:00:00');
 SELECT invigilator_id, full_name, assigned FROM invigilators WHERE invigilator_id = 3;
 
--- Test Trigger 2: trg_auto_seat_check
-SELECT COUNT(*) FROM seat_checks;
+-- Test Triggers 2-3: trg_check_previous_status, trg_check_set_status
 INSERT INTO allocations (allocation_id, exam_id, student_id, seat_id) VALUES (10, 2, 3, 6);
+SELECT allocation_id, check_status FROM allocations WHERE allocation_id = 10;
+INSERT INTO seat_checks (check_id, allocation_id, checked_by, status, remarks) VALUES (10, 10, 3, 'OK', 'All correct');
+SELECT allocation_id, check_status, checked_by, check_remarks FROM allocations WHERE allocation_id = 10;
 SELECT * FROM seat_checks WHERE allocation_id = 10;
 
+-- the tests above used explicit ids; move the sequences past them
+CALL sync_id_sequences();
+
 -- =====================================================
 -- STORED PROCEDURES
 -- =====================================================
@@ -315,8 +813,6 @@ BEGIN
     DECLARE student_taken INT;
     DECLARE next_id INT;
     
-    SELECT IFNULL(MAX(allocation_id), 0) + 1 INTO next_id FROM allocations;
-    
     SELECT COUNT(*) INTO seat_taken
     FROM allocations
     WHERE exam_id = p_exam_id AND seat_id = p_seat_id;
@@ -326,6 +822,7 @@ BEGIN
     WHERE exam_id = p_exam_id AND student_id = p_student_id;
     
     IF seat_taken = 0 AND student_taken = 0 THEN
+        CALL reserve_ids('allocations', 1, next_id);
         INSERT INTO allocations (allocation_id, exam_id, student_id, seat_id)
         VALUES (next_id, p_exam_id, p_student_id, p_seat_id);
         SELECT 'Allocation Successful' AS message;
@@ -346,6 +843,87 @@ END;
 //
 DELIMITER ;
 
+-- Procedure 3: Set-based Auto Allocation for an Exam
+-- Pairs unallocated students (by student_id) with free seats in the exam's
+-- assigned halls (by hall, then row-major seat order) using ROW_NUMBER() and
+-- inserts all allocations (PENDING) with one INSERT ... SELECT. The id block
+-- is reserved and committed up front so concurrent allocators only meet on a
+-- single-row sequence update. That COMMIT also commits anything the session
+-- had open before the CALL, so call it outside a transaction; the insert
+-- then runs in a transaction of its own, which the caller commits.
+DELIMITER //
+CREATE PROCEDURE auto_allocate_exam(IN p_exam_id INT)
+proc: BEGIN
+    DECLARE pending_students INT DEFAULT 0;
+    DECLARE free_seats INT DEFAULT 0;
+    DECLARE block_size INT DEFAULT 0;
+    DECLARE base_alloc_id INT DEFAULT 0;
+    DECLARE allocated INT DEFAULT 0;
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        SET @bulk_seat_checks = 0;
+        RESIGNAL;
+    END;
+
+    SELECT COUNT(*) INTO pending_students
+    FROM students s
+    LEFT JOIN allocations a ON a.exam_id = p_exam_id AND a.student_id = s.student_id
+    WHERE a.allocation_id IS NULL;
+
+    SELECT COUNT(*) INTO free_seats
+    FROM seats se
+    JOIN hall_assignments ha ON ha.hall_id = se.hall_id AND ha.exam_id = p_exam_id
+    LEFT JOIN allocations a ON a.exam_id = p_exam_id AND a.seat_id = se.seat_id
+    WHERE a.allocation_id IS NULL;
+
+    SET block_size = LEAST(pending_students, free_seats);
+    IF block_size = 0 THEN
+        SELECT 0 AS allocated_count;
+        LEAVE proc;
+    END IF;
+
+    -- ids of a block that ends up partly unused are skipped, never reused
+    CALL reserve_ids('allocations', block_size, base_alloc_id);
+    COMMIT;
+    SET base_alloc_id = base_alloc_id - 1;
+
+    SET @bulk_seat_checks = 1;
+
+    INSERT INTO allocations (allocation_id, exam_id, student_id, seat_id)
+    SELECT base_alloc_id + st.rn, p_exam_id, st.student_id, fs.seat_id
+    FROM (
+        SELECT s.student_id, ROW_NUMBER() OVER (ORDER BY s.student_id) AS rn
+        FROM students s
+        LEFT JOIN allocations a ON a.exam_id = p_exam_id AND a.student_id = s.student_id
+        WHERE a.allocation_id IS NULL
+    ) AS st
+    JOIN (
+        -- row-major seat order: row letters (A..Z, AA..), then seat number
+        SELECT se.seat_id, ROW_NUMBER() OVER (
+                   ORDER BY se.hall_id,
+                            CHAR_LENGTH(REGEXP_SUBSTR(se.seat_number, '^[A-Za-z]*')),
+                            REGEXP_SUBSTR(se.seat_number, '^[A-Za-z]*'),
+                            CAST(REGEXP_SUBSTR(se.seat_number, '[0-9]+$') AS UNSIGNED),
+                            se.seat_number) AS rn
+        FROM seats se
+        JOIN hall_assignments ha ON ha.hall_id = se.hall_id AND ha.exam_id = p_exam_id
+        LEFT JOIN allocations a ON a.exam_id = p_exam_id AND a.seat_id = se.seat_id
+        WHERE a.allocation_id IS NULL
+    ) AS fs ON fs.rn = st.rn
+    WHERE st.rn <= block_size;
+
+    SET allocated = ROW_COUNT();
+
+    IF allocated > 0 THEN
+        CALL apply_allocation_block_stats(base_alloc_id + 1, base_alloc_id + block_size);
+    END IF;
+
+    SET @bulk_seat_checks = 0;
+    SELECT allocated AS allocated_count;
+END;
+//
+DELIMITER ;
+
 -- =====================================================
 -- PROCEDURE TESTING
 -- =====================================================
@@ -358,43 +936,46 @@ SELECT * FROM allocations WHERE exam_id = 2;
 CALL remove_allocation(5);
 SELECT * FROM allocations;
 
+-- Test Procedure 3: auto_allocate_exam
+CALL auto_allocate_exam(2);
+SELECT * FROM allocations WHERE exam_id = 2;
+SELECT allocation_id, seat_id, check_status FROM allocations WHERE exam_id = 2 AND check_status = 'PENDING';
+
 -- =====================================================
 -- FUNCTIONS
 -- =====================================================
 
--- Function 1: Count Allocated Students
+-- Function 1: Count Allocated Students (from exam_hall_stats, O(halls))
 DELIMITER //
 CREATE FUNCTION count_allocated_students(p_exam_id INT)
 RETURNS INT
 DETERMINISTIC
 BEGIN
     DECLARE total INT;
-    SELECT COUNT(*) INTO total
-    FROM allocations
+    SELECT IFNULL(SUM(allocated), 0) INTO total
+    FROM exam_hall_stats
     WHERE exam_id = p_exam_id;
     RETURN total;
 END;
 //
 DELIMITER ;
 
--- Function 2: Hall Occupancy
+-- Function 2: Hall Occupancy (one exam_hall_stats row)
 DELIMITER //
 CREATE FUNCTION hall_occupancy(p_exam_id INT, p_hall_id INT)
 RETURNS DECIMAL(5,2)
 DETERMINISTIC
 BEGIN
-    DECLARE total_seats INT;
-    DECLARE used_seats INT;
+    DECLARE total_seats INT DEFAULT 0;
+    DECLARE used_seats INT DEFAULT 0;
     DECLARE percent DECIMAL(5,2);
     
-    SELECT COUNT(*) INTO total_seats FROM seats WHERE hall_id = p_hall_id;
+    -- one summary row instead of counting seats and allocations
+    SELECT seat_count, allocated INTO total_seats, used_seats
+    FROM exam_hall_stats
+    WHERE exam_id = p_exam_id AND hall_id = p_hall_id;
     
-    SELECT COUNT(*) INTO used_seats
-    FROM allocations a
-    JOIN seats s ON a.seat_id = s.seat_id
-    WHERE a.exam_id = p_exam_id AND s.hall_id = p_hall_id;
-    
-    IF total_seats = 0 THEN
+    IF IFNULL(total_seats, 0) = 0 THEN
         SET percent = 0;
     ELSE
         SET percent = (used_seats / total_seats) * 100;
@@ -580,17 +1161,16 @@ LEFT JOIN seats se ON a.seat_id = se.seat_id
 GROUP BY e.exam_id, e.course_code, e.course_name, e.exam_date
 ORDER BY e.exam_date;
 
--- Aggregate Query 3: Seat Check Status Summary
+-- Aggregate Query 3: Seat Check Status Summary (current status of each allocation)
 SELECT 
     e.course_code,
     e.course_name,
-    sc.status,
+    a.check_status,
     COUNT(*) AS status_count
-FROM seat_checks sc
-JOIN allocations a ON sc.allocation_id = a.allocation_id
+FROM allocations a
 JOIN exams e ON a.exam_id = e.exam_id
-GROUP BY e.exam_id, e.course_code, e.course_name, sc.status
-ORDER BY e.course_code, sc.status;
+GROUP BY e.exam_id, e.course_code, e.course_name, a.check_status
+ORDER BY e.course_code, a.check_status;
 
 -- Aggregate Query 4: Department-wise Student Distribution
 SELECT 
@@ -615,16 +1195,18 @@ FROM exams;
 -- ADDITIONAL USEFUL QUERIES
 -- =====================================================
 
--- Query: Unallocated Students for a Specific Exam
+-- Query: Unallocated Students for a Specific Exam (anti-join)
 SELECT s.student_id, s.srn, s.full_name FROM students s
-WHERE s.student_id NOT IN (SELECT student_id FROM allocations WHERE exam_id = 1)
+LEFT JOIN allocations a ON a.exam_id = 1 AND a.student_id = s.student_id
+WHERE a.allocation_id IS NULL
 ORDER BY s.student_id;
 
--- Query: Free Seats in Assigned Halls for Exam
-SELECT seat_id, hall_id, seat_number FROM seats
-WHERE seat_id NOT IN (SELECT seat_id FROM allocations WHERE exam_id = 1)
-AND hall_id IN (SELECT hall_id FROM hall_assignments WHERE exam_id = 1)
-ORDER BY hall_id, seat_number;
+-- Query: Free Seats in Assigned Halls for Exam (anti-join)
+SELECT se.seat_id, se.hall_id, se.seat_number FROM seats se
+JOIN hall_assignments ha ON ha.hall_id = se.hall_id AND ha.exam_id = 1
+LEFT JOIN allocations a ON a.exam_id = 1 AND a.seat_id = se.seat_id
+WHERE a.allocation_id IS NULL
+ORDER BY se.hall_id, se.seat_number;
 
 -- Query: Seats Filled per Hall (Dashboard)
 SELECT h.hall_name, COUNT(a.allocation_id) AS filled
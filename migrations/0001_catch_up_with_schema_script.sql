@@ -0,0 +1,198 @@
+-- 0001: bring a database created from the original script up to the
+-- current exam_seat_allocator.sql (accessible-seat flag, import checkpoints,
+-- id sequences, bulk-aware seat-check trigger, set-based auto allocation).
+-- Fresh installs from exam_seat_allocator.sql already record this version.
+
+ALTER TABLE students
+  ADD COLUMN needs_accessible_seat BOOLEAN NOT NULL DEFAULT FALSE;
+
+CREATE TABLE import_jobs (
+  job_id INT AUTO_INCREMENT PRIMARY KEY,
+  table_name VARCHAR(30) NOT NULL,
+  file_name VARCHAR(255) NOT NULL,
+  file_sha256 CHAR(64) NOT NULL,
+  rows_processed INT NOT NULL DEFAULT 0,
+  rows_inserted INT NOT NULL DEFAULT 0,
+  rows_rejected INT NOT NULL DEFAULT 0,
+  status VARCHAR(20) NOT NULL DEFAULT 'RUNNING',
+  started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  KEY idx_import_jobs_file (file_sha256, table_name)
+);
+
+CREATE TABLE id_sequences (
+  seq_name VARCHAR(30) PRIMARY KEY,
+  next_id INT NOT NULL
+);
+
+DROP PROCEDURE IF EXISTS reserve_ids;
+DELIMITER //
+CREATE PROCEDURE reserve_ids(
+    IN p_seq_name VARCHAR(30),
+    IN p_count INT,
+    OUT p_first_id INT
+)
+BEGIN
+    SELECT next_id INTO p_first_id
+    FROM id_sequences WHERE seq_name = p_seq_name FOR UPDATE;
+    
+    UPDATE id_sequences SET next_id = next_id + p_count
+    WHERE seq_name = p_seq_name;
+END;
+//
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS sync_id_sequences;
+DELIMITER //
+CREATE PROCEDURE sync_id_sequences()
+BEGIN
+    INSERT INTO id_sequences (seq_name, next_id)
+    SELECT * FROM (
+        SELECT 'students' AS seq_name, IFNULL(MAX(student_id), 0) + 1 AS next_id FROM students
+        UNION ALL SELECT 'exams', IFNULL(MAX(exam_id), 0) + 1 FROM exams
+        UNION ALL SELECT 'halls', IFNULL(MAX(hall_id), 0) + 1 FROM halls
+        UNION ALL SELECT 'seats', IFNULL(MAX(seat_id), 0) + 1 FROM seats
+        UNION ALL SELECT 'invigilators', IFNULL(MAX(invigilator_id), 0) + 1 FROM invigilators
+        UNION ALL SELECT 'hall_assignments', IFNULL(MAX(assignment_id), 0) + 1 FROM hall_assignments
+        UNION ALL SELECT 'allocations', IFNULL(MAX(allocation_id), 0) + 1 FROM allocations
+        UNION ALL SELECT 'seat_checks', IFNULL(MAX(check_id), 0) + 1 FROM seat_checks
+    ) AS src
+    ON DUPLICATE KEY UPDATE next_id = GREATEST(id_sequences.next_id, src.next_id);
+END;
+//
+DELIMITER ;
+
+CALL sync_id_sequences();
+
+DROP TRIGGER IF EXISTS trg_auto_seat_check;
+DELIMITER //
+CREATE TRIGGER trg_auto_seat_check
+AFTER INSERT ON allocations
+FOR EACH ROW
+BEGIN
+    DECLARE next_check_id INT;
+    
+    -- bulk writers (auto_allocate_exam) set @bulk_seat_checks and create
+    -- the PENDING rows themselves in one INSERT ... SELECT
+    IF IFNULL(@bulk_seat_checks, 0) = 0 THEN
+        CALL reserve_ids('seat_checks', 1, next_check_id);
+        
+        INSERT INTO seat_checks (check_id, allocation_id, checked_by, status, remarks)
+        VALUES (next_check_id, NEW.allocation_id, NULL, 'PENDING', 'Awaiting verification');
+    END IF;
+END;
+//
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS allocate_student_to_seat;
+DELIMITER //
+CREATE PROCEDURE allocate_student_to_seat(
+    IN p_exam_id INT,
+    IN p_student_id INT,
+    IN p_seat_id INT
+)
+BEGIN
+    DECLARE seat_taken INT;
+    DECLARE student_taken INT;
+    DECLARE next_id INT;
+    
+    SELECT COUNT(*) INTO seat_taken
+    FROM allocations
+    WHERE exam_id = p_exam_id AND seat_id = p_seat_id;
+    
+    SELECT COUNT(*) INTO student_taken
+    FROM allocations
+    WHERE exam_id = p_exam_id AND student_id = p_student_id;
+    
+    IF seat_taken = 0 AND student_taken = 0 THEN
+        CALL reserve_ids('allocations', 1, next_id);
+        INSERT INTO allocations (allocation_id, exam_id, student_id, seat_id)
+        VALUES (next_id, p_exam_id, p_student_id, p_seat_id);
+        SELECT 'Allocation Successful' AS message;
+    ELSE
+        SELECT 'Seat or student already allocated for this exam' AS message;
+    END IF;
+END;
+//
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS auto_allocate_exam;
+DELIMITER //
+CREATE PROCEDURE auto_allocate_exam(IN p_exam_id INT)
+proc: BEGIN
+    DECLARE pending_students INT DEFAULT 0;
+    DECLARE free_seats INT DEFAULT 0;
+    DECLARE block_size INT DEFAULT 0;
+    DECLARE base_alloc_id INT DEFAULT 0;
+    DECLARE base_check_id INT DEFAULT 0;
+    DECLARE allocated INT DEFAULT 0;
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        SET @bulk_seat_checks = 0;
+        RESIGNAL;
+    END;
+    
+    SELECT COUNT(*) INTO pending_students
+    FROM students s
+    LEFT JOIN allocations a ON a.exam_id = p_exam_id AND a.student_id = s.student_id
+    WHERE a.allocation_id IS NULL;
+    
+    SELECT COUNT(*) INTO free_seats
+    FROM seats se
+    JOIN hall_assignments ha ON ha.hall_id = se.hall_id AND ha.exam_id = p_exam_id
+    LEFT JOIN allocations a ON a.exam_id = p_exam_id AND a.seat_id = se.seat_id
+    WHERE a.allocation_id IS NULL;
+    
+    SET block_size = LEAST(pending_students, free_seats);
+    IF block_size = 0 THEN
+        SELECT 0 AS allocated_count;
+        LEAVE proc;
+    END IF;
+    
+    -- ids of a block that ends up partly unused are skipped, never reused
+    CALL reserve_ids('allocations', block_size, base_alloc_id);
+    CALL reserve_ids('seat_checks', block_size, base_check_id);
+    COMMIT;
+    SET base_alloc_id = base_alloc_id - 1;
+    SET base_check_id = base_check_id - 1;
+    
+    SET @bulk_seat_checks = 1;
+    
+    INSERT INTO allocations (allocation_id, exam_id, student_id, seat_id)
+    SELECT base_alloc_id + st.rn, p_exam_id, st.student_id, fs.seat_id
+    FROM (
+        SELECT s.student_id, ROW_NUMBER() OVER (ORDER BY s.student_id) AS rn
+        FROM students s
+        LEFT JOIN allocations a ON a.exam_id = p_exam_id AND a.student_id = s.student_id
+        WHERE a.allocation_id IS NULL
+    ) AS st
+    JOIN (
+        -- row-major seat order: row letters (A..Z, AA..), then seat number
+        SELECT se.seat_id, ROW_NUMBER() OVER (
+                   ORDER BY se.hall_id,
+                            CHAR_LENGTH(REGEXP_SUBSTR(se.seat_number, '^[A-Za-z]*')),
+                            REGEXP_SUBSTR(se.seat_number, '^[A-Za-z]*'),
+                            CAST(REGEXP_SUBSTR(se.seat_number, '[0-9]+$') AS UNSIGNED),
+                            se.seat_number) AS rn
+        FROM seats se
+        JOIN hall_assignments ha ON ha.hall_id = se.hall_id AND ha.exam_id = p_exam_id
+        LEFT JOIN allocations a ON a.exam_id = p_exam_id AND a.seat_id = se.seat_id
+        WHERE a.allocation_id IS NULL
+    ) AS fs ON fs.rn = st.rn
+    WHERE st.rn <= block_size;
+    
+    SET allocated = ROW_COUNT();
+    
+    IF allocated > 0 THEN
+        INSERT INTO seat_checks (check_id, allocation_id, checked_by, status, remarks)
+        SELECT base_check_id + ROW_NUMBER() OVER (ORDER BY a.allocation_id),
+               a.allocation_id, NULL, 'PENDING', 'Awaiting verification'
+        FROM allocations a
+        WHERE a.allocation_id BETWEEN base_alloc_id + 1 AND base_alloc_id + block_size;
+    END IF;
+    
+    SET @bulk_seat_checks = 0;
+    SELECT allocated AS allocated_count;
+END;
+//
+DELIMITER ;
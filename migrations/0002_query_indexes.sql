@@ -0,0 +1,42 @@
+-- 0002: indexes for the queries app.py and the stored routines actually run.
+-- The before/after lines are the EXPLAIN rows each index is meant to change;
+-- benchmarks/check_query_plans.py prints the plan of every query in app.py
+-- on a seeded copy of the schema, so they can be checked.
+-- Only the UNIQUE constraints and the indexes InnoDB creates for foreign
+-- keys existed before this.
+
+-- load_batch_inventory (exams, hall assignments and allocations of a date
+-- range): WHERE e.exam_date BETWEEN ... ORDER BY exam_date, start_time.
+-- UNIQUE (course_code, exam_date) cannot serve a date range, so every batch
+-- read scanned exams and sorted.
+--   before: exams  type=ALL   key=NULL            Extra: Using where; Using filesort
+--   after:  exams  type=range key=idx_exams_date  (rows in the range only, no sort)
+ALTER TABLE exams
+  ADD KEY idx_exams_date (exam_date, start_time);
+
+-- get_student_seat(srn): students by srn -> allocations by student_id ->
+-- exams, ORDER BY exam_date. The InnoDB FK index on student_id alone forced a
+-- row lookup per allocation to read exam_id and seat_id; this one covers the
+-- join and replaces that FK index (InnoDB drops it once a covering one exists).
+--   before: a  type=ref  key=fk_alloc_student
+--   after:  a  type=ref  key=idx_alloc_student_exam  Extra: Using index
+ALTER TABLE allocations
+  ADD KEY idx_alloc_student_exam (student_id, exam_id, seat_id);
+
+-- Seat map latest check (MAX(check_id) WHERE allocation_id = ...) and the
+-- per-exam status summary (seat_checks JOIN allocations ... GROUP BY status)
+-- read seat_checks by allocation_id and then need status. Covering index
+-- instead of the FK index plus a row lookup per check.
+--   before: sc  type=ref  key=fk_check_alloc
+--   after:  sc  type=ref  key=idx_checks_alloc_status  Extra: Using index
+ALTER TABLE seat_checks
+  ADD KEY idx_checks_alloc_status (allocation_id, status);
+
+-- Checks still to be done (WHERE status = 'PENDING'), e.g. after a bulk
+-- allocation: a range on status instead of a full scan of seat_checks.
+--   before: seat_checks  type=ALL  key=NULL
+--   after:  seat_checks  type=ref  key=idx_checks_status  Extra: Using index
+ALTER TABLE seat_checks
+  ADD KEY idx_checks_status (status, allocation_id);
+
+ANALYZE TABLE exams, allocations, seat_checks;
@@ -0,0 +1,448 @@
+-- 0003: exam_hall_stats, one row per exam x hall with the hall's seat count,
+-- the allocations in it and the latest seat-check status of each of them.
+-- Kept up to date by triggers (single-row writes) and by the bulk
+-- allocators (one set-based update per block); the dashboard and the
+-- occupancy functions read it instead of aggregating allocations.
+
+CREATE TABLE exam_hall_stats (
+  exam_id INT NOT NULL,
+  hall_id INT NOT NULL,
+  seat_count INT NOT NULL DEFAULT 0,
+  allocated INT NOT NULL DEFAULT 0,
+  checks_pending INT NOT NULL DEFAULT 0,
+  checks_ok INT NOT NULL DEFAULT 0,
+  checks_mismatch INT NOT NULL DEFAULT 0,
+  checks_absent INT NOT NULL DEFAULT 0,
+  checks_other INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (exam_id, hall_id),
+  KEY idx_ehs_hall (hall_id),
+  CONSTRAINT fk_ehs_exam FOREIGN KEY (exam_id)
+    REFERENCES exams(exam_id)
+    ON DELETE CASCADE
+    ON UPDATE CASCADE,
+  CONSTRAINT fk_ehs_hall FOREIGN KEY (hall_id)
+    REFERENCES halls(hall_id)
+    ON DELETE CASCADE
+    ON UPDATE CASCADE
+);
+
+DROP FUNCTION IF EXISTS latest_check_status;
+DELIMITER //
+CREATE FUNCTION latest_check_status(p_allocation_id INT)
+RETURNS VARCHAR(20)
+READS SQL DATA
+BEGIN
+    DECLARE v_status VARCHAR(20);
+    SELECT status INTO v_status FROM seat_checks
+    WHERE allocation_id = p_allocation_id
+    ORDER BY check_id DESC LIMIT 1;
+    RETURN v_status;
+END;
+//
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS bump_exam_hall_stats;
+DELIMITER //
+CREATE PROCEDURE bump_exam_hall_stats(
+    IN p_exam_id INT,
+    IN p_hall_id INT,
+    IN p_allocated INT,
+    IN p_status VARCHAR(20),
+    IN p_checks INT
+)
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM exam_hall_stats WHERE exam_id = p_exam_id AND hall_id = p_hall_id) THEN
+        INSERT IGNORE INTO exam_hall_stats (exam_id, hall_id, seat_count)
+        SELECT p_exam_id, p_hall_id, COUNT(*) FROM seats WHERE hall_id = p_hall_id;
+    END IF;
+
+    UPDATE exam_hall_stats SET
+        allocated = allocated + p_allocated,
+        checks_pending = checks_pending + IF(p_status = 'PENDING', p_checks, 0),
+        checks_ok = checks_ok + IF(p_status = 'OK', p_checks, 0),
+        checks_mismatch = checks_mismatch + IF(p_status = 'MISMATCH', p_checks, 0),
+        checks_absent = checks_absent + IF(p_status = 'ABSENT', p_checks, 0),
+        checks_other = checks_other + IF(p_status NOT IN ('PENDING', 'OK', 'MISMATCH', 'ABSENT'), p_checks, 0)
+    WHERE exam_id = p_exam_id AND hall_id = p_hall_id;
+END;
+//
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS apply_allocation_block_stats;
+DELIMITER //
+CREATE PROCEDURE apply_allocation_block_stats(IN p_first_id INT, IN p_last_id INT)
+BEGIN
+    INSERT INTO exam_hall_stats (exam_id, hall_id, seat_count, allocated, checks_pending)
+    SELECT * FROM (
+        SELECT a.exam_id, se.hall_id,
+               (SELECT COUNT(*) FROM seats s2 WHERE s2.hall_id = se.hall_id) AS seat_count,
+               COUNT(*) AS allocated, COUNT(*) AS checks_pending
+        FROM allocations a
+        JOIN seats se ON se.seat_id = a.seat_id
+        WHERE a.allocation_id BETWEEN p_first_id AND p_last_id
+        GROUP BY a.exam_id, se.hall_id
+    ) AS blk
+    ON DUPLICATE KEY UPDATE
+        allocated = exam_hall_stats.allocated + blk.allocated,
+        checks_pending = exam_hall_stats.checks_pending + blk.checks_pending;
+END;
+//
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS rebuild_exam_hall_stats;
+DELIMITER //
+CREATE PROCEDURE rebuild_exam_hall_stats(IN p_hall_id INT)
+BEGIN
+    DELETE FROM exam_hall_stats WHERE p_hall_id IS NULL OR hall_id = p_hall_id;
+
+    INSERT INTO exam_hall_stats (exam_id, hall_id, seat_count, allocated, checks_pending,
+                                 checks_ok, checks_mismatch, checks_absent, checks_other)
+    SELECT p.exam_id, p.hall_id,
+           (SELECT COUNT(*) FROM seats s WHERE s.hall_id = p.hall_id),
+           IFNULL(x.allocated, 0), IFNULL(x.pending, 0), IFNULL(x.ok, 0),
+           IFNULL(x.mismatch, 0), IFNULL(x.absent, 0), IFNULL(x.other, 0)
+    FROM (
+        SELECT exam_id, hall_id FROM hall_assignments
+        WHERE p_hall_id IS NULL OR hall_id = p_hall_id
+        UNION
+        SELECT a.exam_id, se.hall_id FROM allocations a JOIN seats se ON se.seat_id = a.seat_id
+        WHERE p_hall_id IS NULL OR se.hall_id = p_hall_id
+    ) AS p
+    LEFT JOIN (
+        SELECT a.exam_id, se.hall_id, COUNT(*) AS allocated,
+               SUM(sc.status = 'PENDING') AS pending,
+               SUM(sc.status = 'OK') AS ok,
+               SUM(sc.status = 'MISMATCH') AS mismatch,
+               SUM(sc.status = 'ABSENT') AS absent,
+               SUM(sc.status NOT IN ('PENDING', 'OK', 'MISMATCH', 'ABSENT')) AS other
+        FROM allocations a
+        JOIN seats se ON se.seat_id = a.seat_id
+        LEFT JOIN seat_checks sc ON sc.check_id =
+            (SELECT MAX(check_id) FROM seat_checks WHERE allocation_id = a.allocation_id)
+        WHERE p_hall_id IS NULL OR se.hall_id = p_hall_id
+        GROUP BY a.exam_id, se.hall_id
+    ) AS x ON x.exam_id = p.exam_id AND x.hall_id = p.hall_id;
+END;
+//
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_stats_alloc_insert;
+DELIMITER //
+CREATE TRIGGER trg_stats_alloc_insert
+AFTER INSERT ON allocations
+FOR EACH ROW
+BEGIN
+    DECLARE v_hall INT;
+
+    IF IFNULL(@bulk_seat_checks, 0) = 0 THEN
+        SELECT hall_id INTO v_hall FROM seats WHERE seat_id = NEW.seat_id;
+        CALL bump_exam_hall_stats(NEW.exam_id, v_hall, 1, NULL, 0);
+    END IF;
+END;
+//
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_stats_alloc_update;
+DELIMITER //
+CREATE TRIGGER trg_stats_alloc_update
+AFTER UPDATE ON allocations
+FOR EACH ROW
+BEGIN
+    DECLARE v_old_hall INT;
+    DECLARE v_new_hall INT;
+    DECLARE v_status VARCHAR(20);
+
+    IF OLD.exam_id <> NEW.exam_id OR OLD.seat_id <> NEW.seat_id THEN
+        SET v_status = latest_check_status(NEW.allocation_id);
+        SELECT hall_id INTO v_old_hall FROM seats WHERE seat_id = OLD.seat_id;
+        SELECT hall_id INTO v_new_hall FROM seats WHERE seat_id = NEW.seat_id;
+        CALL bump_exam_hall_stats(OLD.exam_id, v_old_hall, -1, v_status, -1);
+        CALL bump_exam_hall_stats(NEW.exam_id, v_new_hall, 1, v_status, 1);
+    END IF;
+END;
+//
+DELIMITER ;
+
+-- BEFORE, while the seat checks the delete cascades to can still be read
+DROP TRIGGER IF EXISTS trg_stats_alloc_delete;
+DELIMITER //
+CREATE TRIGGER trg_stats_alloc_delete
+BEFORE DELETE ON allocations
+FOR EACH ROW
+BEGIN
+    DECLARE v_hall INT;
+
+    SELECT hall_id INTO v_hall FROM seats WHERE seat_id = OLD.seat_id;
+    CALL bump_exam_hall_stats(OLD.exam_id, v_hall, -1, latest_check_status(OLD.allocation_id), -1);
+END;
+//
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_stats_check_insert;
+DELIMITER //
+CREATE TRIGGER trg_stats_check_insert
+AFTER INSERT ON seat_checks
+FOR EACH ROW
+BEGIN
+    DECLARE v_exam INT;
+    DECLARE v_hall INT;
+    DECLARE v_prev VARCHAR(20);
+
+    -- only a check that becomes the allocation's latest changes the counts
+    IF IFNULL(@bulk_seat_checks, 0) = 0 AND NOT EXISTS (
+            SELECT 1 FROM seat_checks WHERE allocation_id = NEW.allocation_id AND check_id > NEW.check_id) THEN
+        SELECT a.exam_id, se.hall_id INTO v_exam, v_hall
+        FROM allocations a JOIN seats se ON se.seat_id = a.seat_id
+        WHERE a.allocation_id = NEW.allocation_id;
+
+        SELECT status INTO v_prev FROM seat_checks
+        WHERE allocation_id = NEW.allocation_id AND check_id < NEW.check_id
+        ORDER BY check_id DESC LIMIT 1;
+
+        IF v_prev IS NOT NULL THEN
+            CALL bump_exam_hall_stats(v_exam, v_hall, 0, v_prev, -1);
+        END IF;
+        CALL bump_exam_hall_stats(v_exam, v_hall, 0, NEW.status, 1);
+    END IF;
+END;
+//
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_stats_check_update;
+DELIMITER //
+CREATE TRIGGER trg_stats_check_update
+AFTER UPDATE ON seat_checks
+FOR EACH ROW
+BEGIN
+    DECLARE v_exam INT;
+    DECLARE v_hall INT;
+
+    IF NOT (OLD.status <=> NEW.status) AND OLD.allocation_id = NEW.allocation_id AND NOT EXISTS (
+            SELECT 1 FROM seat_checks WHERE allocation_id = NEW.allocation_id AND check_id > NEW.check_id) THEN
+        SELECT a.exam_id, se.hall_id INTO v_exam, v_hall
+        FROM allocations a JOIN seats se ON se.seat_id = a.seat_id
+        WHERE a.allocation_id = NEW.allocation_id;
+        CALL bump_exam_hall_stats(v_exam, v_hall, 0, OLD.status, -1);
+        CALL bump_exam_hall_stats(v_exam, v_hall, 0, NEW.status, 1);
+    END IF;
+END;
+//
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_stats_check_delete;
+DELIMITER //
+CREATE TRIGGER trg_stats_check_delete
+AFTER DELETE ON seat_checks
+FOR EACH ROW
+BEGIN
+    DECLARE v_exam INT;
+    DECLARE v_hall INT;
+
+    IF NOT EXISTS (SELECT 1 FROM seat_checks WHERE allocation_id = OLD.allocation_id AND check_id > OLD.check_id) THEN
+        SELECT a.exam_id, se.hall_id INTO v_exam, v_hall
+        FROM allocations a JOIN seats se ON se.seat_id = a.seat_id
+        WHERE a.allocation_id = OLD.allocation_id;
+        CALL bump_exam_hall_stats(v_exam, v_hall, 0, OLD.status, -1);
+        CALL bump_exam_hall_stats(v_exam, v_hall, 0, latest_check_status(OLD.allocation_id), 1);
+    END IF;
+END;
+//
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_stats_seat_insert;
+DELIMITER //
+CREATE TRIGGER trg_stats_seat_insert
+AFTER INSERT ON seats
+FOR EACH ROW
+BEGIN
+    UPDATE exam_hall_stats SET seat_count = seat_count + 1 WHERE hall_id = NEW.hall_id;
+END;
+//
+DELIMITER ;
+
+-- Deleting a seat cascades to its allocations without firing their
+-- triggers, so their counts are taken off here.
+DROP TRIGGER IF EXISTS trg_stats_seat_delete;
+DELIMITER //
+CREATE TRIGGER trg_stats_seat_delete
+BEFORE DELETE ON seats
+FOR EACH ROW
+BEGIN
+    UPDATE exam_hall_stats ehs
+    LEFT JOIN (
+        SELECT a.exam_id, latest_check_status(a.allocation_id) AS status
+        FROM allocations a WHERE a.seat_id = OLD.seat_id
+    ) AS gone ON gone.exam_id = ehs.exam_id
+    SET ehs.seat_count = ehs.seat_count - 1,
+        ehs.allocated = ehs.allocated - (gone.exam_id IS NOT NULL),
+        ehs.checks_pending = ehs.checks_pending - IFNULL(gone.status = 'PENDING', 0),
+        ehs.checks_ok = ehs.checks_ok - IFNULL(gone.status = 'OK', 0),
+        ehs.checks_mismatch = ehs.checks_mismatch - IFNULL(gone.status = 'MISMATCH', 0),
+        ehs.checks_absent = ehs.checks_absent - IFNULL(gone.status = 'ABSENT', 0),
+        ehs.checks_other = ehs.checks_other - IFNULL(gone.status NOT IN ('PENDING', 'OK', 'MISMATCH', 'ABSENT'), 0)
+    WHERE ehs.hall_id = OLD.hall_id;
+END;
+//
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_stats_seat_update;
+DELIMITER //
+CREATE TRIGGER trg_stats_seat_update
+AFTER UPDATE ON seats
+FOR EACH ROW
+BEGIN
+    IF OLD.hall_id <> NEW.hall_id THEN
+        CALL rebuild_exam_hall_stats(OLD.hall_id);
+        CALL rebuild_exam_hall_stats(NEW.hall_id);
+    END IF;
+END;
+//
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_stats_assignment_insert;
+DELIMITER //
+CREATE TRIGGER trg_stats_assignment_insert
+AFTER INSERT ON hall_assignments
+FOR EACH ROW
+BEGIN
+    CALL bump_exam_hall_stats(NEW.exam_id, NEW.hall_id, 0, NULL, 0);
+END;
+//
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_stats_assignment_delete;
+DELIMITER //
+CREATE TRIGGER trg_stats_assignment_delete
+AFTER DELETE ON hall_assignments
+FOR EACH ROW
+BEGIN
+    DELETE FROM exam_hall_stats
+    WHERE exam_id = OLD.exam_id AND hall_id = OLD.hall_id AND allocated = 0;
+END;
+//
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS auto_allocate_exam;
+DELIMITER //
+CREATE PROCEDURE auto_allocate_exam(IN p_exam_id INT)
+proc: BEGIN
+    DECLARE pending_students INT DEFAULT 0;
+    DECLARE free_seats INT DEFAULT 0;
+    DECLARE block_size INT DEFAULT 0;
+    DECLARE base_alloc_id INT DEFAULT 0;
+    DECLARE base_check_id INT DEFAULT 0;
+    DECLARE allocated INT DEFAULT 0;
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        SET @bulk_seat_checks = 0;
+        RESIGNAL;
+    END;
+
+    SELECT COUNT(*) INTO pending_students
+    FROM students s
+    LEFT JOIN allocations a ON a.exam_id = p_exam_id AND a.student_id = s.student_id
+    WHERE a.allocation_id IS NULL;
+
+    SELECT COUNT(*) INTO free_seats
+    FROM seats se
+    JOIN hall_assignments ha ON ha.hall_id = se.hall_id AND ha.exam_id = p_exam_id
+    LEFT JOIN allocations a ON a.exam_id = p_exam_id AND a.seat_id = se.seat_id
+    WHERE a.allocation_id IS NULL;
+
+    SET block_size = LEAST(pending_students, free_seats);
+    IF block_size = 0 THEN
+        SELECT 0 AS allocated_count;
+        LEAVE proc;
+    END IF;
+
+    -- ids of a block that ends up partly unused are skipped, never reused
+    CALL reserve_ids('allocations', block_size, base_alloc_id);
+    CALL reserve_ids('seat_checks', block_size, base_check_id);
+    COMMIT;
+    SET base_alloc_id = base_alloc_id - 1;
+    SET base_check_id = base_check_id - 1;
+
+    SET @bulk_seat_checks = 1;
+
+    INSERT INTO allocations (allocation_id, exam_id, student_id, seat_id)
+    SELECT base_alloc_id + st.rn, p_exam_id, st.student_id, fs.seat_id
+    FROM (
+        SELECT s.student_id, ROW_NUMBER() OVER (ORDER BY s.student_id) AS rn
+        FROM students s
+        LEFT JOIN allocations a ON a.exam_id = p_exam_id AND a.student_id = s.student_id
+        WHERE a.allocation_id IS NULL
+    ) AS st
+    JOIN (
+        -- row-major seat order: row letters (A..Z, AA..), then seat number
+        SELECT se.seat_id, ROW_NUMBER() OVER (
+                   ORDER BY se.hall_id,
+                            CHAR_LENGTH(REGEXP_SUBSTR(se.seat_number, '^[A-Za-z]*')),
+                            REGEXP_SUBSTR(se.seat_number, '^[A-Za-z]*'),
+                            CAST(REGEXP_SUBSTR(se.seat_number, '[0-9]+$') AS UNSIGNED),
+                            se.seat_number) AS rn
+        FROM seats se
+        JOIN hall_assignments ha ON ha.hall_id = se.hall_id AND ha.exam_id = p_exam_id
+        LEFT JOIN allocations a ON a.exam_id = p_exam_id AND a.seat_id = se.seat_id
+        WHERE a.allocation_id IS NULL
+    ) AS fs ON fs.rn = st.rn
+    WHERE st.rn <= block_size;
+
+    SET allocated = ROW_COUNT();
+
+    IF allocated > 0 THEN
+        INSERT INTO seat_checks (check_id, allocation_id, checked_by, status, remarks)
+        SELECT base_check_id + ROW_NUMBER() OVER (ORDER BY a.allocation_id),
+               a.allocation_id, NULL, 'PENDING', 'Awaiting verification'
+        FROM allocations a
+        WHERE a.allocation_id BETWEEN base_alloc_id + 1 AND base_alloc_id + block_size;
+
+        CALL apply_allocation_block_stats(base_alloc_id + 1, base_alloc_id + block_size);
+    END IF;
+
+    SET @bulk_seat_checks = 0;
+    SELECT allocated AS allocated_count;
+END;
+//
+DELIMITER ;
+
+DROP FUNCTION IF EXISTS count_allocated_students;
+DELIMITER //
+CREATE FUNCTION count_allocated_students(p_exam_id INT)
+RETURNS INT
+DETERMINISTIC
+BEGIN
+    DECLARE total INT;
+    SELECT IFNULL(SUM(allocated), 0) INTO total
+    FROM exam_hall_stats
+    WHERE exam_id = p_exam_id;
+    RETURN total;
+END;
+//
+DELIMITER ;
+
+DROP FUNCTION IF EXISTS hall_occupancy;
+DELIMITER //
+CREATE FUNCTION hall_occupancy(p_exam_id INT, p_hall_id INT)
+RETURNS DECIMAL(5,2)
+DETERMINISTIC
+BEGIN
+    DECLARE total_seats INT DEFAULT 0;
+    DECLARE used_seats INT DEFAULT 0;
+    DECLARE percent DECIMAL(5,2);
+
+    SELECT seat_count, allocated INTO total_seats, used_seats
+    FROM exam_hall_stats
+    WHERE exam_id = p_exam_id AND hall_id = p_hall_id;
+
+    IF IFNULL(total_seats, 0) = 0 THEN
+        SET percent = 0;
+    ELSE
+        SET percent = (used_seats / total_seats) * 100;
+    END IF;
+
+    RETURN percent;
+END;
+//
+DELIMITER ;
+
+CALL rebuild_exam_hall_stats(NULL);
@@ -0,0 +1,8 @@
+-- 0004: index for the exam-day console's incremental poll, which reads the
+-- checks written since a checked_at watermark and then filters them to one
+-- exam and hall through allocations and seats.
+--   before: sc  type=ALL    key=NULL
+--   after:  sc  type=range  key=idx_checks_checked_at  (only the recent checks)
+
+ALTER TABLE seat_checks
+  ADD KEY idx_checks_checked_at (checked_at);
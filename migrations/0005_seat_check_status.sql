@@ -0,0 +1,359 @@
+-- 0005: current seat-check status on allocations, seat_checks as an
+-- append-only history. An allocation starts PENDING without a placeholder
+-- check row; every check appends one history row (with the status it
+-- replaced) and moves allocations.check_status. Bulk transitions (a row or
+-- a whole hall) write one history block and apply it set-based.
+
+ALTER TABLE allocations
+  ADD COLUMN check_status VARCHAR(20) NOT NULL DEFAULT 'PENDING',
+  ADD COLUMN checked_by INT NULL,
+  ADD COLUMN checked_at TIMESTAMP NULL,
+  ADD COLUMN check_remarks VARCHAR(255),
+  ADD KEY idx_alloc_exam_checked_at (exam_id, checked_at),
+  ADD CONSTRAINT fk_alloc_checked_by FOREIGN KEY (checked_by)
+    REFERENCES invigilators(invigilator_id)
+    ON DELETE SET NULL
+    ON UPDATE CASCADE;
+
+ALTER TABLE seat_checks
+  ADD COLUMN previous_status VARCHAR(20) AFTER status;
+
+DROP TRIGGER IF EXISTS trg_auto_seat_check;
+DROP TRIGGER IF EXISTS trg_stats_check_insert;
+DROP TRIGGER IF EXISTS trg_stats_check_update;
+DROP TRIGGER IF EXISTS trg_stats_check_delete;
+DROP TRIGGER IF EXISTS trg_stats_alloc_update;
+
+-- latest history row of each allocation becomes its current status
+UPDATE allocations a
+JOIN seat_checks sc ON sc.check_id =
+    (SELECT MAX(check_id) FROM seat_checks WHERE allocation_id = a.allocation_id)
+SET a.check_status = sc.status,
+    a.checked_by = sc.checked_by,
+    a.checked_at = sc.checked_at,
+    a.check_remarks = sc.remarks;
+
+UPDATE seat_checks sc
+JOIN (SELECT check_id,
+             LAG(status) OVER (PARTITION BY allocation_id ORDER BY check_id) AS prev
+      FROM seat_checks) AS h ON h.check_id = sc.check_id
+SET sc.previous_status = h.prev;
+
+DROP PROCEDURE IF EXISTS rebuild_exam_hall_stats;
+DELIMITER //
+CREATE PROCEDURE rebuild_exam_hall_stats(IN p_hall_id INT)
+BEGIN
+    DELETE FROM exam_hall_stats WHERE p_hall_id IS NULL OR hall_id = p_hall_id;
+
+    INSERT INTO exam_hall_stats (exam_id, hall_id, seat_count, allocated, checks_pending,
+                                 checks_ok, checks_mismatch, checks_absent, checks_other)
+    SELECT p.exam_id, p.hall_id,
+           (SELECT COUNT(*) FROM seats s WHERE s.hall_id = p.hall_id),
+           IFNULL(x.allocated, 0), IFNULL(x.pending, 0), IFNULL(x.ok, 0),
+           IFNULL(x.mismatch, 0), IFNULL(x.absent, 0), IFNULL(x.other, 0)
+    FROM (
+        SELECT exam_id, hall_id FROM hall_assignments
+        WHERE p_hall_id IS NULL OR hall_id = p_hall_id
+        UNION
+        SELECT a.exam_id, se.hall_id FROM allocations a JOIN seats se ON se.seat_id = a.seat_id
+        WHERE p_hall_id IS NULL OR se.hall_id = p_hall_id
+    ) AS p
+    LEFT JOIN (
+        SELECT a.exam_id, se.hall_id, COUNT(*) AS allocated,
+               SUM(a.check_status = 'PENDING') AS pending,
+               SUM(a.check_status = 'OK') AS ok,
+               SUM(a.check_status = 'MISMATCH') AS mismatch,
+               SUM(a.check_status = 'ABSENT') AS absent,
+               SUM(a.check_status NOT IN ('PENDING', 'OK', 'MISMATCH', 'ABSENT')) AS other
+        FROM allocations a
+        JOIN seats se ON se.seat_id = a.seat_id
+        WHERE p_hall_id IS NULL OR se.hall_id = p_hall_id
+        GROUP BY a.exam_id, se.hall_id
+    ) AS x ON x.exam_id = p.exam_id AND x.hall_id = p.hall_id;
+END;
+//
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_stats_alloc_insert;
+DELIMITER //
+CREATE TRIGGER trg_stats_alloc_insert
+AFTER INSERT ON allocations
+FOR EACH ROW
+BEGIN
+    DECLARE v_hall INT;
+
+    IF IFNULL(@bulk_seat_checks, 0) = 0 THEN
+        SELECT hall_id INTO v_hall FROM seats WHERE seat_id = NEW.seat_id;
+        CALL bump_exam_hall_stats(NEW.exam_id, v_hall, 1, NEW.check_status, 1);
+    END IF;
+END;
+//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_stats_alloc_update
+AFTER UPDATE ON allocations
+FOR EACH ROW
+BEGIN
+    DECLARE v_old_hall INT;
+    DECLARE v_new_hall INT;
+
+    IF IFNULL(@bulk_seat_checks, 0) = 0 THEN
+        SELECT hall_id INTO v_old_hall FROM seats WHERE seat_id = OLD.seat_id;
+        IF OLD.exam_id <> NEW.exam_id OR OLD.seat_id <> NEW.seat_id THEN
+            SELECT hall_id INTO v_new_hall FROM seats WHERE seat_id = NEW.seat_id;
+            CALL bump_exam_hall_stats(OLD.exam_id, v_old_hall, -1, OLD.check_status, -1);
+            CALL bump_exam_hall_stats(NEW.exam_id, v_new_hall, 1, NEW.check_status, 1);
+        ELSEIF OLD.check_status <> NEW.check_status THEN
+            CALL bump_exam_hall_stats(OLD.exam_id, v_old_hall, 0, OLD.check_status, -1);
+            CALL bump_exam_hall_stats(OLD.exam_id, v_old_hall, 0, NEW.check_status, 1);
+        END IF;
+    END IF;
+END;
+//
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_stats_alloc_delete;
+DELIMITER //
+CREATE TRIGGER trg_stats_alloc_delete
+BEFORE DELETE ON allocations
+FOR EACH ROW
+BEGIN
+    DECLARE v_hall INT;
+
+    SELECT hall_id INTO v_hall FROM seats WHERE seat_id = OLD.seat_id;
+    CALL bump_exam_hall_stats(OLD.exam_id, v_hall, -1, OLD.check_status, -1);
+END;
+//
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_stats_seat_delete;
+DELIMITER //
+CREATE TRIGGER trg_stats_seat_delete
+BEFORE DELETE ON seats
+FOR EACH ROW
+BEGIN
+    UPDATE exam_hall_stats ehs
+    LEFT JOIN (
+        SELECT a.exam_id, a.check_status AS status
+        FROM allocations a WHERE a.seat_id = OLD.seat_id
+    ) AS gone ON gone.exam_id = ehs.exam_id
+    SET ehs.seat_count = ehs.seat_count - 1,
+        ehs.allocated = ehs.allocated - (gone.exam_id IS NOT NULL),
+        ehs.checks_pending = ehs.checks_pending - IFNULL(gone.status = 'PENDING', 0),
+        ehs.checks_ok = ehs.checks_ok - IFNULL(gone.status = 'OK', 0),
+        ehs.checks_mismatch = ehs.checks_mismatch - IFNULL(gone.status = 'MISMATCH', 0),
+        ehs.checks_absent = ehs.checks_absent - IFNULL(gone.status = 'ABSENT', 0),
+        ehs.checks_other = ehs.checks_other - IFNULL(gone.status NOT IN ('PENDING', 'OK', 'MISMATCH', 'ABSENT'), 0)
+    WHERE ehs.hall_id = OLD.hall_id;
+END;
+//
+DELIMITER ;
+
+DROP FUNCTION IF EXISTS latest_check_status;
+
+DROP TRIGGER IF EXISTS trg_check_previous_status;
+DELIMITER //
+CREATE TRIGGER trg_check_previous_status
+BEFORE INSERT ON seat_checks
+FOR EACH ROW
+BEGIN
+    IF NEW.previous_status IS NULL THEN
+        SET NEW.previous_status = (SELECT check_status FROM allocations WHERE allocation_id = NEW.allocation_id);
+    END IF;
+END;
+//
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_check_set_status;
+DELIMITER //
+CREATE TRIGGER trg_check_set_status
+AFTER INSERT ON seat_checks
+FOR EACH ROW
+BEGIN
+    -- bulk writers set @bulk_seat_checks and CALL apply_check_block instead
+    IF IFNULL(@bulk_seat_checks, 0) = 0 THEN
+        UPDATE allocations
+        SET check_status = NEW.status, checked_by = NEW.checked_by,
+            checked_at = NEW.checked_at, check_remarks = NEW.remarks
+        WHERE allocation_id = NEW.allocation_id;
+    END IF;
+END;
+//
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_check_no_update;
+DELIMITER //
+CREATE TRIGGER trg_check_no_update
+BEFORE UPDATE ON seat_checks
+FOR EACH ROW
+BEGIN
+    SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'seat_checks is an append-only history; insert a new check instead';
+END;
+//
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_check_no_delete;
+DELIMITER //
+CREATE TRIGGER trg_check_no_delete
+BEFORE DELETE ON seat_checks
+FOR EACH ROW
+BEGIN
+    SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'seat_checks is an append-only history; delete the allocation instead';
+END;
+//
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS apply_check_block;
+DELIMITER //
+CREATE PROCEDURE apply_check_block(IN p_first_id INT, IN p_last_id INT)
+BEGIN
+    UPDATE exam_hall_stats ehs
+    JOIN (
+        SELECT a.exam_id, se.hall_id,
+               SUM(sc.status = 'PENDING') - SUM(a.check_status = 'PENDING') AS d_pending,
+               SUM(sc.status = 'OK') - SUM(a.check_status = 'OK') AS d_ok,
+               SUM(sc.status = 'MISMATCH') - SUM(a.check_status = 'MISMATCH') AS d_mismatch,
+               SUM(sc.status = 'ABSENT') - SUM(a.check_status = 'ABSENT') AS d_absent,
+               SUM(sc.status NOT IN ('PENDING', 'OK', 'MISMATCH', 'ABSENT'))
+                 - SUM(a.check_status NOT IN ('PENDING', 'OK', 'MISMATCH', 'ABSENT')) AS d_other
+        FROM seat_checks sc
+        JOIN allocations a ON a.allocation_id = sc.allocation_id
+        JOIN seats se ON se.seat_id = a.seat_id
+        WHERE sc.check_id BETWEEN p_first_id AND p_last_id
+        GROUP BY a.exam_id, se.hall_id
+    ) AS d ON d.exam_id = ehs.exam_id AND d.hall_id = ehs.hall_id
+    SET ehs.checks_pending = ehs.checks_pending + d.d_pending,
+        ehs.checks_ok = ehs.checks_ok + d.d_ok,
+        ehs.checks_mismatch = ehs.checks_mismatch + d.d_mismatch,
+        ehs.checks_absent = ehs.checks_absent + d.d_absent,
+        ehs.checks_other = ehs.checks_other + d.d_other;
+
+    UPDATE allocations a
+    JOIN seat_checks sc ON sc.allocation_id = a.allocation_id AND sc.check_id BETWEEN p_first_id AND p_last_id
+    SET a.check_status = sc.status, a.checked_by = sc.checked_by,
+        a.checked_at = sc.checked_at, a.check_remarks = sc.remarks;
+END;
+//
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS transition_hall_checks;
+DELIMITER //
+CREATE PROCEDURE transition_hall_checks(
+    IN p_exam_id INT,
+    IN p_hall_id INT,
+    IN p_from_status VARCHAR(20),
+    IN p_to_status VARCHAR(20),
+    IN p_checked_by INT,
+    IN p_remarks VARCHAR(255)
+)
+proc: BEGIN
+    DECLARE n INT DEFAULT 0;
+    DECLARE base_check_id INT DEFAULT 0;
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        SET @bulk_seat_checks = 0;
+        RESIGNAL;
+    END;
+
+    SELECT COUNT(*) INTO n
+    FROM allocations a JOIN seats se ON se.seat_id = a.seat_id
+    WHERE a.exam_id = p_exam_id AND se.hall_id = p_hall_id AND a.check_status = p_from_status;
+    IF n = 0 THEN
+        SELECT 0 AS transitioned;
+        LEAVE proc;
+    END IF;
+
+    CALL reserve_ids('seat_checks', n, base_check_id);
+    COMMIT;
+
+    SET @bulk_seat_checks = 1;
+    INSERT INTO seat_checks (check_id, allocation_id, checked_by, status, previous_status, remarks)
+    SELECT base_check_id - 1 + ROW_NUMBER() OVER (ORDER BY a.allocation_id),
+           a.allocation_id, p_checked_by, p_to_status, a.check_status, p_remarks
+    FROM allocations a JOIN seats se ON se.seat_id = a.seat_id
+    WHERE a.exam_id = p_exam_id AND se.hall_id = p_hall_id AND a.check_status = p_from_status
+    LIMIT n;
+    SET n = ROW_COUNT();
+    CALL apply_check_block(base_check_id, base_check_id + n - 1);
+    SET @bulk_seat_checks = 0;
+    SELECT n AS transitioned;
+END;
+//
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS auto_allocate_exam;
+DELIMITER //
+CREATE PROCEDURE auto_allocate_exam(IN p_exam_id INT)
+proc: BEGIN
+    DECLARE pending_students INT DEFAULT 0;
+    DECLARE free_seats INT DEFAULT 0;
+    DECLARE block_size INT DEFAULT 0;
+    DECLARE base_alloc_id INT DEFAULT 0;
+    DECLARE allocated INT DEFAULT 0;
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        SET @bulk_seat_checks = 0;
+        RESIGNAL;
+    END;
+
+    SELECT COUNT(*) INTO pending_students
+    FROM students s
+    LEFT JOIN allocations a ON a.exam_id = p_exam_id AND a.student_id = s.student_id
+    WHERE a.allocation_id IS NULL;
+
+    SELECT COUNT(*) INTO free_seats
+    FROM seats se
+    JOIN hall_assignments ha ON ha.hall_id = se.hall_id AND ha.exam_id = p_exam_id
+    LEFT JOIN allocations a ON a.exam_id = p_exam_id AND a.seat_id = se.seat_id
+    WHERE a.allocation_id IS NULL;
+
+    SET block_size = LEAST(pending_students, free_seats);
+    IF block_size = 0 THEN
+        SELECT 0 AS allocated_count;
+        LEAVE proc;
+    END IF;
+
+    -- ids of a block that ends up partly unused are skipped, never reused
+    CALL reserve_ids('allocations', block_size, base_alloc_id);
+    COMMIT;
+    SET base_alloc_id = base_alloc_id - 1;
+
+    SET @bulk_seat_checks = 1;
+
+    INSERT INTO allocations (allocation_id, exam_id, student_id, seat_id)
+    SELECT base_alloc_id + st.rn, p_exam_id, st.student_id, fs.seat_id
+    FROM (
+        SELECT s.student_id, ROW_NUMBER() OVER (ORDER BY s.student_id) AS rn
+        FROM students s
+        LEFT JOIN allocations a ON a.exam_id = p_exam_id AND a.student_id = s.student_id
+        WHERE a.allocation_id IS NULL
+    ) AS st
+    JOIN (
+        -- row-major seat order: row letters (A..Z, AA..), then seat number
+        SELECT se.seat_id, ROW_NUMBER() OVER (
+                   ORDER BY se.hall_id,
+                            CHAR_LENGTH(REGEXP_SUBSTR(se.seat_number, '^[A-Za-z]*')),
+                            REGEXP_SUBSTR(se.seat_number, '^[A-Za-z]*'),
+                            CAST(REGEXP_SUBSTR(se.seat_number, '[0-9]+$') AS UNSIGNED),
+                            se.seat_number) AS rn
+        FROM seats se
+        JOIN hall_assignments ha ON ha.hall_id = se.hall_id AND ha.exam_id = p_exam_id
+        LEFT JOIN allocations a ON a.exam_id = p_exam_id AND a.seat_id = se.seat_id
+        WHERE a.allocation_id IS NULL
+    ) AS fs ON fs.rn = st.rn
+    WHERE st.rn <= block_size;
+
+    SET allocated = ROW_COUNT();
+
+    IF allocated > 0 THEN
+        CALL apply_allocation_block_stats(base_alloc_id + 1, base_alloc_id + block_size);
+    END IF;
+
+    SET @bulk_seat_checks = 0;
+    SELECT allocated AS allocated_count;
+END;
+//
+DELIMITER ;
+
+CALL rebuild_exam_hall_stats(NULL);
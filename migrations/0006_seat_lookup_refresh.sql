@@ -0,0 +1,9 @@
+-- 0006: index for the seat-lookup index's incremental refresh, which reads
+-- the allocations of a session's exams written since an allocated_at
+-- watermark (new allocations, and moves: reallocate_exam now stamps
+-- allocated_at when it moves a student to another seat).
+--   before: a  type=ref    key=exam_id                     (every allocation of each exam)
+--   after:  a  type=range  key=idx_alloc_exam_allocated_at  (only the recent ones)
+
+ALTER TABLE allocations
+  ADD KEY idx_alloc_exam_allocated_at (exam_id, allocated_at);
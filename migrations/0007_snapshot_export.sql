@@ -0,0 +1,10 @@
+-- 0007: indexes for the incremental snapshot export (seat_allocator.snapshot),
+-- which reads the allocations allocated or checked since a watermark across
+-- all exams. The existing (exam_id, ...) keys cannot serve a range without
+-- an exam; one key per column lets MySQL merge the two ranges of the OR.
+--   before: allocations  type=ALL          key=NULL
+--   after:  allocations  type=index_merge  key=idx_alloc_allocated_at,idx_alloc_checked_at
+
+ALTER TABLE allocations
+  ADD KEY idx_alloc_allocated_at (allocated_at),
+  ADD KEY idx_alloc_checked_at (checked_at);
@@ -0,0 +1,197 @@
+"""
+Versioned schema migrations for the app database.
+
+Migrations are the files NNNN_description.sql next to this script, applied in
+version order. Each applied version is recorded in `schema_migrations`, so
+running the script again only applies what is new:
+
+    python migrations/migrate.py --password '...'            # apply pending
+    python migrations/migrate.py --password '...' --status   # list versions
+
+A database created from the current exam_seat_allocator.sql already records
+every version up to the one the script was written for. A database created
+from an older copy of the script has no `schema_migrations` table and gets
+every migration from 0001.
+
+Files may use `DELIMITER` lines like the schema script. MySQL commits DDL
+implicitly, so a migration that fails halfway is not rolled back: fix the
+cause, undo the statements that did run (the error names the failing one)
+and run the script again.
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import time
+
+import mysql.connector
+
+MIGRATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+MIGRATION_FILE_RE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+DELIMITER_RE = re.compile(r"^\s*DELIMITER\s+(\S+)\s*$", re.I)
+
+SCHEMA_MIGRATIONS_DDL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+  version INT PRIMARY KEY,
+  name VARCHAR(100) NOT NULL,
+  checksum CHAR(64),
+  duration_ms INT,
+  applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)"""
+
+
+def list_migrations(directory=MIGRATIONS_DIR):
+    """[(version, name, path, sha256 of the file)] for every migration file, in version order."""
+    found = []
+    for file_name in sorted(os.listdir(directory)):
+        m = MIGRATION_FILE_RE.match(file_name)
+        if not m:
+            continue
+        path = os.path.join(directory, file_name)
+        with open(path, "rb") as f:
+            checksum = hashlib.sha256(f.read()).hexdigest()
+        found.append((int(m.group(1)), m.group(2), path, checksum))
+    versions = [v for v, _, _, _ in found]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration versions in {directory}")
+    return found
+
+
+def split_statements(sql):
+    """
+    Split a script into statements, honouring `DELIMITER` lines. The delimiter
+    only ends a statement outside string literals, quoted identifiers and
+    comments (`--`, `#`, `/* */`); comment-only chunks are dropped.
+    """
+    statements, current, delimiter = [], [], ";"
+    quote, block_comment, has_code = None, False, False
+    for line in sql.splitlines():
+        m = DELIMITER_RE.match(line)
+        if m and quote is None and not block_comment:
+            delimiter = m.group(1)
+            continue
+        start = i = 0
+        while i < len(line):
+            if quote:
+                if line[i] == "\\" and quote != "`":
+                    i += 1
+                elif line[i] == quote:
+                    quote = None
+            elif block_comment:
+                if line.startswith("*/", i):
+                    block_comment, i = False, i + 1
+            elif line.startswith("/*", i):
+                block_comment, i = True, i + 1
+            elif line[i] == "#" or line.startswith("--", i) and line[i + 2:i + 3] in ("", " ", "\t"):
+                break
+            elif line.startswith(delimiter, i):
+                current.append(line[start:i])
+                if has_code:
+                    statements.append("\n".join(current).strip())
+                current, has_code = [], False
+                start = i = i + len(delimiter)
+                continue
+            elif not line[i].isspace():
+                has_code = True
+                if line[i] in "'\"`":
+                    quote = line[i]
+            i += 1
+        current.append(line[start:])
+    if has_code:
+        statements.append("\n".join(current).strip())
+    return statements
+
+
+def applied_versions(conn):
+    """{version: checksum} of the migrations recorded in the database (creates the table if missing)."""
+    cur = conn.cursor()
+    try:
+        cur.execute(SCHEMA_MIGRATIONS_DDL)
+        cur.execute("SELECT version, checksum FROM schema_migrations ORDER BY version")
+        return dict(cur.fetchall())
+    finally:
+        cur.close()
+
+
+def migration_status(conn, directory=MIGRATIONS_DIR):
+    """One dict per migration file: version, name, applied, and whether the file changed since."""
+    applied = applied_versions(conn)
+    return [{"version": version, "name": name, "applied": version in applied,
+             "changed": bool(applied.get(version)) and applied[version] != checksum}
+            for version, name, _, checksum in list_migrations(directory)]
+
+
+def apply_migration(conn, version, name, path, checksum):
+    """Run one migration file statement by statement and record it. Returns the time taken in ms."""
+    with open(path, encoding="utf-8") as f:
+        statements = split_statements(f.read())
+    started = time.perf_counter()
+    cur = conn.cursor()
+    try:
+        for i, statement in enumerate(statements, start=1):
+            try:
+                cur.execute(statement)
+                if cur.with_rows:
+                    cur.fetchall()
+                while cur.nextset():
+                    if cur.with_rows:
+                        cur.fetchall()
+            except mysql.connector.Error as e:
+                conn.rollback()
+                raise RuntimeError(f"Migration {version:04d}_{name} failed at statement {i} of "
+                                   f"{len(statements)}: {e}\n{statement[:300]}") from e
+        duration_ms = int((time.perf_counter() - started) * 1000)
+        cur.execute("INSERT INTO schema_migrations (version, name, checksum, duration_ms) VALUES (%s,%s,%s,%s)",
+                    (version, name, checksum, duration_ms))
+        conn.commit()
+    finally:
+        cur.close()
+    return duration_ms
+
+
+def migrate(conn, directory=MIGRATIONS_DIR, target=None, on_applied=None):
+    """
+    Apply every pending migration up to `target` (all when None), oldest
+    first, stopping at the first failure. Returns [(version, name, ms)].
+    """
+    applied = applied_versions(conn)
+    done = []
+    for version, name, path, checksum in list_migrations(directory):
+        if version in applied or (target is not None and version > target):
+            continue
+        ms = apply_migration(conn, version, name, path, checksum)
+        done.append((version, name, ms))
+        if on_applied:
+            on_applied(version, name, ms)
+    return done
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("DB_HOST", "localhost"))
+    parser.add_argument("--user", default=os.getenv("DB_USER", "root"))
+    parser.add_argument("--password", default=os.getenv("DB_PASSWORD", ""))
+    parser.add_argument("--database", default="exam_seat_allocator")
+    parser.add_argument("--target", type=int, help="apply up to and including this version")
+    parser.add_argument("--status", action="store_true", help="list migrations and exit")
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(host=args.host, user=args.user, password=args.password,
+                                   database=args.database, auth_plugin="mysql_native_password")
+    try:
+        if args.status:
+            for m in migration_status(conn):
+                state = "applied" if m["applied"] else "pending"
+                print(f"{m['version']:04d} {m['name']:<40} {state}{' (file changed since)' if m['changed'] else ''}")
+            return
+        done = migrate(conn, target=args.target,
+                       on_applied=lambda v, n, ms: print(f"applied {v:04d}_{n} in {ms} ms"))
+        if not done:
+            print("Database is up to date.")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
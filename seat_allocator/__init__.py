@@ -0,0 +1,39 @@
+"""
+Exam seat allocator core, usable without Streamlit: the connection layer
+(db), seat layouts (grid), the pure allocation engine (engine), loading and
+writing allocations (allocation), reporting, seat slips and door lists
+(slips), the in-memory seat lookup (lookup), Parquet snapshots for
+analytics (snapshot) and guarded ad-hoc queries (adhoc).
+`python -m seat_allocator` is the command line (cli).
+"""
+
+from .adhoc import AdhocResult, adhoc_cursor, check_select, explain_select, export_csv, export_snapshot_csv, \
+    snapshot_cursor
+from .allocation import allocate_with_rules, auto_allocate_exam, batch_allocate, commit_plan, insert_allocations, \
+    load_batch_inventory, load_exam_repair, load_exam_seating, plan_allocation, reallocate_exam, reserve_allocation_ids
+from .db import ConnectionPool, Database, POOL_CONFIG, config_from_env, reserve_id_block
+from .engine import ALLOCATION_RULES, AllocationPlan, AllocationRule, NoAdjacentSameCohort, ReserveAccessibleSeats, \
+    SpacedSeating, find_overlapping_exams, greedy_plan, inventory_fingerprint, make_rules, plan_batch_allocation, \
+    plan_reallocation, solve_allocation
+from .grid import HallGrid, load_hall_grid, parse_seat_number, row_label
+from .lookup import SeatIndex
+from .reporting import exam_summary, hall_allocations, render_seat_map_html
+from .slips import generate_slips, iter_slip_rows
+from .snapshot import export_snapshot, load_manifest, read_snapshot, snapshot_connection
+
+__all__ = [
+    "AdhocResult", "adhoc_cursor", "check_select", "explain_select", "export_csv", "export_snapshot_csv",
+    "snapshot_cursor",
+    "allocate_with_rules", "auto_allocate_exam", "batch_allocate", "commit_plan", "insert_allocations",
+    "load_batch_inventory", "load_exam_repair", "load_exam_seating", "plan_allocation", "reallocate_exam",
+    "reserve_allocation_ids",
+    "ConnectionPool", "Database", "POOL_CONFIG", "config_from_env", "reserve_id_block",
+    "ALLOCATION_RULES", "AllocationPlan", "AllocationRule", "NoAdjacentSameCohort", "ReserveAccessibleSeats",
+    "SpacedSeating", "find_overlapping_exams", "greedy_plan", "inventory_fingerprint", "make_rules",
+    "plan_batch_allocation", "plan_reallocation", "solve_allocation",
+    "HallGrid", "load_hall_grid", "parse_seat_number", "row_label",
+    "SeatIndex",
+    "exam_summary", "hall_allocations", "render_seat_map_html",
+    "generate_slips", "iter_slip_rows",
+    "export_snapshot", "load_manifest", "read_snapshot", "snapshot_connection",
+]
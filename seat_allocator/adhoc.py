@@ -0,0 +1,317 @@
+"""
+Guarded ad-hoc SELECTs for the query box: one read-only statement, costed
+with EXPLAIN before it runs, then run with a server-side time limit and a
+row cap and read through an unbuffered cursor a page at a time, so neither
+MySQL nor the caller materialises more than the rows actually shown.
+
+    sql = check_select(text)                 # ValueError unless one plain SELECT
+    plan = explain_select(db, sql)           # {"cost", "rows", "scans"}
+    with adhoc_cursor(db, sql) as result:
+        for rows in result.pages():
+            ...
+
+Leaving the with block before the last page kills the statement on the
+server (KILL QUERY from a separate connection) instead of reading the
+rest of its rows.
+
+snapshot_cursor does the same on a DuckDB connection to the Parquet
+snapshot (seat_allocator.snapshot), minus the EXPLAIN cost check. DuckDB
+has no statement timeout, so the query runs on a worker thread and is
+interrupted from the caller's thread.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+import csv
+import json
+import os
+import re
+import time
+
+import mysql.connector
+
+ADHOC_MAX_ROWS = int(os.getenv("ADHOC_MAX_ROWS", "1000"))
+ADHOC_EXPORT_MAX_ROWS = int(os.getenv("ADHOC_EXPORT_MAX_ROWS", "200000"))
+ADHOC_TIMEOUT_MS = int(os.getenv("ADHOC_TIMEOUT_MS", "10000"))
+# EXPLAIN query_cost above which a query is refused; a full scan of a few
+# million rows fits, a cross join of two large tables does not
+ADHOC_MAX_COST = float(os.getenv("ADHOC_MAX_COST", "5000000"))
+ADHOC_PAGE_ROWS = 500
+# how often a snapshot query's caller checks the time limit and calls on_wait
+SNAPSHOT_POLL_SECONDS = 0.25
+
+FIRST_KEYWORD_RE = re.compile(r"^[\s(]*(\w+)")
+# not stopped by a read-only transaction: file writes, and locking reads that
+# would block the invigilators' writes
+FORBIDDEN_RE = re.compile(r"\b(INTO|FOR\s+UPDATE|FOR\s+SHARE|LOCK\s+IN\s+SHARE\s+MODE)\b", re.I)
+TRAILING_LIMIT_RE = re.compile(r"\bLIMIT\s+(?:\d+\s*,\s*)?(?P<count>\d+)(?:\s+OFFSET\s+\d+)?\s*$", re.I)
+
+
+def _scan(sql):
+    """(sql without comments, the same with quoted text blanked out) for keyword checks that ignore literals."""
+    text, masked, i, n = [], [], 0, len(sql)
+    while i < n:
+        c = sql[i]
+        if c in "'\"`":
+            j = i + 1
+            while j < n and sql[j] != c:
+                j += 2 if sql[j] == "\\" and c != "`" else 1
+            if j >= n:
+                raise ValueError("Unterminated quoted string.")
+            text.append(sql[i:j + 1])
+            masked.append(c + " " * (j - i - 1) + c)
+            i = j + 1  # a doubled quote ('it''s') is two adjacent literals here; same characters either way
+        elif c == "#" or sql.startswith("-- ", i) or sql.startswith("--\n", i) or sql[i:] == "--":
+            j = sql.find("\n", i)
+            i = n if j < 0 else j
+            text.append(" ")
+            masked.append(" ")
+        elif sql.startswith("/*", i):
+            # also drops /*! ... */, which MySQL would execute
+            j = sql.find("*/", i + 2)
+            if j < 0:
+                raise ValueError("Unterminated comment.")
+            i = j + 2
+            text.append(" ")
+            masked.append(" ")
+        else:
+            text.append(c)
+            masked.append(c)
+            i += 1
+    return "".join(text), "".join(masked)
+
+
+def check_select(sql):
+    """
+    The statement without comments and trailing semicolons. ValueError
+    unless it is a single SELECT (or WITH ... SELECT) without INTO or a
+    locking clause; writes are refused by the read-only transaction anyway.
+    """
+    text, masked = _scan(sql)
+    text, masked = text.strip(), masked.strip()
+    while masked.endswith(";"):
+        text, masked = text[:-1].rstrip(), masked[:-1].rstrip()
+    if ";" in masked:
+        raise ValueError("Run one statement at a time.")
+    first = FIRST_KEYWORD_RE.match(masked)
+    if not first or first.group(1).upper() not in ("SELECT", "WITH"):
+        raise ValueError("Only SELECT queries are allowed here.")
+    forbidden = FORBIDDEN_RE.search(masked)
+    if forbidden:
+        raise ValueError(f"{' '.join(forbidden.group(1).upper().split())} is not allowed in ad-hoc queries.")
+    return text
+
+
+def with_limit(sql, limit):
+    """`sql` returning at most `limit` rows: its own trailing LIMIT lowered to `limit`, or LIMIT `limit` appended."""
+    m = TRAILING_LIMIT_RE.search(_scan(sql)[1])
+    if not m:
+        return f"{sql}\nLIMIT {int(limit)}"
+    if int(m.group("count")) <= limit:
+        return sql
+    return sql[:m.start("count")] + str(int(limit)) + sql[m.end("count"):]
+
+
+def _walk(node):
+    if isinstance(node, dict):
+        yield node
+        for value in node.values():
+            yield from _walk(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _walk(value)
+
+
+def explain_select(db, sql):
+    """
+    Optimizer estimate of a checked SELECT from EXPLAIN FORMAT=JSON: total
+    query cost, rows the largest join step produces, and the tables it
+    reads with a full scan as (table, rows per scan).
+    """
+    with db.connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute("EXPLAIN FORMAT=JSON " + sql)
+            plan = json.loads(cur.fetchone()[0])
+        finally:
+            cur.close()
+    nodes = list(_walk(plan))
+    cost = plan.get("query_block", {}).get("cost_info", {}).get("query_cost")
+    if cost is None:  # UNION: no total, add up its blocks
+        cost = sum(float(n["cost_info"]["query_cost"]) for n in nodes
+                   if isinstance(n.get("cost_info"), dict) and "query_cost" in n["cost_info"])
+    tables = [n for n in nodes if "access_type" in n]
+    return {
+        "cost": float(cost),
+        "rows": int(max((n.get("rows_produced_per_join", 0) for n in tables), default=0)),
+        "scans": [(n.get("table_name"), n.get("rows_examined_per_scan", 0)) for n in tables
+                  if n["access_type"] == "ALL"],
+    }
+
+
+def kill_query(db, connection_id):
+    """
+    Stop the statement running on another connection; the connection itself
+    stays open. Connects outside the pool: the caller holds the pooled
+    connection running the statement, and may hold the last free one.
+    """
+    conn = mysql.connector.connect(**db.pool.config)
+    try:
+        cur = conn.cursor()
+        try:
+            cur.execute(f"KILL QUERY {int(connection_id)}")
+        finally:
+            cur.close()
+    finally:
+        conn.close()
+
+
+class AdhocResult:
+    """Columns and pages of a running ad-hoc query. `truncated` tells, after the last page, whether rows were cut."""
+
+    def __init__(self, cursor, max_rows):
+        self._cur = cursor
+        self.max_rows = max_rows
+        self.columns = list(cursor.column_names)
+        self.rows = 0
+        self.truncated = False
+        self.done = False
+
+    def pages(self, page_rows=ADHOC_PAGE_ROWS):
+        """Yield lists of row tuples, at most `page_rows` each and `max_rows` in all."""
+        while self.rows < self.max_rows:
+            rows = self._cur.fetchmany(min(page_rows, self.max_rows - self.rows))
+            if not rows:
+                break
+            self.rows += len(rows)
+            yield rows
+        else:
+            # the query was run with LIMIT max_rows + 1: one more row means there were more
+            self.truncated = bool(self._cur.fetchmany(1))
+        self.done = True
+
+
+@contextmanager
+def adhoc_cursor(db, sql, max_rows=ADHOC_MAX_ROWS, timeout_ms=ADHOC_TIMEOUT_MS):
+    """
+    Run a checked SELECT in a read-only transaction on its own pooled
+    connection, limited to `max_rows` and to `timeout_ms` of execution
+    (max_execution_time), and yield an AdhocResult to page through.
+    """
+    with db.connection() as conn:
+        cur = conn.cursor()
+        result = None
+        try:
+            cur.execute("SET SESSION max_execution_time = %s", (int(timeout_ms),))
+            cur.execute("START TRANSACTION READ ONLY")
+            cur.execute(with_limit(sql, max_rows + 1))
+            result = AdhocResult(cur, max_rows)
+            yield result
+        finally:
+            if conn.unread_result:
+                if not (result and result.done):
+                    try:
+                        kill_query(db, conn.connection_id)  # stopped early: don't wait for the rest
+                    except mysql.connector.Error:
+                        pass  # could not connect: consume_results reads the rest instead
+                try:
+                    conn.consume_results()
+                except mysql.connector.Error:
+                    pass  # "query execution was interrupted"
+            cur.close()
+            conn.rollback()
+            reset = conn.cursor()
+            try:
+                reset.execute("SET SESSION max_execution_time = DEFAULT")
+            finally:
+                reset.close()
+
+
+class SnapshotCursor:
+    """
+    The column_names/fetchmany side of a cursor, for AdhocResult, over a
+    query on a DuckDB cursor. The query and each fetch run on a worker
+    thread while the caller waits. The caller interrupts the query when
+    `timeout_ms` have passed since it started (TimeoutError) or when
+    `on_wait(seconds running)`, called every SNAPSHOT_POLL_SECONDS of
+    waiting, raises.
+    """
+
+    def __init__(self, cur, sql, timeout_ms=ADHOC_TIMEOUT_MS, on_wait=None):
+        self._cur = cur
+        self._on_wait = on_wait
+        self._timeout_ms = timeout_ms
+        self._started = time.monotonic()
+        self._deadline = self._started + timeout_ms / 1000
+        self._worker = ThreadPoolExecutor(1, thread_name_prefix="adhoc-snapshot")
+        try:
+            self._wait(cur.execute, sql)
+        except BaseException:
+            self.close()
+            raise
+        self.column_names = [d[0] for d in cur.description]
+
+    def _wait(self, fn, *args):
+        future = self._worker.submit(fn, *args)
+        try:
+            while True:
+                left = self._deadline - time.monotonic()
+                if left <= 0:
+                    raise TimeoutError(f"Query stopped after {self._timeout_ms / 1000:g}s.")
+                try:
+                    return future.result(timeout=min(left, SNAPSHOT_POLL_SECONDS))
+                except FutureTimeout:
+                    if self._on_wait:
+                        self._on_wait(time.monotonic() - self._started)
+        except BaseException:
+            if not future.done():
+                self._cur.interrupt()
+                future.exception()  # the worker returns as soon as DuckDB sees the interrupt
+            raise
+
+    def fetchmany(self, size):
+        return self._wait(self._cur.fetchmany, size)
+
+    def close(self):
+        self._worker.shutdown(wait=False)
+
+
+@contextmanager
+def snapshot_cursor(con, sql, max_rows=ADHOC_MAX_ROWS, timeout_ms=ADHOC_TIMEOUT_MS, on_wait=None):
+    """
+    Run a checked SELECT on a DuckDB connection (snapshot_connection, which
+    can only read the snapshot's files) on a cursor of its own, limited to
+    `max_rows` and to `timeout_ms` from the start of the query, and yield an
+    AdhocResult to page through. DuckDB streams the result, so rows are only
+    computed as pages are read. `on_wait` as for SnapshotCursor.
+    """
+    cur = con.cursor()
+    reader = None
+    try:
+        reader = SnapshotCursor(cur, with_limit(sql, max_rows + 1), timeout_ms, on_wait)
+        yield AdhocResult(reader, max_rows)
+    finally:
+        if reader:
+            reader.close()
+        cur.close()
+
+
+def _write_csv(result, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(result.columns)
+        for rows in result.pages(ADHOC_PAGE_ROWS * 10):
+            writer.writerows(rows)
+    return result.rows, result.truncated
+
+
+def export_csv(db, sql, path, max_rows=ADHOC_EXPORT_MAX_ROWS, timeout_ms=ADHOC_TIMEOUT_MS):
+    """Write the result of a checked SELECT to a CSV file page by page; returns (rows written, truncated)."""
+    with adhoc_cursor(db, sql, max_rows, timeout_ms) as result:
+        return _write_csv(result, path)
+
+
+def export_snapshot_csv(con, sql, path, max_rows=ADHOC_EXPORT_MAX_ROWS, timeout_ms=ADHOC_TIMEOUT_MS, on_wait=None):
+    """export_csv for a query on a DuckDB snapshot connection (see snapshot_cursor)."""
+    with snapshot_cursor(con, sql, max_rows, timeout_ms, on_wait) as result:
+        return _write_csv(result, path)
@@ -0,0 +1,241 @@
+"""
+Database side of allocation: loads the inventory the engine plans over and
+writes plans back in one transaction per call. Every function takes the
+Database first; `get_grid(hall_id)` defaults to reading the hall's layout,
+and the app passes its cached get_hall_grid instead.
+"""
+
+from .engine import greedy_plan, inventory_fingerprint, make_rules, plan_batch_allocation, plan_reallocation, \
+    solve_allocation
+from .grid import SEAT_ORDER_SQL, load_hall_grid
+
+# Anti-joins instead of NOT IN: allocations.student_id is nullable, and a
+# single NULL makes "student_id NOT IN (...)" match nothing.
+Q_UNALLOCATED_STUDENTS = """
+    SELECT s.student_id FROM students s
+    LEFT JOIN allocations a ON a.exam_id = %s AND a.student_id = s.student_id
+    WHERE a.allocation_id IS NULL
+    ORDER BY s.student_id
+"""
+Q_FREE_SEATS = """
+    SELECT se.seat_id, se.hall_id, se.seat_number FROM seats se
+    JOIN hall_assignments ha ON ha.hall_id = se.hall_id AND ha.exam_id = %s
+    LEFT JOIN allocations a ON a.exam_id = %s AND a.seat_id = se.seat_id
+    WHERE a.allocation_id IS NULL
+    ORDER BY se.hall_id, """ + SEAT_ORDER_SQL
+
+
+def _grid_loader(db, get_grid):
+    return get_grid or (lambda hall_id: load_hall_grid(db, hall_id))
+
+
+def reserve_allocation_ids(db, rows):
+    """
+    First id of a block of allocation ids for `rows`, or None when there are
+    none. Reserve before checking out the connection the rows are inserted
+    on: reserve_ids needs a pooled connection of its own.
+    """
+    return db.reserve_ids("allocations", len(rows)) if rows else None
+
+
+def insert_allocations(conn, rows, first_id):
+    """
+    Bulk-insert (exam_id, student_id, seat_id) rows on `conn` without committing,
+    as allocation ids first_id, first_id + 1, ... in row order (a block from
+    reserve_allocation_ids). New allocations start PENDING
+    (allocations.check_status) and the exam_hall_stats counts are written with
+    one set-based statement instead of per-row trigger work.
+    Returns first_id, or None when there are no rows.
+    """
+    if not rows:
+        return None
+    base_alloc_id = first_id - 1
+    cur = conn.cursor()
+    try:
+        cur.execute("SET @bulk_seat_checks = 1")
+        params = [(base_alloc_id + i, exam_id, student_id, seat_id)
+                  for i, (exam_id, student_id, seat_id) in enumerate(rows, start=1)]
+        for i in range(0, len(params), 1000):
+            cur.executemany("INSERT INTO allocations (allocation_id, exam_id, student_id, seat_id) VALUES (%s,%s,%s,%s)",
+                            params[i:i+1000])
+        cur.execute("CALL apply_allocation_block_stats(%s, %s)", (base_alloc_id + 1, base_alloc_id + len(rows)))
+        return base_alloc_id + 1
+    finally:
+        cur.execute("SET @bulk_seat_checks = 0")
+        cur.close()
+
+
+# ---------- GREEDY PLAN ----------
+def _plan_inventory(cur, exam_id):
+    """Unallocated student ids and free seats (seat_id, hall_id, seat_number) of an exam, in allocation order."""
+    cur.execute(Q_UNALLOCATED_STUDENTS, (exam_id,))
+    students = [r[0] for r in cur.fetchall()]
+    cur.execute(Q_FREE_SEATS, (exam_id, exam_id))
+    return students, cur.fetchall()
+
+
+def plan_allocation(db, exam_id):
+    """Greedy plan for one exam (same pairing as the auto_allocate_exam procedure), without writing anything."""
+    with db.connection() as conn:
+        cur = conn.cursor()
+        try:
+            students, seats = _plan_inventory(cur, exam_id)
+        finally:
+            cur.close()
+        conn.rollback()
+    return greedy_plan(exam_id, students, seats)
+
+
+def commit_plan(db, plan):
+    """
+    Write exactly `plan` in one transaction. The inventory is re-read in the
+    same transaction first; if its fingerprint differs from the plan's,
+    nothing is written and ValueError asks for a new plan.
+    """
+    if not len(plan):
+        return 0
+    rows = plan.rows()
+    first_id = reserve_allocation_ids(db, rows)  # skipped if the plan turns out stale
+    with db.connection() as conn:
+        cur = conn.cursor()
+        try:
+            students, seats = _plan_inventory(cur, plan.exam_id)
+        finally:
+            cur.close()
+        if inventory_fingerprint(plan.exam_id, students, [s[0] for s in seats]) != plan.fingerprint:
+            conn.rollback()
+            raise ValueError("Students, seats or allocations of this exam changed since the plan was made; plan again.")
+        insert_allocations(conn, rows, first_id)
+        conn.commit()
+    return len(plan)
+
+
+def auto_allocate_exam(db, exam_id):
+    """
+    Allocate every unallocated student to a free seat for `exam_id` with the
+    set-based `auto_allocate_exam` procedure (bulk seat checks). The procedure
+    commits its id block on entry and the insert in one transaction after it;
+    db.execute runs it on a connection of its own, with nothing else open.
+    Returns the number of allocations created.
+    """
+    result = db.execute("CALL auto_allocate_exam(%s)", (exam_id,))
+    return int(result[0][0]) if result else 0
+
+
+# ---------- CONSTRAINT-AWARE ALLOCATION ----------
+def load_exam_seating(db, exam_id, get_grid=None):
+    """Unallocated students, the HallGrid of each hall assigned to the exam and the already-occupied seats."""
+    get_grid = _grid_loader(db, get_grid)
+    students = db.select("""SELECT s.student_id, s.department, s.year_of_study, s.needs_accessible_seat
+                            FROM students s
+                            LEFT JOIN allocations a ON a.exam_id = %s AND a.student_id = s.student_id
+                            WHERE a.allocation_id IS NULL""", params=(exam_id,))
+    halls = db.select("SELECT hall_id FROM hall_assignments WHERE exam_id = %s ORDER BY hall_id", params=(exam_id,))
+    grids = [get_grid(h) for h in halls["hall_id"]]
+    taken = db.select("""SELECT a.seat_id, s.student_id, s.department, s.year_of_study, s.needs_accessible_seat
+                         FROM allocations a LEFT JOIN students s ON s.student_id = a.student_id
+                         WHERE a.exam_id = %s""", params=(exam_id,))
+    occupied = {rec["seat_id"]: rec for rec in taken.to_dict("records")}
+    return students, grids, occupied
+
+
+def allocate_with_rules(db, exam_id, rule_keys, dry_run=False, get_grid=None):
+    """Constraint-aware allocation for one exam; writes in one transaction unless `dry_run`."""
+    rules = make_rules(rule_keys)
+    students, grids, occupied = load_exam_seating(db, exam_id, get_grid)
+    result = solve_allocation(students, grids, rules, occupied)
+    if not dry_run and result["pairs"]:
+        rows = [(exam_id, student_id, seat_id) for student_id, seat_id in result["pairs"]]
+        first_id = reserve_allocation_ids(db, rows)
+        with db.connection() as conn:
+            insert_allocations(conn, rows, first_id)
+            conn.commit()
+    return result
+
+
+# ---------- BATCH ALLOCATION (DATE RANGE) ----------
+def load_batch_inventory(db, date_from, date_to, get_grid=None):
+    """Load exams, hall assignments, allocations and students for a date range, plus the hall grids."""
+    get_grid = _grid_loader(db, get_grid)
+    rng = (date_from, date_to)
+    inv = {
+        "exams": db.select("""SELECT exam_id, course_code, exam_date, start_time, end_time FROM exams
+                              WHERE exam_date BETWEEN %s AND %s
+                              ORDER BY exam_date, start_time, exam_id""", params=rng),
+        "hall_assignments": db.select("""SELECT ha.exam_id, ha.hall_id FROM hall_assignments ha
+                                         JOIN exams e ON e.exam_id = ha.exam_id
+                                         WHERE e.exam_date BETWEEN %s AND %s
+                                         ORDER BY ha.exam_id, ha.hall_id""", params=rng),
+        "allocations": db.select("""SELECT a.exam_id, a.student_id, a.seat_id FROM allocations a
+                                    JOIN exams e ON e.exam_id = a.exam_id
+                                    WHERE e.exam_date BETWEEN %s AND %s""", params=rng),
+        "students": db.select("SELECT student_id FROM students ORDER BY student_id"),
+    }
+    inv["grids"] = {h: get_grid(h) for h in sorted(inv["hall_assignments"]["hall_id"].unique())}
+    return inv
+
+
+def batch_allocate(db, date_from, date_to, dry_run=False, get_grid=None):
+    """
+    Allocate every exam with exam_date in [date_from, date_to] in one pass and,
+    unless `dry_run`, write all allocations in a single transaction. If another
+    writer allocates in between, the unique constraints abort the whole batch.
+    """
+    plan = plan_batch_allocation(load_batch_inventory(db, date_from, date_to, get_grid))
+    if not dry_run and plan["rows"]:
+        first_id = reserve_allocation_ids(db, plan["rows"])
+        with db.connection() as conn:
+            insert_allocations(conn, plan["rows"], first_id)
+            conn.commit()
+    return plan
+
+
+# ---------- INCREMENTAL RE-ALLOCATION ----------
+def load_exam_repair(db, exam_id, get_grid=None):
+    """Current allocations of an exam (with seat and student), its unallocated students and the grids of its halls."""
+    get_grid = _grid_loader(db, get_grid)
+    allocs = db.select("""SELECT a.allocation_id, a.seat_id, se.hall_id, se.seat_number,
+                                 a.student_id, s.srn, s.department, s.year_of_study, s.needs_accessible_seat
+                          FROM allocations a
+                          JOIN seats se ON se.seat_id = a.seat_id
+                          LEFT JOIN students s ON s.student_id = a.student_id
+                          WHERE a.exam_id = %s""", params=(exam_id,))
+    students = db.select("""SELECT s.student_id, s.srn, s.department, s.year_of_study, s.needs_accessible_seat
+                            FROM students s
+                            LEFT JOIN allocations a ON a.exam_id = %s AND a.student_id = s.student_id
+                            WHERE a.allocation_id IS NULL""", params=(exam_id,))
+    halls = db.select("SELECT hall_id FROM hall_assignments WHERE exam_id = %s ORDER BY hall_id", params=(exam_id,))
+    grids = [get_grid(h) for h in halls["hall_id"]]
+    return allocs, students, grids
+
+
+def reallocate_exam(db, exam_id, rule_keys=(), dry_run=False, get_grid=None):
+    """
+    Repair the seating of one exam after seats, hall assignments or students
+    changed (see plan_reallocation) and, unless `dry_run`, apply releases,
+    moves and new allocations in one transaction. Moved allocations keep
+    their allocation_id and seat-check history. If another writer takes one
+    of the planned seats in between, the unique constraints abort the batch.
+    """
+    rules = make_rules(rule_keys)
+    plan = plan_reallocation(*load_exam_repair(db, exam_id, get_grid), rules)
+    if dry_run or not (plan["moves"] or plan["adds"] or plan["releases"]):
+        return plan
+    adds = [(exam_id, int(student_id), int(seat_id)) for student_id, seat_id in plan["adds"]]
+    first_id = reserve_allocation_ids(db, adds)
+    with db.connection() as conn:
+        cur = conn.cursor()
+        try:
+            if plan["releases"]:
+                cur.execute("DELETE FROM allocations WHERE allocation_id IN (%s)" % ",".join(["%s"] * len(plan["releases"])),
+                            tuple(int(a) for a in plan["releases"]))
+            if plan["moves"]:
+                # allocated_at marks the move for incremental readers (seat lookup)
+                cur.executemany("UPDATE allocations SET seat_id = %s, allocated_at = CURRENT_TIMESTAMP "
+                                "WHERE allocation_id = %s",
+                                [(int(seat_id), int(allocation_id)) for allocation_id, seat_id in plan["moves"]])
+        finally:
+            cur.close()
+        insert_allocations(conn, adds, first_id)
+        conn.commit()
+    return plan
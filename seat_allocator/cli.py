@@ -0,0 +1,211 @@
+"""
+Command line for allocation jobs, without the Streamlit app:
+
+    python -m seat_allocator allocate --exam 12 --dry-run
+    python -m seat_allocator allocate --exam 12 --rules mix_cohorts accessible
+    python -m seat_allocator allocate --from 2030-01-01 --to 2030-01-05
+    python -m seat_allocator repair --exam 12 --rules accessible
+    python -m seat_allocator report --exam 12
+    python -m seat_allocator report --exam 12 --hall 3 --html hall3.html
+    python -m seat_allocator slips --from 2030-01-01 --to 2030-01-05 --out slips/
+    python -m seat_allocator lookup-server --from 2030-01-01 --port 8502
+    python -m seat_allocator snapshot --out snapshots/ [--full]
+
+Connection settings come from DB_HOST, DB_USER, DB_PASSWORD and DB_NAME (or
+--host, --user, --password, --database). Tables are printed as text; --csv
+writes them to a file instead. The exit status is 1 on a database error.
+"""
+
+import argparse
+import datetime
+import sys
+import time
+
+import mysql.connector
+
+from .allocation import allocate_with_rules, auto_allocate_exam, batch_allocate, plan_allocation, reallocate_exam
+from .db import Database, config_from_env
+from .engine import ALLOCATION_RULES
+from .grid import load_hall_grid
+from .lookup import LOOKUP_REFRESH_SECONDS, SeatIndex, serve
+from .reporting import exam_summary, hall_allocations, render_seat_map_html
+from .slips import generate_slips
+from .snapshot import export_snapshot
+
+
+def _date(text):
+    try:
+        return datetime.date.fromisoformat(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a YYYY-MM-DD date: {text}")
+
+
+def _show(df, csv=None):
+    if csv:
+        df.to_csv(csv, index=False)
+        print(f"{len(df)} rows written to {csv}")
+    elif df.empty:
+        print("(no rows)")
+    else:
+        print(df.to_string(index=False))
+
+
+def cmd_allocate(db, args):
+    if args.exam is None:
+        if args.rules:
+            raise SystemExit("--rules applies to a single --exam")
+        plan = batch_allocate(db, args.date_from, args.date_to, dry_run=args.dry_run)
+        verb = "Would allocate" if args.dry_run else "Allocated"
+        print(f"{verb} {len(plan['rows'])} seats across {len(plan['summary'])} exams.")
+        _show(plan["summary"], args.csv)
+        if not plan["clashes"].empty:
+            print("\nOverlapping exams:")
+            _show(plan["clashes"])
+        return 0
+    if args.rules:
+        result = allocate_with_rules(db, args.exam, args.rules, dry_run=args.dry_run)
+        verb = "Would allocate" if args.dry_run else "Allocated"
+        print(f"{verb} {len(result['pairs'])} students; {len(result['unplaced'])} left unplaced, "
+              f"{result['left_empty']} usable seats left empty by the rules.")
+        return 0
+    if not args.dry_run:
+        print(f"Allocated {auto_allocate_exam(db, args.exam)} students.")
+        return 0
+    plan = plan_allocation(db, args.exam)
+    print(f"Plan {plan.fingerprint}: allocates {len(plan)} students, {plan.unplaced} left without a seat.")
+    _show(plan.hall_diff(), args.csv)
+    return 0
+
+
+def cmd_repair(db, args):
+    plan = reallocate_exam(db, args.exam, args.rules or (), dry_run=args.dry_run)
+    counts = plan["diff"]["action"].value_counts().to_dict() if not plan["diff"].empty else {}
+    summary = ", ".join(f"{n} {a}" for a, n in sorted(counts.items())) or "nothing to change"
+    print(f"{'Plan' if args.dry_run else 'Applied'}: {summary}.")
+    if not plan["diff"].empty:
+        _show(plan["diff"], args.csv)
+    return 0
+
+
+def cmd_report(db, args):
+    if args.hall is None:
+        if args.html:
+            raise SystemExit("--html needs --hall")
+        _show(exam_summary(db, args.exam), args.csv)
+        return 0
+    allocs = hall_allocations(db, args.exam, args.hall)
+    if args.html:
+        grid = load_hall_grid(db, args.hall)
+        if not len(grid):
+            raise SystemExit(f"Hall {args.hall} has no seats.")
+        with open(args.html, "w", encoding="utf-8") as f:
+            f.write(render_seat_map_html(grid, allocs, args.colour_by))
+        print(f"Seat map of hall {args.hall} ({len(grid)} seats, {len(allocs)} allocated) written to {args.html}")
+    else:
+        _show(allocs, args.csv)
+    return 0
+
+
+def cmd_slips(db, args):
+    started = time.perf_counter()
+    counts = generate_slips(db, args.out, args.exam, args.date_from, args.date_to, args.format, args.workers)
+    print(f"{counts['slips']} seat slips in {counts['halls']} exam x hall door lists, {counts['pdf_pages']} PDF pages "
+          f"written to {args.out} in {time.perf_counter() - started:.1f}s.")
+    return 0
+
+
+def cmd_lookup_server(db, args):
+    started = time.perf_counter()
+    index = SeatIndex(db, args.date_from, args.date_to)
+    stats = index.stats()
+    print(f"Indexed {stats['allocations']} seats of {stats['students']} students in {stats['exams']} exams "
+          f"in {time.perf_counter() - started:.1f}s; serving http://{args.bind}:{args.port}/seat?srn=...")
+    serve(index, args.bind, args.port, args.refresh)
+    return 0
+
+
+def cmd_snapshot(db, args):
+    started = time.perf_counter()
+    manifest = export_snapshot(db, args.out, full=args.full)
+    rows = ", ".join(f"{table} {n}" for table, n in manifest["exported"].items())
+    print(f"{'Full' if manifest['full'] else 'Incremental'} snapshot {manifest['seq']} (as of {manifest['watermark']}) "
+          f"written to {args.out} in {time.perf_counter() - started:.1f}s; rows: {rows}.")
+    return 0
+
+
+def build_parser():
+    env = config_from_env()
+    parser = argparse.ArgumentParser(prog="python -m seat_allocator", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=env["host"])
+    parser.add_argument("--user", default=env["user"])
+    parser.add_argument("--password", default=env["password"])
+    parser.add_argument("--database", default=env["database"])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    allocate = commands.add_parser("allocate", help="allocate one exam, or every exam in a date range")
+    target = allocate.add_mutually_exclusive_group(required=True)
+    target.add_argument("--exam", type=int)
+    target.add_argument("--from", dest="date_from", type=_date, help="first exam_date (YYYY-MM-DD)")
+    allocate.add_argument("--to", dest="date_to", type=_date, help="last exam_date (default: --from)")
+    allocate.add_argument("--rules", nargs="+", choices=list(ALLOCATION_RULES),
+                          help="constraint-aware allocation with these rules")
+    allocate.add_argument("--dry-run", action="store_true", help="plan and print, write nothing")
+    allocate.add_argument("--csv", help="write the per-hall (or per-exam) table to this file")
+    allocate.set_defaults(run=cmd_allocate)
+
+    repair = commands.add_parser("repair", help="re-seat the students of an exam after seats, halls or students changed")
+    repair.add_argument("--exam", type=int, required=True)
+    repair.add_argument("--rules", nargs="+", choices=list(ALLOCATION_RULES))
+    repair.add_argument("--dry-run", action="store_true")
+    repair.add_argument("--csv", help="write the diff to this file")
+    repair.set_defaults(run=cmd_repair)
+
+    report = commands.add_parser("report", help="per-hall summary of an exam, or the allocations of one hall")
+    report.add_argument("--exam", type=int, required=True)
+    report.add_argument("--hall", type=int)
+    report.add_argument("--html", help="write the seat map of --hall to this file")
+    report.add_argument("--colour-by", choices=["Allocation", "Seat check"], default="Allocation")
+    report.add_argument("--csv", help="write the table to this file")
+    report.set_defaults(run=cmd_report)
+
+    slips = commands.add_parser("slips", help="seat slips and hall door lists of an exam or a date range")
+    target = slips.add_mutually_exclusive_group(required=True)
+    target.add_argument("--exam", type=int)
+    target.add_argument("--from", dest="date_from", type=_date, help="first exam_date (YYYY-MM-DD)")
+    slips.add_argument("--to", dest="date_to", type=_date, help="last exam_date (default: --from)")
+    slips.add_argument("--out", required=True, help="directory for the CSV and PDF files")
+    slips.add_argument("--format", nargs="+", choices=["csv", "pdf"], default=["csv", "pdf"])
+    slips.add_argument("--workers", type=int, help="PDF rendering processes (default: one per CPU, 0: none)")
+    slips.set_defaults(run=cmd_slips)
+
+    lookup = commands.add_parser("lookup-server", help="serve seat lookups of an exam session from memory over HTTP")
+    lookup.add_argument("--from", dest="date_from", type=_date, default=datetime.date.today(),
+                        help="first exam_date of the session (default: today)")
+    lookup.add_argument("--to", dest="date_to", type=_date, help="last exam_date (default: --from)")
+    lookup.add_argument("--bind", default="127.0.0.1")
+    lookup.add_argument("--port", type=int, default=8502)
+    lookup.add_argument("--refresh", type=float, default=LOOKUP_REFRESH_SECONDS, help="seconds between refreshes")
+    lookup.set_defaults(run=cmd_lookup_server)
+
+    snapshot = commands.add_parser("snapshot", help="export the allocation tables to Parquet for analytics")
+    snapshot.add_argument("--out", required=True, help="snapshot directory (incremental when it has one already)")
+    snapshot.add_argument("--full", action="store_true", help="export every row, dropping older files")
+    snapshot.set_defaults(run=cmd_snapshot)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if getattr(args, "date_from", None) and args.date_to is None:
+        args.date_to = args.date_from
+    config = {**config_from_env(), "host": args.host, "user": args.user, "password": args.password,
+              "database": args.database}
+    db = Database(config, {"size": 2, "timeout": 30.0, "ping_after": 30.0, "recycle_after": 1800.0})
+    try:
+        return args.run(db, args)
+    except mysql.connector.Error as e:
+        print(f"Database error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        db.pool.close()
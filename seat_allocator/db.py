@@ -0,0 +1,272 @@
+"""
+Connection layer: a pooled MySQL connection per call, with no Streamlit in
+sight. The app wraps a Database in its own error display and query cache;
+the CLI and batch jobs use it directly.
+"""
+
+from contextlib import contextmanager
+import os
+import queue
+import threading
+import time
+
+import mysql.connector
+import pandas as pd
+
+POOL_CONFIG = {
+    "size": int(os.getenv("DB_POOL_SIZE", "8")),
+    "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+    "ping_after": float(os.getenv("DB_POOL_PING_AFTER", "30")),
+    "recycle_after": float(os.getenv("DB_POOL_RECYCLE_AFTER", "1800")),
+}
+
+
+def config_from_env():
+    """Connection settings from DB_HOST, DB_USER, DB_PASSWORD and DB_NAME (same defaults as the scripts)."""
+    return {
+        "host": os.getenv("DB_HOST", "localhost"),
+        "user": os.getenv("DB_USER", "root"),
+        "password": os.getenv("DB_PASSWORD", ""),
+        "database": os.getenv("DB_NAME", "exam_seat_allocator"),
+        "auth_plugin": "mysql_native_password",
+    }
+
+
+class ConnectionPool:
+    """
+    Process-wide pool of MySQL connections shared by every thread (every
+    Streamlit session in the app).
+    At most `size` connections are open at once; callers wait up to `timeout`
+    seconds for a free one. Idle connections are pinged before reuse and
+    replaced when they are stale or older than `recycle_after` seconds.
+    """
+
+    def __init__(self, config, size=8, timeout=10.0, ping_after=30.0, recycle_after=1800.0):
+        self.config = dict(config)
+        self.size = size
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self.recycle_after = recycle_after
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = queue.LifoQueue()  # (conn, created_at, last_used)
+        self._born = {}                 # id(conn) -> created_at for checked-out connections
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {
+                "checkouts": 0,
+                "connections_opened": 0,
+                "reconnects": 0,
+                "recycled": 0,
+                "discarded": 0,
+                "exhaustion_events": 0,
+                "timeouts": 0,
+                "wait_time_total_ms": 0.0,
+                "wait_time_max_ms": 0.0,
+                "in_use_peak": 0,
+            }
+
+    def _bump(self, key, n=1):
+        with self._lock:
+            self.stats[key] += n
+
+    def _open(self):
+        conn = mysql.connector.connect(**self.config)
+        self._bump("connections_opened")
+        return conn, time.monotonic()
+
+    def _healthy(self, conn, created_at, last_used):
+        now = time.monotonic()
+        if now - created_at > self.recycle_after:
+            self._bump("recycled")
+            return False
+        if now - last_used > self.ping_after:
+            try:
+                conn.ping(reconnect=False)
+            except mysql.connector.Error:
+                self._bump("reconnects")
+                return False
+        return True
+
+    def checkout(self):
+        started = time.monotonic()
+        if not self._slots.acquire(blocking=False):
+            # every connection is busy: count it and wait for a checkin
+            self._bump("exhaustion_events")
+            if not self._slots.acquire(timeout=self.timeout):
+                self._bump("timeouts")
+                raise mysql.connector.errors.PoolError(
+                    f"No free database connection after {self.timeout:g}s (pool size {self.size})")
+        waited_ms = (time.monotonic() - started) * 1000
+        try:
+            conn = None
+            while conn is None:
+                try:
+                    cand, created_at, last_used = self._idle.get_nowait()
+                except queue.Empty:
+                    conn, created_at = self._open()
+                    break
+                if self._healthy(cand, created_at, last_used):
+                    conn = cand
+                else:
+                    self._close_quietly(cand)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._born[id(conn)] = created_at
+            self.stats["checkouts"] += 1
+            self.stats["wait_time_total_ms"] += waited_ms
+            self.stats["wait_time_max_ms"] = max(self.stats["wait_time_max_ms"], waited_ms)
+            self.stats["in_use_peak"] = max(self.stats["in_use_peak"], len(self._born))
+        return conn
+
+    def checkin(self, conn, discard=False):
+        with self._lock:
+            created_at = self._born.pop(id(conn), time.monotonic())
+        try:
+            if not discard:
+                # end any open transaction so the next user gets a fresh snapshot
+                if conn.unread_result:
+                    conn.consume_results()
+                if conn.in_transaction:
+                    conn.rollback()
+        except mysql.connector.Error:
+            discard = True
+        if discard or not conn.is_connected():
+            self._bump("discarded")
+            self._close_quietly(conn)
+        else:
+            self._idle.put((conn, created_at, time.monotonic()))
+        self._slots.release()
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close(self):
+        """Close the idle connections (checked-out ones close on checkin as usual)."""
+        while True:
+            try:
+                conn, _, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close_quietly(conn)
+
+    def snapshot(self):
+        with self._lock:
+            snap = dict(self.stats)
+            in_use = len(self._born)
+        snap["in_use"] = in_use
+        snap["idle"] = self._idle.qsize()
+        snap["size"] = self.size
+        snap["wait_time_avg_ms"] = snap["wait_time_total_ms"] / snap["checkouts"] if snap["checkouts"] else 0.0
+        return snap
+
+
+
+class Database:
+    """
+    Pooled access to the app database. `select` returns a DataFrame and
+    `execute` runs a write or CALL and commits; both raise mysql.connector
+    errors instead of reporting them. `on_call(kind, query, started, rows,
+    nbytes)` is called after every select/execute, for instrumentation.
+    """
+
+    def __init__(self, config=None, pool_config=None, on_call=None):
+        self.pool = ConnectionPool(config or config_from_env(), **(pool_config or POOL_CONFIG))
+        self.on_call = on_call
+
+    @contextmanager
+    def connection(self):
+        conn = self.pool.checkout()
+        try:
+            yield conn
+        finally:
+            self.pool.checkin(conn)
+
+    def select(self, query, params=None):
+        started = time.perf_counter()
+        with self.connection() as conn:
+            df = pd.read_sql(query, conn, params=params)
+        if self.on_call:
+            self.on_call("select", query, started, len(df), int(df.memory_usage(index=False, deep=True).sum()))
+        return df
+
+    def execute(self, query, params=None, commit=True):
+        """
+        Execute a query (INSERT, UPDATE, DELETE, CALL procedure, etc.)
+        Returns the first result set of a procedure (None when empty), the
+        rows of a statement that returns any, and None for DML statements.
+        """
+        started = time.perf_counter()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query, params or ())
+                if query.strip().lower().startswith("call"):
+                    results = []
+                    try:
+                        results = cursor.fetchall()
+                    except mysql.connector.Error:
+                        pass  # no result set
+                    # every result set must be consumed before the next statement
+                    while cursor.nextset():
+                        try:
+                            cursor.fetchall()
+                        except mysql.connector.Error:
+                            pass
+                    if commit:
+                        conn.commit()
+                    return results if results else None
+                if commit:
+                    conn.commit()
+                try:
+                    return cursor.fetchall()
+                except mysql.connector.Error as e:
+                    # expected for INSERT/UPDATE/DELETE, which return no rows
+                    if e.errno == mysql.connector.errorcode.CR_NO_RESULT_SET:
+                        return None
+                    raise
+            finally:
+                if self.on_call:
+                    self.on_call("write", query, started, cursor.rowcount if cursor.rowcount >= 0 else None)
+                cursor.close()
+
+    def reserve_ids(self, table, count=1):
+        """
+        Reserve `count` consecutive primary keys for `table` from id_sequences and
+        return the first. Runs in its own short transaction on a pooled
+        connection, so the sequence row is locked for one UPDATE rather than for
+        the caller's whole write. Call it before checking out the connection the
+        write runs on: a caller holding one while waiting here can deadlock a pool
+        that every writer is doing the same in. Ids of a write that later rolls
+        back are skipped.
+        """
+        with self.connection() as conn:
+            return reserve_id_block(conn, table, count)
+
+
+def reserve_id_block(conn, table, count=1):
+    """
+    Database.reserve_ids on a connection the caller already holds. It commits,
+    so call it between the caller's transactions, never inside one.
+    """
+    cur = conn.cursor()
+    try:
+        # LAST_INSERT_ID(expr) hands the pre-increment value back to this session
+        cur.execute("UPDATE id_sequences SET next_id = LAST_INSERT_ID(next_id) + %s WHERE seq_name = %s",
+                    (count, table))
+        if cur.rowcount != 1:
+            raise ValueError(f"No id sequence for {table}; run CALL sync_id_sequences()")
+        cur.execute("SELECT LAST_INSERT_ID()")
+        first = cur.fetchone()[0]
+        conn.commit()
+    finally:
+        cur.close()
+    return int(first)
@@ -0,0 +1,340 @@
+"""
+Allocation engine: pure planning over students, seats and HallGrids already
+in memory. Nothing here opens a connection, so plans can be made, inspected
+and tested without a database; seat_allocator.allocation loads the inputs
+and writes the results.
+"""
+
+from array import array
+from datetime import datetime
+import hashlib
+import heapq
+
+import pandas as pd
+
+
+# ---------- RULES ----------
+class AllocationRule:
+    """
+    Base class for seating rules. The solver asks every active rule whether a
+    seat may be used at all, whether a student may sit on it, and whether two
+    physically adjacent students conflict. `student_key` groups students the
+    rule cannot tell apart, so the solver can treat them as one cohort.
+    """
+    name = "rule"
+
+    def usable(self, seat):
+        return True
+
+    def allows(self, seat, student):
+        return True
+
+    def conflicts(self, a, b):
+        return False
+
+    def student_key(self, student):
+        return None
+
+
+class SpacedSeating(AllocationRule):
+    """Leave every other seat empty, staggered across rows (checkerboard)."""
+    name = "Every other seat empty"
+
+    def usable(self, seat):
+        return (seat["row"] + seat["col"]) % 2 == 0
+
+
+class ReserveAccessibleSeats(AllocationRule):
+    """Accessible seats go only to students flagged `needs_accessible_seat`, and vice versa."""
+    name = "Accessible seats reserved for flagged students"
+
+    def allows(self, seat, student):
+        return bool(seat["is_accessible"]) == bool(student["needs_accessible_seat"])
+
+    def student_key(self, student):
+        return bool(student["needs_accessible_seat"])
+
+
+class NoAdjacentSameCohort(AllocationRule):
+    """No two students of the same department and year side by side or front/back."""
+    name = "No two same-department/year students adjacent"
+
+    def __init__(self, columns=("department", "year_of_study")):
+        self.columns = columns
+
+    def conflicts(self, a, b):
+        return self.student_key(a) == self.student_key(b)
+
+    def student_key(self, student):
+        return tuple(student.get(c) for c in self.columns)
+
+
+ALLOCATION_RULES = {
+    "mix_cohorts": NoAdjacentSameCohort,
+    "accessible": ReserveAccessibleSeats,
+    "spacing": SpacedSeating,
+}
+
+
+def make_rules(rule_keys):
+    """Rule instances for keys of ALLOCATION_RULES; KeyError names an unknown key."""
+    return [ALLOCATION_RULES[k]() for k in rule_keys]
+
+
+# ---------- GREEDY PLAN ----------
+def inventory_fingerprint(exam_id, student_ids, seat_ids):
+    """Short hash of the inventory a plan was made from; any added, removed or taken student or seat changes it."""
+    h = hashlib.sha256(str(int(exam_id)).encode())
+    h.update(array("i", student_ids).tobytes())
+    h.update(b"|")
+    h.update(array("i", seat_ids).tobytes())
+    return h.hexdigest()[:16]
+
+
+class AllocationPlan:
+    """
+    Immutable greedy plan for one exam: student_ids[i] gets seat_ids[i] in
+    hall_ids[i], held as read-only int arrays (4 bytes per id), plus the
+    fingerprint of the inventory it was made from. commit_plan writes
+    exactly these pairs, or nothing if the inventory has changed since.
+    """
+    __slots__ = ("exam_id", "student_ids", "seat_ids", "hall_ids", "fingerprint", "unplaced", "halls", "planned_at")
+
+    def __init__(self, exam_id, student_ids, seat_ids, hall_ids, fingerprint, unplaced, halls):
+        values = {"exam_id": int(exam_id), "fingerprint": fingerprint, "unplaced": unplaced,
+                  "student_ids": memoryview(array("i", student_ids)).toreadonly(),
+                  "seat_ids": memoryview(array("i", seat_ids)).toreadonly(),
+                  "hall_ids": memoryview(array("i", hall_ids)).toreadonly(),
+                  "halls": tuple(halls), "planned_at": datetime.now()}
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("AllocationPlan is immutable; make a new plan instead")
+
+    def __len__(self):
+        return len(self.student_ids)
+
+    def rows(self):
+        return [(self.exam_id, student_id, seat_id) for student_id, seat_id in zip(self.student_ids, self.seat_ids)]
+
+    def hall_diff(self):
+        """One row per hall: free seats now, seats the plan fills (first..last) and seats left free."""
+        return pd.DataFrame(list(self.halls), columns=["hall_id", "free_now", "to_allocate", "first_seat", "last_seat", "free_after"])
+
+
+def greedy_plan(exam_id, students, seats):
+    """
+    AllocationPlan pairing `students` (ids, in order) with `seats` ((seat_id,
+    hall_id, seat_number), in order) one to one, the pairing the
+    auto_allocate_exam procedure makes.
+    """
+    n = min(len(students), len(seats))
+    halls = {}
+    for i, (seat_id, hall_id, seat_number) in enumerate(seats):
+        h = halls.setdefault(hall_id, [hall_id, 0, 0, None, None, 0])
+        h[1] += 1
+        if i < n:
+            h[2] += 1
+            h[3] = h[3] or seat_number
+            h[4] = seat_number
+    for h in halls.values():
+        h[5] = h[1] - h[2]
+    return AllocationPlan(exam_id, students[:n], [s[0] for s in seats[:n]], [s[1] for s in seats[:n]],
+                          inventory_fingerprint(exam_id, students, [s[0] for s in seats]),
+                          unplaced=len(students) - n, halls=[tuple(h) for h in halls.values()])
+
+
+# ---------- CONSTRAINT-AWARE SOLVER ----------
+def solve_allocation(students, grids, rules, occupied=None):
+    """
+    Seat `students` on the halls in `grids` subject to `rules`, without touching the database.
+
+    students: DataFrame(student_id, department, year_of_study, needs_accessible_seat)
+    grids:    HallGrid per hall, in allocation order (occupied seats still count as neighbours)
+    occupied: {seat_id: student record} for seats that are already allocated
+
+    Seats are walked row-major per hall; each seat goes to the largest cohort
+    that the rules allow there and that conflicts with no seated neighbour
+    (greedy colouring of the seat grid). A seat no cohort may take stays empty.
+    Returns {"pairs": [(student_id, seat_id)], "unplaced": [student_id], "left_empty": int}.
+    """
+    placed = dict(occupied or {})
+    groups = {}
+    for student in students.sort_values("student_id").to_dict("records"):
+        key = tuple(r.student_key(student) for r in rules)
+        groups.setdefault(key, []).append(student)
+    heap = [(-len(q), i, key) for i, (key, q) in enumerate(groups.items())]
+    heapq.heapify(heap)
+    cursors = {key: 0 for key in groups}
+
+    pairs, left_empty = [], 0
+    for grid in grids:
+        for seat in grid.seats:
+            if not heap:
+                break
+            sid = seat["seat_id"]
+            if sid in placed or not all(r.usable(seat) for r in rules):
+                continue
+            neighbours = [placed[n] for n in grid.neighbours[sid] if n in placed]
+            held, chosen = [], None
+            while heap:
+                item = heapq.heappop(heap)
+                key = item[2]
+                rep = groups[key][cursors[key]]
+                if all(rule.allows(seat, rep) for rule in rules) and \
+                        not any(rule.conflicts(rep, nb) for rule in rules for nb in neighbours):
+                    chosen = item
+                    break
+                held.append(item)
+            for item in held:
+                heapq.heappush(heap, item)
+            if chosen is None:
+                left_empty += 1
+                continue
+            negn, order, key = chosen
+            student = groups[key][cursors[key]]
+            cursors[key] += 1
+            placed[sid] = student
+            pairs.append((student["student_id"], sid))
+            if negn + 1 < 0:
+                heapq.heappush(heap, (negn + 1, order, key))
+
+    unplaced = [st_["student_id"] for key, q in groups.items() for st_ in q[cursors[key]:]]
+    return {"pairs": pairs, "unplaced": unplaced, "left_empty": left_empty}
+
+
+# ---------- BATCH (DATE RANGE) ----------
+def _fmt_time(t):
+    secs = int(pd.to_timedelta(t).total_seconds())
+    return f"{secs // 3600:02d}:{secs % 3600 // 60:02d}"
+
+
+def find_overlapping_exams(exams):
+    """
+    Pairs (exam_a, exam_b) of exams held on the same date whose
+    [start_time, end_time) windows overlap. Sweep per day, O(n log n + pairs).
+    """
+    pairs = []
+    ordered = exams.sort_values(["exam_date", "start_time", "exam_id"])
+    for _, day in ordered.groupby("exam_date", sort=False):
+        active = []  # (end_time, exam_id) of exams still running
+        for e in day.itertuples(index=False):
+            active = [(end, eid) for end, eid in active if end > e.start_time]
+            pairs.extend((eid, e.exam_id) for _, eid in active)
+            active.append((e.end_time, e.exam_id))
+    return pairs
+
+
+def plan_batch_allocation(inv):
+    """
+    Allocate every exam in `inv` in one pass over the preloaded inventory.
+    A seat used (or planned) by an exam is blocked for every exam overlapping it.
+    Returns {"rows": [(exam_id, student_id, seat_id)], "summary": df, "clashes": df}.
+    """
+    exams = inv["exams"]
+    overlaps = find_overlapping_exams(exams)
+    overlapping = {eid: set() for eid in exams["exam_id"]}
+    for a, b in overlaps:
+        overlapping[a].add(b)
+        overlapping[b].add(a)
+    hall_seats = {h: grid.seat_ids for h, grid in inv["grids"].items()}
+    exam_halls = {e: g["hall_id"].tolist() for e, g in inv["hall_assignments"].groupby("exam_id")}
+    used_seats = {eid: set() for eid in exams["exam_id"]}
+    seated = {eid: set() for eid in exams["exam_id"]}
+    allocs = inv["allocations"]
+    for eid, seat_id, student_id in zip(allocs["exam_id"], allocs["seat_id"], allocs["student_id"]):
+        used_seats[eid].add(seat_id)
+        if pd.notna(student_id):
+            seated[eid].add(int(student_id))
+    students = inv["students"]["student_id"].tolist()
+
+    rows, summary = [], []
+    for e in exams.itertuples(index=False):
+        eid = e.exam_id
+        blocked = set(used_seats[eid])
+        for other in overlapping[eid]:
+            blocked |= used_seats[other]
+        free = [sid for h in exam_halls.get(eid, []) for sid in hall_seats.get(h, []) if sid not in blocked]
+        pending = [sid for sid in students if sid not in seated[eid]]
+        for student_id, seat_id in zip(pending, free):
+            rows.append((eid, student_id, seat_id))
+            used_seats[eid].add(seat_id)
+            seated[eid].add(student_id)
+        placed = min(len(pending), len(free))
+        summary.append({"exam_id": eid, "course_code": e.course_code, "exam_date": e.exam_date,
+                        "window": f"{_fmt_time(e.start_time)}-{_fmt_time(e.end_time)}",
+                        "halls": len(exam_halls.get(eid, [])), "allocated": placed,
+                        "unplaced_students": len(pending) - placed, "free_seats_left": len(free) - placed})
+
+    by_id = exams.set_index("exam_id")
+    clashes = []
+    for a, b in overlaps:
+        ea, eb = by_id.loc[a], by_id.loc[b]
+        shared = sorted(set(exam_halls.get(a, [])) & set(exam_halls.get(b, [])))
+        clashes.append({"exam_a": a, "course_a": ea["course_code"],
+                        "exam_b": b, "course_b": eb["course_code"], "exam_date": ea["exam_date"],
+                        "window_a": f"{_fmt_time(ea['start_time'])}-{_fmt_time(ea['end_time'])}",
+                        "window_b": f"{_fmt_time(eb['start_time'])}-{_fmt_time(eb['end_time'])}",
+                        "shared_halls": ", ".join(str(h) for h in shared),
+                        "students_in_both": len(seated[a] & seated[b])})
+    return {"rows": rows, "summary": pd.DataFrame(summary), "clashes": pd.DataFrame(clashes)}
+
+
+# ---------- INCREMENTAL RE-ALLOCATION ----------
+def plan_reallocation(allocs, students, grids, rules):
+    """
+    Smallest set of changes that makes an exam's seating valid again, without touching the database.
+
+    An allocation is stranded when its seat is not in one of `grids` (hall
+    assignment dropped) or a rule forbids the seat or the student on it;
+    allocations whose student was deleted are released. Stranded and
+    unallocated students go through solve_allocation around the seats that
+    stay taken, so nobody else moves. Stranded seats still count as taken:
+    they free up on the next run, which keeps the moves independent of order.
+    Returns {"moves": [(allocation_id, seat_id)], "adds": [(student_id, seat_id)],
+    "releases": [allocation_id], "diff": DataFrame with one row per change or unplaced student}.
+    """
+    seat_of = {sid: (grid.hall_id, seat) for grid in grids for sid, seat in grid.by_id.items()}
+    occupied, stranded, releases, diff = {}, [], [], []
+    for rec in allocs.to_dict("records"):
+        if pd.isna(rec["student_id"]):
+            releases.append(rec["allocation_id"])
+            diff.append({"action": "release", "allocation_id": rec["allocation_id"], "student_id": None, "srn": None,
+                         "from_hall": rec["hall_id"], "from_seat": rec["seat_number"], "to_hall": None, "to_seat": None})
+            continue
+        rec["student_id"] = int(rec["student_id"])
+        hall_seat = seat_of.get(rec["seat_id"])
+        if hall_seat:
+            occupied[rec["seat_id"]] = rec
+        if not hall_seat or not all(r.usable(hall_seat[1]) and r.allows(hall_seat[1], rec) for r in rules):
+            stranded.append(rec)
+
+    to_place = pd.concat([students, pd.DataFrame(stranded, columns=students.columns)], ignore_index=True)
+    by_student = {rec["student_id"]: rec for rec in stranded}
+    result = solve_allocation(to_place, grids, rules, occupied) if len(to_place) else {"pairs": [], "unplaced": []}
+    moves, adds = [], []
+    for student_id, seat_id in result["pairs"]:
+        hall_id, seat = seat_of[seat_id]
+        old = by_student.get(student_id)
+        if old:
+            moves.append((old["allocation_id"], seat_id))
+        else:
+            adds.append((student_id, seat_id))
+        diff.append({"action": "move" if old else "add", "allocation_id": old["allocation_id"] if old else None,
+                     "student_id": student_id, "srn": (old or {}).get("srn"),
+                     "from_hall": old["hall_id"] if old else None, "from_seat": old["seat_number"] if old else None,
+                     "to_hall": hall_id, "to_seat": seat["seat_number"]})
+    for student_id in result["unplaced"]:
+        old = by_student.get(student_id)
+        diff.append({"action": "stranded" if old else "unplaced", "allocation_id": old["allocation_id"] if old else None,
+                     "student_id": student_id, "srn": (old or {}).get("srn"),
+                     "from_hall": old["hall_id"] if old else None, "from_seat": old["seat_number"] if old else None,
+                     "to_hall": None, "to_seat": None})
+    srn_of = dict(zip(students["student_id"], students["srn"]))
+    for row in diff:
+        if row["srn"] is None and row["student_id"] is not None:
+            row["srn"] = srn_of.get(row["student_id"])
+    columns = ["action", "allocation_id", "student_id", "srn", "from_hall", "from_seat", "to_hall", "to_seat"]
+    diff = pd.DataFrame(diff, columns=columns).astype({c: "Int64" for c in ("allocation_id", "student_id", "from_hall", "to_hall")})
+    return {"moves": moves, "adds": adds, "releases": releases, "diff": diff}
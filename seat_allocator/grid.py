@@ -0,0 +1,95 @@
+"""
+Seat layouts: seat labels parsed into rows and columns, and the HallGrid a
+hall's seats are walked in (row-major, with neighbours for adjacency rules).
+"""
+
+import re
+
+SEAT_LABEL_RE = re.compile(r"^\s*([A-Za-z]*)\s*-?\s*(\d+)\s*$")
+
+# SQL equivalent of the grid's row-major order, for queries that sort seats
+SEAT_ORDER_SQL = ("CHAR_LENGTH(REGEXP_SUBSTR(se.seat_number, '^[A-Za-z]*')), REGEXP_SUBSTR(se.seat_number, '^[A-Za-z]*'), "
+                  "CAST(REGEXP_SUBSTR(se.seat_number, '[0-9]+$') AS UNSIGNED), se.seat_number")
+
+
+def row_label(i):
+    """0 -> 'A', 25 -> 'Z', 26 -> 'AA' (spreadsheet-style row letters)."""
+    label = ""
+    i += 1
+    while i:
+        i, rem = divmod(i - 1, 26)
+        label = chr(65 + rem) + label
+    return label
+
+
+def parse_seat_number(label):
+    """'A10' -> ('A', 10). Labels without a trailing number -> (LABEL, 0), upper-cased."""
+    m = SEAT_LABEL_RE.match(str(label))
+    if not m:
+        return (str(label).strip().upper(), 0)
+    return (m.group(1).upper(), int(m.group(2)))
+
+
+class HallGrid:
+    """
+    Parsed seat layout of one hall. Seat labels are split into a row (letters,
+    ordered A..Z, AA..) and a column (number); seats are kept in row-major order.
+    `cells` maps (row, col) -> seat_id and `neighbours` maps seat_id -> the seats
+    left, right, in front and behind, so adjacency checks are dict lookups.
+    A label without a trailing number is a row of its own name with column 0,
+    so it comes first in that row. Labels that land on a taken cell (e.g. 'A1'
+    and 'A01') move one column right, pushing the later seats of the row along.
+    """
+
+    def __init__(self, hall_id, seats):
+        self.hall_id = hall_id
+        recs = seats.to_dict("records")
+        for seat in recs:
+            seat["row_label"], seat["col"] = parse_seat_number(seat["seat_number"])
+        self.row_labels = sorted({seat["row_label"] for seat in recs}, key=lambda r: (len(r), r))
+        row_index = {label: i for i, label in enumerate(self.row_labels)}
+        for seat in recs:
+            seat["row"] = row_index[seat["row_label"]]
+        recs.sort(key=lambda seat: (seat["row"], seat["col"], seat["seat_number"], seat["seat_id"]))
+
+        self.cells = {}
+        for seat in recs:
+            while (seat["row"], seat["col"]) in self.cells:
+                seat["col"] += 1
+            self.cells[(seat["row"], seat["col"])] = seat["seat_id"]
+        recs.sort(key=lambda seat: (seat["row"], seat["col"]))
+
+        self.seats = recs
+        self.seat_ids = [seat["seat_id"] for seat in recs]
+        self.by_id = {seat["seat_id"]: seat for seat in recs}
+        self.rows = [[] for _ in self.row_labels]
+        for seat in recs:
+            self.rows[seat["row"]].append(seat)
+        cells = self.cells
+        self.neighbours = {
+            seat["seat_id"]: tuple(n for n in (cells.get((seat["row"], seat["col"] - 1)),
+                                               cells.get((seat["row"], seat["col"] + 1)),
+                                               cells.get((seat["row"] - 1, seat["col"])),
+                                               cells.get((seat["row"] + 1, seat["col"])))
+                                   if n is not None)
+            for seat in recs
+        }
+
+    def __len__(self):
+        return len(self.seats)
+
+    def seat_at(self, row, col):
+        return self.cells.get((row, col))
+
+    def row_seat_ids(self, row_label):
+        """Seat ids of one row (by its label, e.g. 'B'), left to right."""
+        if row_label not in self.row_labels:
+            return []
+        return [seat["seat_id"] for seat in self.rows[self.row_labels.index(row_label)]]
+
+
+def load_hall_grid(db, hall_id):
+    """HallGrid of one hall, read with one query (the app caches it per hall)."""
+    seats = db.select("SELECT seat_id, hall_id, seat_number, is_accessible, remarks FROM seats WHERE hall_id=%s",
+                      params=(int(hall_id),))
+    return HallGrid(int(hall_id), seats)
@@ -0,0 +1,211 @@
+"""
+Read-only seat lookup for exam mornings: an in-memory index srn -> seats of
+one exam session (the exams of a date range), and a small threaded HTTP
+server over it.
+
+The index is built with one query and refreshed incrementally: allocations
+written since the allocated_at watermark (new ones, and moves, which
+reallocate_exam stamps) are folded in, and an exam whose allocation count in
+exam_hall_stats no longer matches the index (deletions, or a long bulk
+insert that committed behind the watermark) is reloaded. Lookups are dict
+reads and never touch MySQL.
+
+    GET /seat?srn=PES2UG23CS101  ->  {"srn": ..., "seats": [{exam, date, time, hall, seat}, ...]}
+    GET /health                  ->  size of the index, last refresh, lookups served
+"""
+
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import sys
+import threading
+from urllib.parse import parse_qs, urlparse
+
+from .engine import _fmt_time
+
+LOOKUP_REFRESH_SECONDS = float(os.getenv("LOOKUP_REFRESH_SECONDS", "30"))
+# re-read this much before the watermark: allocated_at is set when the row is
+# written, and a transaction can commit well after that
+LOOKUP_OVERLAP_SECONDS = int(os.getenv("LOOKUP_OVERLAP_SECONDS", "60"))
+SEAT_FIELDS = ("exam_id", "course_code", "course_name", "exam_date", "start_time", "end_time", "hall_name", "seat_number")
+# completed with a WHERE below; not a query on its own
+SEAT_SELECT = """
+    SELECT a.allocation_id, a.exam_id, s.srn, e.course_code, e.course_name, e.exam_date, e.start_time, e.end_time,
+           h.hall_name, se.seat_number
+    FROM exams e
+    JOIN allocations a ON a.exam_id = e.exam_id
+    JOIN seats se ON se.seat_id = a.seat_id
+    JOIN halls h ON h.hall_id = se.hall_id
+    LEFT JOIN students s ON s.student_id = a.student_id
+"""
+Q_SESSION_SEATS = SEAT_SELECT + " WHERE e.exam_date BETWEEN %s AND %s"
+Q_EXAM_SEATS = SEAT_SELECT + " WHERE e.exam_id = %s"
+Q_SEATS_SINCE = SEAT_SELECT + """ WHERE e.exam_date BETWEEN %s AND %s
+    AND a.allocated_at >= %s - INTERVAL %s SECOND"""
+Q_SESSION_COUNTS = """
+    SELECT e.exam_id, IFNULL(SUM(ehs.allocated), 0) AS allocated
+    FROM exams e
+    LEFT JOIN exam_hall_stats ehs ON ehs.exam_id = e.exam_id
+    WHERE e.exam_date BETWEEN %s AND %s
+    GROUP BY e.exam_id
+"""
+
+
+class SeatIndex:
+    """
+    srn -> seats of every exam dated in [date_from, date_to]. `by_srn` holds
+    immutable tuples that refresh() replaces whole, so lookups need no lock;
+    refreshes are serialised. Allocations whose student was deleted count
+    towards the exam but are not indexed.
+    """
+
+    def __init__(self, db, date_from, date_to=None):
+        self.db = db
+        self.date_from, self.date_to = date_from, date_to or date_from
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+        self.lookups = 0
+        self.load()
+
+    def _read(self, query, params):
+        with self.db.connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute("SELECT NOW()")
+                now = cur.fetchone()[0]
+                cur.execute(query, params)
+                rows = cur.fetchall()
+            finally:
+                cur.close()
+        return now, rows
+
+    def load(self):
+        now, rows = self._read(Q_SESSION_SEATS, (self.date_from, self.date_to))
+        with self._lock:
+            self.watermark = now
+            self.by_srn = {}
+            self._rows = {}    # allocation_id -> (exam_id, srn, seat entry)
+            self.counts = {}   # exam_id -> allocations indexed
+            for row in rows:
+                self._put(row)
+            self.refreshed_at = datetime.now()
+        return len(rows)
+
+    def _put(self, row):
+        allocation_id, exam_id = row[0], row[1]
+        srn = row[2].strip().upper() if row[2] else None
+        if allocation_id in self._rows:
+            self._drop(allocation_id)
+        self.counts[exam_id] = self.counts.get(exam_id, 0) + 1
+        entry = (exam_id, row[3], row[4], str(row[5]), _fmt_time(row[6]), _fmt_time(row[7]), row[8], row[9])
+        self._rows[allocation_id] = (exam_id, srn, entry)
+        if srn is not None:
+            seats = self.by_srn.get(srn, ()) + (entry,)
+            self.by_srn[srn] = tuple(sorted(seats, key=lambda e: (e[3], e[4], e[0])))
+
+    def _drop(self, allocation_id):
+        exam_id, srn, entry = self._rows.pop(allocation_id)
+        self.counts[exam_id] -= 1
+        if srn is not None:
+            seats = tuple(e for e in self.by_srn.get(srn, ()) if e is not entry)
+            if seats:
+                self.by_srn[srn] = seats
+            else:
+                self.by_srn.pop(srn, None)
+
+    def refresh(self):
+        """Fold in allocations written since the watermark and reload exams whose count changed. Returns rows read."""
+        with self._refreshing:
+            return self._refresh()
+
+    def _refresh(self):
+        now, rows = self._read(Q_SEATS_SINCE, (self.date_from, self.date_to, self.watermark, LOOKUP_OVERLAP_SECONDS))
+        counts = dict(self.db.select(Q_SESSION_COUNTS, params=(self.date_from, self.date_to)).itertuples(index=False))
+        read = len(rows)
+        with self._lock:
+            for row in rows:
+                self._put(row)
+            self.watermark = now
+        for exam_id, allocated in counts.items():
+            if self.counts.get(exam_id, 0) != int(allocated):
+                read += self.reload_exam(exam_id)
+        for exam_id in set(self.counts) - set(counts):
+            read += self.reload_exam(exam_id)  # exam deleted or moved out of the range
+        self.refreshed_at = datetime.now()
+        return read
+
+    def reload_exam(self, exam_id):
+        _, rows = self._read(Q_EXAM_SEATS, (exam_id,))
+        with self._lock:
+            for allocation_id in [a for a, (e, _, _) in self._rows.items() if e == exam_id]:
+                self._drop(allocation_id)
+            for row in rows:
+                if self.date_from <= row[5] <= self.date_to:
+                    self._put(row)
+            if not self.counts.get(exam_id):
+                self.counts.pop(exam_id, None)
+        return len(rows)
+
+    def lookup(self, srn):
+        """Seats of `srn` in the session, earliest exam first, as dicts of SEAT_FIELDS."""
+        self.lookups += 1
+        return [dict(zip(SEAT_FIELDS, entry)) for entry in self.by_srn.get(str(srn).strip().upper(), ())]
+
+    def stats(self):
+        return {"date_from": str(self.date_from), "date_to": str(self.date_to), "exams": len(self.counts),
+                "students": len(self.by_srn), "allocations": len(self._rows), "watermark": str(self.watermark),
+                "refreshed_at": self.refreshed_at.isoformat(timespec="seconds"), "lookups": self.lookups}
+
+
+class LookupHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive: clients reuse one connection for many lookups
+    disable_nagle_algorithm = True  # headers and body are separate writes; don't hold the body for an ACK
+    index = None
+
+    def _send(self, status, body):
+        data = json.dumps(body, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/seat":
+            srn = parse_qs(url.query).get("srn", [""])[0]
+            if not srn:
+                return self._send(400, {"error": "srn is required"})
+            seats = self.index.lookup(srn)
+            return self._send(200 if seats else 404, {"srn": srn, "seats": seats})
+        if url.path == "/health":
+            return self._send(200, self.index.stats())
+        self._send(404, {"error": "unknown path"})
+
+    def log_message(self, format, *args):
+        pass  # one line per lookup would cost more than the lookup
+
+
+def serve(index, bind="127.0.0.1", port=8502, refresh_seconds=LOOKUP_REFRESH_SECONDS):
+    """Serve `index` over HTTP until interrupted, refreshing it every `refresh_seconds` in a background thread."""
+    handler = type("BoundLookupHandler", (LookupHandler,), {"index": index})
+    server = ThreadingHTTPServer((bind, port), handler)
+    server.daemon_threads = True
+    stop = threading.Event()
+
+    def refresher():
+        while not stop.wait(refresh_seconds):
+            try:
+                index.refresh()
+            except Exception as e:  # keep serving the last good index
+                print(f"{datetime.now():%H:%M:%S} refresh failed: {e}", file=sys.stderr)
+
+    threading.Thread(target=refresher, daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
@@ -0,0 +1,100 @@
+"""
+Minimal streaming PDF writer for text documents (seat slips, door lists).
+
+Only the standard Helvetica fonts, text, lines and rectangles: enough for
+printable lists without a PDF dependency. Every page is written to the file
+as soon as it is added; only the byte offsets of the objects are kept until
+close(), so a document of thousands of pages uses the memory of one page.
+"""
+
+A4 = (595, 842)  # points
+FONTS = {False: "F1", True: "F2"}  # bold -> font resource
+
+
+def _pdf_string(text):
+    data = str(text).encode("cp1252", errors="replace")
+    return b"(" + data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+class Page:
+    """Drawing operations of one page; coordinates in points from the bottom-left corner."""
+
+    def __init__(self):
+        self._ops = []
+
+    def text(self, x, y, text, size=10, bold=False):
+        self._ops.append(b"BT /%s %g Tf %g %g Td %s Tj ET" % (FONTS[bold].encode(), size, x, y, _pdf_string(text)))
+
+    def line(self, x1, y1, x2, y2, width=0.5):
+        self._ops.append(b"%g w %g %g m %g %g l S" % (width, x1, y1, x2, y2))
+
+    def rect(self, x, y, w, h, width=0.5):
+        self._ops.append(b"%g w %g %g %g %g re S" % (width, x, y, w, h))
+
+    def content(self):
+        return b"\n".join(self._ops)
+
+
+class PdfWriter:
+    """
+    Write pages to `path` one at a time:
+
+        with PdfWriter("out.pdf") as pdf:
+            page = Page()
+            page.text(50, 800, "Hello")
+            pdf.add_page(page)
+    """
+
+    def __init__(self, path, size=A4):
+        self.size = size
+        self._f = open(path, "wb")
+        self._pos = 0
+        self._offsets = {}
+        self._pages = []
+        self._next_id = 5  # 1 catalog, 2 page tree, 3 and 4 fonts
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._object(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+        self._object(4, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+
+    def _write(self, data):
+        self._f.write(data)
+        self._pos += len(data)
+
+    def _object(self, obj_id, body):
+        self._offsets[obj_id] = self._pos
+        self._write(b"%d 0 obj\n%s\nendobj\n" % (obj_id, body))
+
+    def _new_id(self):
+        self._next_id += 1
+        return self._next_id - 1
+
+    def add_page(self, page):
+        content = page.content()
+        content_id, page_id = self._new_id(), self._new_id()
+        self._object(content_id, b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+        self._object(page_id, b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+                              b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>"
+                     % (self.size[0], self.size[1], content_id))
+        self._pages.append(page_id)
+
+    def __len__(self):
+        return len(self._pages)
+
+    def close(self):
+        if self._f.closed:
+            return
+        kids = b" ".join(b"%d 0 R" % p for p in self._pages)
+        self._object(2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._pages)))
+        self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        xref = self._pos
+        count = self._next_id
+        entries = [b"0000000000 65535 f \n"] + [b"%010d 00000 n \n" % self._offsets[i] for i in range(1, count)]
+        self._write(b"xref\n0 %d\n%s" % (count, b"".join(entries)))
+        self._write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (count, xref))
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,110 @@
+"""
+Reporting: per-exam and per-hall summaries read from exam_hall_stats, the
+allocations of one hall, and the seat map of a hall as a standalone SVG page.
+"""
+
+from html import escape
+
+import pandas as pd
+
+SEAT_CELL = 30
+SEAT_COLOURS = {
+    "Allocated": "#4e79a7",
+    "Free": "#e0e0e0",
+    "Free (accessible)": "#a0cbe8",
+    "PENDING": "#f28e2b",
+    "OK": "#59a14f",
+    "MISMATCH": "#e15759",
+    "ABSENT": "#9c755f",
+    "OTHER": "#b07aa1",
+}
+
+
+def exam_summary(db, exam_id):
+    """One row per hall of an exam: seats, allocated, occupancy and seat-check counters."""
+    return db.select("""SELECT h.hall_id, h.hall_name, ehs.seat_count, ehs.allocated,
+                               ROUND(100 * ehs.allocated / NULLIF(ehs.seat_count, 0), 2) AS occupancy_pct,
+                               ehs.checks_pending, ehs.checks_ok, ehs.checks_mismatch, ehs.checks_absent, ehs.checks_other
+                        FROM exam_hall_stats ehs
+                        JOIN halls h ON h.hall_id = ehs.hall_id
+                        WHERE ehs.exam_id = %s
+                        ORDER BY h.hall_name""", params=(exam_id,))
+
+
+def hall_allocations(db, exam_id, hall_id):
+    """Allocations of one exam in one hall, with the student and the current check status."""
+    return db.select("""SELECT a.allocation_id, a.seat_id, se.seat_number, a.student_id, s.srn, s.full_name,
+                               a.check_status
+                        FROM allocations a
+                        LEFT JOIN students s ON a.student_id = s.student_id
+                        JOIN seats se ON a.seat_id = se.seat_id
+                        WHERE a.exam_id=%s AND se.hall_id=%s""", params=(exam_id, hall_id))
+
+
+def render_seat_map_html(grid, allocs, colour_by="Allocation"):
+    """
+    Draw a whole hall as one SVG (plus a little JS for click details and zoom).
+    `allocs` has one row per allocated seat: seat_id, srn, full_name, check_status.
+    Seats are coloured by allocation status or, with colour_by="Seat check",
+    by the latest seat-check status. Accessible seats get a thick outline.
+    """
+    seats = pd.DataFrame(grid.seats, columns=["seat_id", "seat_number", "is_accessible", "row", "col"])
+    df = seats.merge(allocs[["seat_id", "srn", "full_name", "check_status"]], how="left", on="seat_id")
+    allocated = df["srn"].notna() | df["full_name"].notna()
+    accessible = df["is_accessible"].fillna(False).astype(bool)
+    state = pd.Series("Free", index=df.index).mask(accessible, "Free (accessible)").mask(allocated, "Allocated")
+    if colour_by == "Seat check":
+        status = df["check_status"].fillna("PENDING")
+        state = state.mask(allocated, status.where(status.isin(SEAT_COLOURS), "OTHER"))
+    fill = state.map(SEAT_COLOURS)
+    min_col = int(df["col"].min())
+    x = (df["col"] - min_col) * SEAT_CELL + 40
+    y = df["row"] * SEAT_CELL + 10
+    label = df["seat_number"].astype(str).map(escape)
+    who = (df["full_name"].fillna("").astype(str) + " (" + df["srn"].fillna("").astype(str) + ")").map(escape)
+    detail = label + " · " + state + allocated.map({True: " · ", False: ""}) + who.where(allocated, "")
+    stroke = accessible.map({True: ' stroke="#1f3b57" stroke-width="3"', False: ' stroke="#ffffff" stroke-width="1"'})
+    size = SEAT_CELL - 4
+    rects = ('<g class="seat" data-d="' + detail + '"><rect x="' + x.astype(str) + '" y="' + y.astype(str)
+             + f'" width="{size}" height="{size}" rx="4" fill="' + fill + '"' + stroke + '><title>' + detail
+             + '</title></rect><text x="' + (x + size / 2).astype(str) + '" y="' + (y + size / 2 + 3).astype(str)
+             + '">' + label + '</text></g>')
+    row_labels = "".join(f'<text class="row" x="4" y="{i * SEAT_CELL + 10 + SEAT_CELL / 2}">{escape(r)}</text>'
+                         for i, r in enumerate(grid.row_labels))
+    width = (int(df["col"].max()) - min_col + 1) * SEAT_CELL + 50
+    height = len(grid.row_labels) * SEAT_CELL + 20
+    legend = "".join(f'<span><i style="background:{SEAT_COLOURS[k]}"></i>{k}</span>'
+                     for k in SEAT_COLOURS if (state == k).any())
+    return f"""
+<style>
+  body {{ font-family: sans-serif; margin: 0; }}
+  #bar {{ display: flex; gap: 12px; align-items: center; font-size: 12px; margin-bottom: 6px; flex-wrap: wrap; }}
+  #bar i {{ display: inline-block; width: 12px; height: 12px; margin-right: 4px; vertical-align: middle; border-radius: 2px; }}
+  #wrap {{ overflow: auto; border: 1px solid #ddd; max-height: 640px; }}
+  svg text {{ font-size: 8px; text-anchor: middle; pointer-events: none; fill: #222; }}
+  svg text.row {{ font-size: 11px; font-weight: bold; text-anchor: start; }}
+  g.seat {{ cursor: pointer; }}
+  g.seat:hover rect {{ opacity: 0.75; }}
+  #info {{ font-size: 13px; min-height: 18px; margin-top: 6px; }}
+</style>
+<div id="bar"><button onclick="zoom(1.25)">+</button><button onclick="zoom(0.8)">&minus;</button>
+  <button onclick="zoom(0)">reset</button>{legend}</div>
+<div id="wrap"><svg id="map" width="{width}" height="{height}" viewBox="0 0 {width} {height}">{row_labels}{"".join(rects)}</svg></div>
+<div id="info">Click a seat for details.</div>
+<script>
+  const svg = document.getElementById("map"), w = {width}, h = {height};
+  let scale = 1;
+  function zoom(f) {{
+    scale = f ? Math.min(6, Math.max(0.25, scale * f)) : 1;
+    svg.setAttribute("width", w * scale);
+    svg.setAttribute("height", h * scale);
+  }}
+  document.getElementById("wrap").addEventListener("wheel", e => {{
+    if (e.ctrlKey) {{ e.preventDefault(); zoom(e.deltaY < 0 ? 1.1 : 0.9); }}
+  }}, {{passive: false}});
+  svg.addEventListener("click", e => {{
+    const g = e.target.closest("g.seat");
+    if (g) document.getElementById("info").textContent = g.dataset.d;
+  }});
+</script>
+"""
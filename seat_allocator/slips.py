@@ -0,0 +1,185 @@
+"""
+Seat slips (one per student per exam) and door lists (one per exam x hall)
+for an exam or a date range, as CSV and PDF.
+
+All allocations of the range come from one joined query, ordered by exam,
+hall and seat and read through an unbuffered cursor in batches, so only one
+hall's rows are held at a time. CSV rows are written as they arrive; the
+PDFs of each exam x hall are rendered by a process pool while the next
+halls are read. Memory stays flat whatever the size of the range.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import csv
+from itertools import groupby
+import os
+import re
+
+from .engine import _fmt_time
+from .grid import SEAT_ORDER_SQL
+from .pdf import A4, Page, PdfWriter
+
+SLIP_COLUMNS = ["exam_id", "course_code", "course_name", "exam_date", "start_time", "end_time",
+                "hall_id", "hall_name", "seat_number", "srn", "full_name", "department", "year_of_study"]
+DOOR_LIST_COLUMNS = ["exam_id", "course_code", "exam_date", "start_time", "hall_name", "srn", "full_name", "seat_number"]
+# completed with a WHERE on exams below; not a query on its own
+SLIP_SELECT = """
+    SELECT e.exam_id, e.course_code, e.course_name, e.exam_date, e.start_time, e.end_time,
+           h.hall_id, h.hall_name, se.seat_number, s.srn, s.full_name, s.department, s.year_of_study
+    FROM exams e
+    JOIN allocations a ON a.exam_id = e.exam_id
+    JOIN seats se ON se.seat_id = a.seat_id
+    JOIN halls h ON h.hall_id = se.hall_id
+    JOIN students s ON s.student_id = a.student_id
+"""
+SLIP_ORDER = " ORDER BY e.exam_date, e.start_time, e.exam_id, h.hall_id, " + SEAT_ORDER_SQL
+Q_SLIPS_FOR_EXAM = SLIP_SELECT + " WHERE e.exam_id = %s" + SLIP_ORDER
+Q_SLIPS_FOR_DATES = SLIP_SELECT + " WHERE e.exam_date BETWEEN %s AND %s" + SLIP_ORDER
+
+FETCH_BATCH = 2000
+SLIPS_PER_PAGE = (2, 4)  # columns, rows
+DOOR_LIST_ROWS_PER_PAGE = 40
+
+
+def iter_slip_rows(db, exam_id=None, date_from=None, date_to=None, batch=FETCH_BATCH):
+    """Yield SLIP_COLUMNS tuples of one exam, or of every exam in [date_from, date_to], in exam, hall and seat order."""
+    if exam_id is not None:
+        query, params = Q_SLIPS_FOR_EXAM, (exam_id,)
+    else:
+        query, params = Q_SLIPS_FOR_DATES, (date_from, date_to)
+    with db.connection() as conn:
+        # unbuffered: rows stay on the server until fetched
+        cur = conn.cursor()
+        try:
+            cur.execute(query, params)
+            while True:
+                rows = cur.fetchmany(batch)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            if conn.unread_result:
+                conn.consume_results()  # the caller stopped early
+            cur.close()
+
+
+def _file_stem(row):
+    """'2030-01-01_CS101_Hall_A' for the exam x hall of a slip row."""
+    return re.sub(r"[^\w.-]+", "_", f"{row[3]}_{row[1]}_{row[7]}")
+
+
+def _slip(page, x, y, w, h, row):
+    (_, course_code, course_name, exam_date, start, end, _, hall_name, seat_number, srn, full_name,
+     department, year) = row
+    page.rect(x, y, w, h)
+    top = y + h
+    page.text(x + 12, top - 22, "SEAT SLIP", 12, bold=True)
+    page.text(x + 12, top - 40, f"{course_code} - {course_name}"[:48], 9)
+    page.text(x + 12, top - 54, f"{exam_date}  {_fmt_time(start)}-{_fmt_time(end)}", 9)
+    page.line(x + 12, top - 62, x + w - 12, top - 62)
+    page.text(x + 12, top - 84, str(full_name)[:34], 11, bold=True)
+    page.text(x + 12, top - 100, f"SRN {srn}   {department or ''} year {year or '-'}", 9)
+    page.text(x + 12, top - 128, "Hall", 9)
+    page.text(x + 12, top - 146, str(hall_name)[:22], 14, bold=True)
+    page.text(x + w / 2 + 12, top - 128, "Seat", 9)
+    page.text(x + w / 2 + 12, top - 146, str(seat_number), 14, bold=True)
+
+
+def write_slips_pdf(path, rows):
+    """Seat slips of `rows`, SLIPS_PER_PAGE to an A4 page, in seat order."""
+    cols, per_col = SLIPS_PER_PAGE
+    margin = 30
+    w = (A4[0] - 2 * margin) / cols
+    h = (A4[1] - 2 * margin) / per_col
+    with PdfWriter(path) as pdf:
+        for start in range(0, len(rows), cols * per_col):
+            page = Page()
+            for i, row in enumerate(rows[start:start + cols * per_col]):
+                col, line = i % cols, i // cols
+                _slip(page, margin + col * w + 4, A4[1] - margin - (line + 1) * h + 4, w - 8, h - 8, row)
+            pdf.add_page(page)
+        return len(pdf)
+
+
+def write_door_list_pdf(path, rows):
+    """Door list of one exam x hall: students by SRN with their seat, DOOR_LIST_ROWS_PER_PAGE to a page."""
+    first = rows[0]
+    ordered = sorted(rows, key=lambda r: r[9])
+    pages = (len(ordered) + DOOR_LIST_ROWS_PER_PAGE - 1) // DOOR_LIST_ROWS_PER_PAGE
+    with PdfWriter(path) as pdf:
+        for n in range(pages):
+            page = Page()
+            page.text(40, 800, f"{first[7]} - {first[1]} {first[2]}"[:70], 14, bold=True)
+            page.text(40, 782, f"{first[3]}  {_fmt_time(first[4])}-{_fmt_time(first[5])}   "
+                               f"{len(ordered)} students   page {n + 1}/{pages}", 10)
+            y = 756
+            for x, title in ((40, "#"), (75, "SRN"), (185, "Name"), (450, "Seat"), (500, "Signature")):
+                page.text(x, y, title, 10, bold=True)
+            page.line(40, y - 5, 555, y - 5)
+            for i, row in enumerate(ordered[n * DOOR_LIST_ROWS_PER_PAGE:(n + 1) * DOOR_LIST_ROWS_PER_PAGE]):
+                y -= 17
+                page.text(40, y, n * DOOR_LIST_ROWS_PER_PAGE + i + 1, 9)
+                page.text(75, y, row[9], 9)
+                page.text(185, y, str(row[10])[:44], 9)
+                page.text(450, y, row[8], 9)
+                page.line(500, y - 2, 555, y - 2, 0.3)
+            pdf.add_page(page)
+        return len(pdf)
+
+
+def render_hall_pdfs(out_dir, rows):
+    """Slips and door list PDFs of one exam x hall; returns the number of pages written."""
+    stem = os.path.join(out_dir, _file_stem(rows[0]))
+    return write_slips_pdf(stem + "_slips.pdf", rows) + write_door_list_pdf(stem + "_door_list.pdf", rows)
+
+
+def generate_slips(db, out_dir, exam_id=None, date_from=None, date_to=None, formats=("csv", "pdf"), workers=None):
+    """
+    Write seat slips and door lists of one exam, or of every exam in
+    [date_from, date_to], to `out_dir`: seat_slips.csv and door_lists.csv,
+    and per exam x hall <date>_<course>_<hall>_slips.pdf and _door_list.pdf.
+    PDFs are rendered by `workers` processes (default: one per CPU; 0 renders
+    in this process). Returns counts of slips, halls and PDF pages.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    counts = {"slips": 0, "halls": 0, "pdf_pages": 0}
+    files = []
+    pool = None
+    try:
+        if "csv" in formats:
+            slips_file = open(os.path.join(out_dir, "seat_slips.csv"), "w", newline="", encoding="utf-8")
+            doors_file = open(os.path.join(out_dir, "door_lists.csv"), "w", newline="", encoding="utf-8")
+            files = [slips_file, doors_file]
+            slips_csv, doors_csv = csv.writer(slips_file), csv.writer(doors_file)
+            slips_csv.writerow(SLIP_COLUMNS)
+            doors_csv.writerow(DOOR_LIST_COLUMNS)
+        workers = (os.cpu_count() or 1) if workers is None else workers
+        if "pdf" in formats and workers:
+            pool = ProcessPoolExecutor(workers)
+        # at most two halls per worker in flight, so rendering never falls far behind reading
+        max_pending = 2 * max(workers, 1)
+        pending = set()
+        for _, group in groupby(iter_slip_rows(db, exam_id, date_from, date_to), key=lambda r: (r[0], r[6])):
+            rows = list(group)
+            counts["slips"] += len(rows)
+            counts["halls"] += 1
+            if files:
+                slips_csv.writerows(rows)
+                doors_csv.writerows((r[0], r[1], r[3], _fmt_time(r[4]), r[7], r[9], r[10], r[8])
+                                    for r in sorted(rows, key=lambda r: r[9]))
+            if "pdf" not in formats:
+                continue
+            if not pool:
+                counts["pdf_pages"] += render_hall_pdfs(out_dir, rows)
+                continue
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                counts["pdf_pages"] += sum(f.result() for f in done)
+            pending.add(pool.submit(render_hall_pdfs, out_dir, rows))
+        counts["pdf_pages"] += sum(f.result() for f in wait(pending).done)
+    finally:
+        for f in files:
+            f.close()
+        if pool:
+            pool.shutdown(cancel_futures=True)
+    return counts
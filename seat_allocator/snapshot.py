@@ -0,0 +1,207 @@
+"""
+Columnar snapshots of the allocation tables for analytics: the dashboard and
+ad-hoc queries can run on Parquet files with DuckDB or pandas instead of on
+the live MySQL tables that invigilators are writing to.
+
+    <out_dir>/manifest.json
+    <out_dir>/<table>/00000001-full.parquet
+    <out_dir>/<table>/00000002-delta.parquet ...
+
+Every export reads all tables in one consistent-snapshot transaction,
+through an unbuffered cursor in chunks, so memory stays flat. A full export
+writes one file per table and drops the older ones. An incremental export
+re-reads the small tables (exams, halls, seats) whole and appends a delta
+of the allocations allocated or checked, and the seat checks made, since
+the previous export's watermark. Readers keep the newest version of each
+row by primary key; deleted rows leave the snapshot with the next full
+export.
+
+Needs pyarrow, and duckdb for snapshot_connection; both are imported only
+when used.
+"""
+
+from datetime import datetime
+import json
+import os
+
+from mysql.connector.constants import FieldType
+import pandas as pd
+
+SNAPSHOT_BATCH = 10000
+# re-read this much before the watermark: a row can commit well after its
+# allocated_at/checked_at was set
+SNAPSHOT_OVERLAP_SECONDS = int(os.getenv("SNAPSHOT_OVERLAP_SECONDS", "60"))
+MANIFEST = "manifest.json"
+# each takes (watermark, overlap) once per condition
+Q_ALLOCATIONS_CHANGED = """
+    SELECT * FROM allocations
+    WHERE allocated_at >= %s - INTERVAL %s SECOND
+       OR checked_at >= %s - INTERVAL %s SECOND
+"""
+Q_CHECKS_SINCE = "SELECT * FROM seat_checks WHERE checked_at >= %s - INTERVAL %s SECOND"
+# table -> (primary key, rows changed since the watermark; None: always exported whole)
+SNAPSHOT_TABLES = {
+    "exams": ("exam_id", None),
+    "halls": ("hall_id", None),
+    "seats": ("seat_id", None),
+    "allocations": ("allocation_id", Q_ALLOCATIONS_CHANGED),
+    "seat_checks": ("check_id", Q_CHECKS_SINCE),
+}
+
+
+def _arrow_columns(pa, description):
+    """Arrow schema of a cursor's columns, and a converter per column for values Arrow won't take as they are."""
+    types = {
+        FieldType.TINY: pa.int8(), FieldType.SHORT: pa.int16(), FieldType.INT24: pa.int32(),
+        FieldType.LONG: pa.int32(), FieldType.LONGLONG: pa.int64(), FieldType.YEAR: pa.int16(),
+        FieldType.FLOAT: pa.float32(), FieldType.DOUBLE: pa.float64(),
+        FieldType.DECIMAL: pa.float64(), FieldType.NEWDECIMAL: pa.float64(),
+        FieldType.DATE: pa.date32(), FieldType.DATETIME: pa.timestamp("us"), FieldType.TIMESTAMP: pa.timestamp("us"),
+        FieldType.TIME: pa.time64("us"),
+    }
+    converters = {
+        FieldType.TIME: lambda td: None if td is None else (datetime.min + td).time(),  # TIME arrives as timedelta
+        FieldType.DECIMAL: lambda d: None if d is None else float(d),
+        FieldType.NEWDECIMAL: lambda d: None if d is None else float(d),
+    }
+    schema = pa.schema([(d[0], types.get(d[1], pa.string())) for d in description])
+    return schema, [converters.get(d[1]) for d in description]
+
+
+def _write_parquet(cur, path, batch=SNAPSHOT_BATCH):
+    """Stream the result of the query executed on `cur` to `path` in batches; returns the rows written."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema, converters = _arrow_columns(pa, cur.description)
+    written = 0
+    with pq.ParquetWriter(path + ".tmp", schema, compression="zstd") as writer:
+        while True:
+            rows = cur.fetchmany(batch)
+            if not rows:
+                break
+            columns = zip(*rows)
+            arrays = [pa.array([convert(v) for v in col] if convert else col, type=field.type)
+                      for col, field, convert in zip(columns, schema, converters)]
+            writer.write_batch(pa.record_batch(arrays, schema=schema))
+            written += len(rows)
+    os.replace(path + ".tmp", path)
+    return written
+
+
+def load_manifest(out_dir):
+    """The manifest of the snapshot in `out_dir`, or None when nothing was exported there yet."""
+    try:
+        with open(os.path.join(out_dir, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def export_snapshot(db, out_dir, full=False, batch=SNAPSHOT_BATCH):
+    """
+    Export SNAPSHOT_TABLES to `out_dir`: incrementally from the previous
+    export's watermark, or in full when `full` or when there is none yet.
+    Returns the new manifest; its "exported" maps each table to the rows
+    written by this export.
+    """
+    manifest = load_manifest(out_dir)
+    full = full or manifest is None
+    # numbering continues across full exports, so a new file never replaces one still listed
+    seq = (manifest["seq"] if manifest else 0) + 1
+    tables = manifest["tables"] if manifest else {}
+    exported, stale = {}, []
+    with db.connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+            cur.execute("SELECT NOW()")
+            watermark = cur.fetchone()[0]
+            for table, (key, changed_query) in SNAPSHOT_TABLES.items():
+                os.makedirs(os.path.join(out_dir, table), exist_ok=True)
+                entry = tables.get(table, {"key": key, "files": []})
+                delta = not full and changed_query is not None and bool(entry["files"])
+                name = f"{seq:08d}-{'delta' if delta else 'full'}.parquet"
+                if delta:
+                    since = (datetime.fromisoformat(manifest["watermark"]), SNAPSHOT_OVERLAP_SECONDS)
+                    cur.execute(changed_query, since * changed_query.count("INTERVAL"))
+                else:
+                    cur.execute(f"SELECT * FROM {table}")
+                try:
+                    exported[table] = _write_parquet(cur, os.path.join(out_dir, table, name), batch)
+                finally:
+                    if conn.unread_result:
+                        conn.consume_results()  # the write failed half-way
+                if not delta:
+                    stale += [os.path.join(out_dir, table, f) for f in entry["files"]]
+                    entry = {"key": key, "files": []}
+                entry["files"].append(name)
+                tables[table] = entry
+        finally:
+            cur.close()
+            conn.rollback()
+    new = {"seq": seq, "watermark": watermark.isoformat(), "exported_at": datetime.now().isoformat(timespec="seconds"),
+           "full_at": datetime.now().isoformat(timespec="seconds") if full else manifest["full_at"],
+           "full": full, "tables": tables, "exported": exported}
+    with open(os.path.join(out_dir, MANIFEST + ".tmp"), "w", encoding="utf-8") as f:
+        json.dump(new, f, indent=2)
+    os.replace(os.path.join(out_dir, MANIFEST + ".tmp"), os.path.join(out_dir, MANIFEST))
+    # only now: readers of the old manifest may still be reading these
+    for path in stale:
+        os.remove(path)
+    return new
+
+
+def read_snapshot(out_dir, table, columns=None):
+    """`table` of the snapshot in `out_dir` as a DataFrame, with the newest version of each row."""
+    import pyarrow.parquet as pq
+
+    manifest = load_manifest(out_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No snapshot in {out_dir}")
+    entry = manifest["tables"][table]
+    if columns is not None and entry["key"] not in columns:
+        columns = [entry["key"]] + list(columns)
+    frames = [pq.read_table(os.path.join(out_dir, table, f), columns=columns).to_pandas() for f in entry["files"]]
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    if len(frames) > 1:
+        df = df.drop_duplicates(entry["key"], keep="last").reset_index(drop=True)
+    return df
+
+
+def _sql_string(text):
+    return "'" + text.replace("'", "''") + "'"
+
+
+def snapshot_connection(out_dir):
+    """
+    In-memory DuckDB connection with one view per table of the snapshot in
+    `out_dir` (newest version of each row), for SQL over the Parquet files.
+    File and network access is then limited to reading those files and the
+    configuration is locked, so SQL typed by users cannot read other files
+    (read_csv('/etc/passwd')), fetch URLs or write anywhere.
+    DuckDB connections are not shared between threads; use .cursor() per thread.
+    """
+    import duckdb
+
+    manifest = load_manifest(out_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No snapshot in {out_dir}")
+    con = duckdb.connect()
+    paths = []
+    for table, entry in manifest["tables"].items():
+        files = [os.path.abspath(os.path.join(out_dir, table, f)) for f in entry["files"]]
+        paths += files
+        files = [_sql_string(f) for f in files]
+        if len(files) == 1:
+            source = f"SELECT * FROM read_parquet({files[0]})"
+        else:
+            # file names are zero-padded sequence numbers: the last file holds the newest version
+            source = (f"SELECT * EXCLUDE (filename) FROM read_parquet([{', '.join(files)}], filename = true, union_by_name = true) "
+                      f"QUALIFY row_number() OVER (PARTITION BY {entry['key']} ORDER BY filename DESC) = 1")
+        con.execute(f"CREATE VIEW {table} AS {source}")
+    # allowed_paths rather than allowed_directories: a directory would also take COPY ... TO and ATTACH
+    con.execute(f"SET allowed_paths = [{', '.join(_sql_string(p) for p in paths)}]")
+    con.execute("SET enable_external_access = false")
+    con.execute("SET lock_configuration = true")
+    return con
@@ -0,0 +1,28 @@
+"""Small in-memory inventories for the engine tests: halls of labelled seats and cohorts of students."""
+
+import pandas as pd
+
+from seat_allocator.grid import HallGrid
+
+
+def hall(hall_id, labels, first_id=1, accessible=(), seat_ids=None):
+    """HallGrid of seats `labels` with `seat_ids`, or consecutive seat ids from `first_id`."""
+    return HallGrid(hall_id, pd.DataFrame({
+        "seat_id": list(seat_ids) if seat_ids is not None else range(first_id, first_id + len(labels)),
+        "hall_id": hall_id,
+        "seat_number": labels,
+        "is_accessible": [label in accessible for label in labels],
+        "remarks": None,
+    }))
+
+
+def students(*cohorts, first_id=1, needs_accessible=()):
+    """One student per cohort entry, e.g. students("CS", "CS", "EE"); all in year 1, SRN S<student_id>."""
+    ids = range(first_id, first_id + len(cohorts))
+    return pd.DataFrame({
+        "student_id": ids,
+        "srn": [f"S{i}" for i in ids],
+        "department": list(cohorts),
+        "year_of_study": 1,
+        "needs_accessible_seat": [i in needs_accessible for i in ids],
+    })
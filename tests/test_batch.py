@@ -0,0 +1,103 @@
+from datetime import date
+
+import pandas as pd
+
+from seat_allocator.engine import find_overlapping_exams, plan_batch_allocation
+
+from factories import hall
+
+DAY = date(2030, 1, 6)
+
+
+def exams(*rows):
+    """Exams from (exam_id, start, end[, exam_date]) rows; times as 'HH:MM', as MySQL TIME columns arrive (timedelta)."""
+    return pd.DataFrame([{"exam_id": exam_id, "course_code": f"C{exam_id}", "exam_date": day[0] if day else DAY,
+                          "start_time": pd.Timedelta(f"{start}:00"), "end_time": pd.Timedelta(f"{end}:00")}
+                         for exam_id, start, end, *day in rows])
+
+
+def inventory(exam_rows, halls, assignments, student_ids, allocations=()):
+    return {
+        "exams": exam_rows,
+        "hall_assignments": pd.DataFrame(assignments, columns=["exam_id", "hall_id"]),
+        "allocations": pd.DataFrame(list(allocations), columns=["exam_id", "student_id", "seat_id"]),
+        "students": pd.DataFrame({"student_id": list(student_ids)}),
+        "grids": {grid.hall_id: grid for grid in halls},
+    }
+
+
+def test_touching_exams_do_not_overlap():
+    assert find_overlapping_exams(exams((1, "09:00", "12:00"), (2, "12:00", "15:00"))) == []
+
+
+def test_overlap_by_a_minute():
+    assert find_overlapping_exams(exams((1, "09:00", "12:00"), (2, "11:59", "15:00"))) == [(1, 2)]
+
+
+def test_same_and_nested_windows_overlap():
+    pairs = find_overlapping_exams(exams((1, "09:00", "12:00"), (2, "09:00", "12:00"), (3, "10:00", "11:00")))
+    assert sorted(pairs) == [(1, 2), (1, 3), (2, 3)]
+
+
+def test_same_times_on_other_days_do_not_overlap():
+    pairs = find_overlapping_exams(exams((1, "09:00", "12:00"), (2, "09:00", "12:00", date(2030, 1, 7))))
+    assert pairs == []
+
+
+def test_exam_ending_early_does_not_link_later_ones():
+    # 1 ends before 3 starts, so 1 and 3 do not clash, though both overlap 2
+    pairs = find_overlapping_exams(exams((1, "09:00", "10:00"), (2, "09:30", "12:00"), (3, "10:00", "11:00")))
+    assert sorted(pairs) == [(1, 2), (2, 3)]
+
+
+def test_seats_blocked_across_overlapping_exams():
+    grid = hall(1, ["A1", "A2", "A3", "A4"])
+    inv = inventory(exams((1, "09:00", "12:00"), (2, "10:00", "13:00"), (3, "12:00", "15:00")),
+                    [grid], [(1, 1), (2, 1), (3, 1)], [1, 2, 3])
+    plan = plan_batch_allocation(inv)
+    seats_of = {eid: [seat for e, _, seat in plan["rows"] if e == eid] for eid in (1, 2, 3)}
+    assert seats_of[1] == [1, 2, 3]
+    # 2 overlaps 1: only the seat 1 left free
+    assert seats_of[2] == [4]
+    # 3 touches 1 (no clash) but overlaps 2: everything except seat 4
+    assert seats_of[3] == [1, 2, 3]
+    summary = plan["summary"].set_index("exam_id")
+    assert summary.loc[2, "allocated"] == 1 and summary.loc[2, "unplaced_students"] == 2
+    assert summary.loc[2, "free_seats_left"] == 0
+    assert summary.loc[3, "window"] == "12:00-15:00"
+
+
+def test_existing_allocations_block_seats_and_students():
+    grid = hall(1, ["A1", "A2", "A3"])
+    inv = inventory(exams((1, "09:00", "12:00"), (2, "11:00", "13:00")), [grid], [(1, 1), (2, 1)], [1, 2],
+                    allocations=[(1, 1, 3)])
+    plan = plan_batch_allocation(inv)
+    # student 1 already sits exam 1 on seat 3; exam 2 may not use seat 3 either
+    assert [row for row in plan["rows"] if row[0] == 1] == [(1, 2, 1)]
+    assert [row for row in plan["rows"] if row[0] == 2] == [(2, 1, 2)]
+    assert plan["summary"].set_index("exam_id").loc[2, "unplaced_students"] == 1
+
+
+def test_clash_report():
+    halls = [hall(1, ["A1", "A2"]), hall(2, ["A1", "A2"], first_id=10)]
+    inv = inventory(exams((1, "09:00", "12:00"), (2, "11:30", "13:00"), (3, "14:00", "16:00")),
+                    halls, [(1, 1), (1, 2), (2, 2), (3, 1)], [1, 2, 3])
+    plan = plan_batch_allocation(inv)
+    clashes = plan["clashes"]
+    assert len(clashes) == 1
+    clash = clashes.iloc[0]
+    assert (clash["exam_a"], clash["course_a"], clash["exam_b"], clash["course_b"]) == (1, "C1", 2, "C2")
+    assert clash["exam_date"] == DAY
+    assert (clash["window_a"], clash["window_b"]) == ("09:00-12:00", "11:30-13:00")
+    assert clash["shared_halls"] == "2"
+    # exam 1 takes both seats of hall 1 and seat 10; exam 2 is left seat 11 of hall 2, for student 1
+    assert [row for row in plan["rows"] if row[0] == 2] == [(2, 1, 11)]
+    assert clash["students_in_both"] == 1
+
+
+def test_clash_counts_students_seated_in_both():
+    halls = [hall(1, ["A1", "A2"]), hall(2, ["A1", "A2"], first_id=10)]
+    inv = inventory(exams((1, "09:00", "12:00"), (2, "11:00", "13:00")), halls, [(1, 1), (2, 2)], [1, 2])
+    clash = plan_batch_allocation(inv)["clashes"].iloc[0]
+    assert clash["shared_halls"] == ""
+    assert clash["students_in_both"] == 2
@@ -0,0 +1,119 @@
+import pytest
+
+from seat_allocator.engine import ALLOCATION_RULES, NoAdjacentSameCohort, ReserveAccessibleSeats, SpacedSeating, \
+    make_rules, solve_allocation
+
+from factories import hall, students
+
+
+def seated_departments(result, studs):
+    """{seat_id: department} of the pairs in `result`."""
+    dept = dict(zip(studs["student_id"], studs["department"]))
+    return {seat_id: dept[student_id] for student_id, seat_id in result["pairs"]}
+
+
+def test_make_rules_builds_registered_rules():
+    assert set(ALLOCATION_RULES) == {"mix_cohorts", "accessible", "spacing"}
+    rules = make_rules(["mix_cohorts", "accessible", "spacing"])
+    assert [type(r) for r in rules] == [NoAdjacentSameCohort, ReserveAccessibleSeats, SpacedSeating]
+
+
+def test_make_rules_unknown_key():
+    with pytest.raises(KeyError):
+        make_rules(["no_such_rule"])
+
+
+def test_without_rules_every_student_is_seated_in_row_major_order():
+    grid = hall(1, ["B1", "A2", "A1", "B2"])
+    result = solve_allocation(students("CS", "CS", "EE"), [grid], [])
+    assert result["pairs"] == [(1, grid.cells[(0, 1)]), (2, grid.cells[(0, 2)]), (3, grid.cells[(1, 1)])]
+    assert result["unplaced"] == []
+    assert result["left_empty"] == 0
+
+
+def test_largest_cohort_spread_through_the_row():
+    studs = students("EE", "CS", "CS", "CS", "EE", "ME")
+    grid = hall(1, ["A1", "A2", "A3", "A4", "A5", "A6"])
+    result = solve_allocation(studs, [grid], [NoAdjacentSameCohort()])
+    by_seat = seated_departments(result, studs)
+    # CS is the largest cohort: it takes the first seat and every seat it may take after
+    assert [by_seat[sid] for sid in grid.seat_ids] == ["CS", "EE", "CS", "EE", "CS", "ME"]
+    assert result["unplaced"] == [] and result["left_empty"] == 0
+
+
+def test_no_two_same_cohort_students_adjacent():
+    studs = students(*(["CS"] * 5 + ["EE"] * 4 + ["ME"] * 3))
+    grid = hall(1, [f"{row}{n}" for row in "ABCD" for n in (1, 2, 3)])
+    result = solve_allocation(studs, [grid], [NoAdjacentSameCohort()])
+    by_seat = seated_departments(result, studs)
+    for seat_id, dept in by_seat.items():
+        for neighbour in grid.neighbours[seat_id]:
+            assert by_seat.get(neighbour) != dept
+    # greedy, not optimal: every seat is either filled or counted as left empty
+    assert len(result["pairs"]) + len(result["unplaced"]) == len(studs)
+    assert len(result["pairs"]) + result["left_empty"] == len(grid)
+
+
+def test_occupied_seats_count_as_neighbours():
+    grid = hall(1, ["A1", "A2", "A3"])
+    occupied = {grid.cells[(0, 2)]: {"student_id": 99, "department": "CS", "year_of_study": 1,
+                                     "needs_accessible_seat": False}}
+    studs = students("CS", "EE")
+    result = solve_allocation(studs, [grid], [NoAdjacentSameCohort()], occupied)
+    # A1 and A3 are next to the CS student already on A2: the CS student fits on neither
+    assert result["pairs"] == [(2, grid.cells[(0, 1)])]
+    assert result["unplaced"] == [1]
+    assert result["left_empty"] == 1
+
+
+def test_seat_no_cohort_may_take_is_left_empty():
+    studs = students("CS", "CS", "CS")
+    grid = hall(1, ["A1", "A2", "A3"])
+    result = solve_allocation(studs, [grid], [NoAdjacentSameCohort()])
+    assert [seat for _, seat in result["pairs"]] == [grid.cells[(0, 1)], grid.cells[(0, 3)]]
+    assert result["left_empty"] == 1
+    assert result["unplaced"] == [3]
+
+
+def test_unusable_seats_are_not_counted_as_left_empty():
+    studs = students("CS", "EE", "ME")
+    grid = hall(1, ["A1", "A2", "B1", "B2"])
+    result = solve_allocation(studs, [grid], [SpacedSeating()])
+    # checkerboard: only A2 (row 0, col 2) and B1 (row 1, col 1) are usable
+    assert sorted(seat for _, seat in result["pairs"]) == sorted([grid.cells[(0, 2)], grid.cells[(1, 1)]])
+    assert result["left_empty"] == 0
+    assert result["unplaced"] == [3]
+
+
+def test_accessible_seats_kept_for_flagged_students():
+    studs = students("CS", "EE", "ME", needs_accessible=(3,))
+    grid = hall(1, ["A1", "A2", "A3", "A4"], accessible=("A1", "A3"))
+    result = solve_allocation(studs, [grid], [ReserveAccessibleSeats()])
+    seat_of = {student_id: seat for student_id, seat in result["pairs"]}
+    assert seat_of == {3: grid.cells[(0, 1)], 1: grid.cells[(0, 2)], 2: grid.cells[(0, 4)]}
+    # A3 is accessible and nobody flagged is left for it
+    assert result["left_empty"] == 1
+    assert result["unplaced"] == []
+
+
+def test_seats_after_the_last_student_are_not_counted():
+    studs = students("CS", "EE")
+    grid = hall(1, ["A1", "A2", "A3", "A4"], accessible=("A4",))
+    result = solve_allocation(studs, [grid], [ReserveAccessibleSeats()])
+    assert result["pairs"] == [(1, grid.cells[(0, 1)]), (2, grid.cells[(0, 2)])]
+    assert result["left_empty"] == 0
+
+
+def test_flagged_student_without_accessible_seat_is_unplaced():
+    studs = students("CS", "EE", needs_accessible=(2,))
+    grid = hall(1, ["A1", "A2"])
+    result = solve_allocation(studs, [grid], [ReserveAccessibleSeats()])
+    assert result["pairs"] == [(1, grid.cells[(0, 1)])]
+    assert result["unplaced"] == [2]
+    assert result["left_empty"] == 1
+
+
+def test_halls_are_filled_in_the_order_given():
+    first, second = hall(2, ["A1", "A2"], first_id=10), hall(1, ["A1", "A2"], first_id=20)
+    result = solve_allocation(students("CS", "CS", "CS"), [first, second], [])
+    assert [seat for _, seat in result["pairs"]] == [10, 11, 20]
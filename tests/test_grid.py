@@ -0,0 +1,56 @@
+import pytest
+
+from seat_allocator.grid import parse_seat_number, row_label
+
+from factories import hall
+
+
+@pytest.mark.parametrize("label, parsed", [
+    ("A10", ("A", 10)),
+    ("b-3", ("B", 3)),
+    (" AA 2 ", ("AA", 2)),
+    ("12", ("", 12)),
+    ("Stage", ("STAGE", 0)),
+    ("A1b", ("A1B", 0)),
+])
+def test_parse_seat_number(label, parsed):
+    assert parse_seat_number(label) == parsed
+
+
+def test_row_label():
+    assert [row_label(i) for i in (0, 25, 26, 27, 701, 702)] == ["A", "Z", "AA", "AB", "ZZ", "AAA"]
+
+
+def test_rows_ordered_a_to_z_then_aa():
+    grid = hall(1, ["AA1", "B1", "Z1", "A1", "Stage"])
+    assert grid.row_labels == ["A", "B", "Z", "AA", "STAGE"]
+    assert grid.seat_ids == [4, 2, 3, 1, 5]
+
+
+def test_seats_in_row_major_order_by_number():
+    grid = hall(1, ["A10", "B1", "A2", "A1"])
+    assert grid.row_seat_ids("A") == [4, 3, 1]
+    assert grid.row_seat_ids("B") == [2]
+    assert grid.row_seat_ids("C") == []
+    assert grid.seat_at(0, 10) == 1 and grid.seat_at(0, 3) is None
+
+
+def test_unparsed_label_comes_first_in_its_row():
+    grid = hall(1, ["A1", "A", "A2"])
+    assert grid.row_seat_ids("A") == [2, 1, 3]
+    assert grid.by_id[2]["col"] == 0
+
+
+def test_colliding_labels_shift_the_row_right():
+    # 'A01' and 'A1' are both column 1: 'A01' sorts first, 'A1' moves to 2 and pushes 'A2' to 3
+    grid = hall(1, ["A1", "A01", "A2"])
+    assert grid.cells == {(0, 1): 2, (0, 2): 1, (0, 3): 3}
+    assert len(grid) == 3
+
+
+def test_neighbours_left_right_front_behind():
+    grid = hall(1, ["A1", "A2", "A3", "B1", "B3"])
+    assert set(grid.neighbours[2]) == {1, 3}
+    assert set(grid.neighbours[1]) == {2, 4}
+    # B2 is missing: B1 and B3 are not neighbours
+    assert set(grid.neighbours[5]) == {3}
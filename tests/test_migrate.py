@@ -0,0 +1,56 @@
+from migrations.migrate import split_statements
+
+
+def test_semicolon_delimited_statements():
+    assert split_statements("CREATE TABLE t (a INT);\n\nINSERT INTO t VALUES (1); INSERT INTO t VALUES (2);\n") == [
+        "CREATE TABLE t (a INT)", "INSERT INTO t VALUES (1)", "INSERT INTO t VALUES (2)"]
+
+
+def test_procedure_body_under_delimiter():
+    sql = ("DELIMITER //\n"
+           "CREATE PROCEDURE p()\n"
+           "BEGIN\n"
+           "  UPDATE t SET a = 1;\n"
+           "  SELECT a FROM t;\n"
+           "END //\n"
+           "DELIMITER ;\n"
+           "CALL p();\n")
+    assert split_statements(sql) == ["CREATE PROCEDURE p()\nBEGIN\n  UPDATE t SET a = 1;\n  SELECT a FROM t;\nEND",
+                                     "CALL p()"]
+
+
+def test_delimiter_inside_string_literals():
+    sql = ("INSERT INTO t VALUES ('a;b'), ('ends with;\n"
+           "next line'), ('it''s; \\'quoted;\\'');\n"
+           "DELIMITER //\n"
+           "INSERT INTO t VALUES (\"http://host//\"), ('x //\n"
+           "') //\n"
+           "DELIMITER ;\n")
+    assert split_statements(sql) == [
+        "INSERT INTO t VALUES ('a;b'), ('ends with;\nnext line'), ('it''s; \\'quoted;\\'')",
+        "INSERT INTO t VALUES (\"http://host//\"), ('x //\n')"]
+
+
+def test_delimiter_inside_quoted_identifier():
+    assert split_statements("SELECT 1 AS `a;b`;") == ["SELECT 1 AS `a;b`"]
+
+
+def test_comments():
+    sql = ("-- header, not a statement;\n"
+           "CREATE TABLE t (\n"
+           "  a INT, -- first column;\n"
+           "  b INT  # second column;\n"
+           ");  -- trailing comment\n"
+           "/* block; comment */ SELECT 1;\n"
+           "-- comment-only tail;\n")
+    assert split_statements(sql) == [
+        "-- header, not a statement;\nCREATE TABLE t (\n  a INT, -- first column;\n  b INT  # second column;\n)",
+        "-- trailing comment\n/* block; comment */ SELECT 1"]
+
+
+def test_double_dash_without_space_is_not_a_comment():
+    assert split_statements("SELECT 1--1;\nSELECT 2;") == ["SELECT 1--1", "SELECT 2"]
+
+
+def test_last_statement_without_delimiter():
+    assert split_statements("SELECT 1;\nSELECT 2\n") == ["SELECT 1", "SELECT 2"]
@@ -0,0 +1,79 @@
+from contextlib import contextmanager
+
+import pytest
+
+from seat_allocator.allocation import commit_plan
+from seat_allocator.engine import greedy_plan, inventory_fingerprint
+
+SEATS = [(10, 1, "A1"), (11, 1, "A2"), (20, 2, "A1")]
+
+
+class InventoryDB:
+    """Database stand-in for commit_plan: serves an exam's unallocated students and free seats, records inserts."""
+
+    def __init__(self, students, seats):
+        self.students, self.seats, self.inserted = students, seats, []
+
+    def reserve_ids(self, table, count):
+        return 1
+
+    @contextmanager
+    def connection(self):
+        yield self
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=None):
+        self.result = [(s,) for s in self.students] if "FROM students" in sql else self.seats
+
+    def executemany(self, sql, params):
+        self.inserted.extend(params)
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+    commit = rollback = close
+
+
+def test_fingerprint_stable_for_the_same_inventory():
+    assert greedy_plan(5, [1, 2], SEATS).fingerprint == greedy_plan(5, [1, 2], list(SEATS)).fingerprint
+    assert inventory_fingerprint(5, [1, 2], [10]) != inventory_fingerprint(6, [1, 2], [10])
+
+
+def test_fingerprint_changes_when_a_student_is_added():
+    assert greedy_plan(5, [1, 2], SEATS).fingerprint != greedy_plan(5, [1, 2, 3], SEATS).fingerprint
+
+
+def test_fingerprint_changes_when_a_seat_is_added():
+    assert greedy_plan(5, [1, 2], SEATS).fingerprint != greedy_plan(5, [1, 2], SEATS + [(21, 2, "A2")]).fingerprint
+
+
+def test_fingerprint_changes_when_an_allocation_is_added():
+    # another writer seats student 2 on seat 11: both leave the exam's unallocated/free lists
+    before = greedy_plan(5, [1, 2, 3], SEATS)
+    after = greedy_plan(5, [1, 3], [SEATS[0], SEATS[2]])
+    assert before.fingerprint != after.fingerprint
+
+
+def test_commit_plan_writes_the_plan_when_inventory_unchanged():
+    plan = greedy_plan(5, [1, 2], SEATS)
+    db = InventoryDB([1, 2], SEATS)
+    assert commit_plan(db, plan) == 2
+    assert db.inserted == [(1, 5, 1, 10), (2, 5, 2, 11)]
+
+
+@pytest.mark.parametrize("students, seats", [
+    ([1, 2, 3], SEATS),
+    ([1, 2], SEATS + [(21, 2, "A2")]),
+    ([1], SEATS[1:]),
+])
+def test_commit_plan_rejects_a_stale_plan(students, seats):
+    plan = greedy_plan(5, [1, 2], SEATS)
+    db = InventoryDB(students, seats)
+    with pytest.raises(ValueError, match="plan again"):
+        commit_plan(db, plan)
+    assert db.inserted == []
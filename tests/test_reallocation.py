@@ -0,0 +1,96 @@
+import pandas as pd
+
+from seat_allocator.engine import ReserveAccessibleSeats, plan_reallocation
+
+from factories import hall, students
+
+ALLOC_COLUMNS = ["allocation_id", "seat_id", "hall_id", "seat_number",
+                 "student_id", "srn", "department", "year_of_study", "needs_accessible_seat"]
+
+
+def allocations(*rows):
+    """
+    Current allocations of an exam, as load_exam_repair reads them, from
+    (allocation_id, seat_id, hall_id, seat_number, student_id[, needs_accessible])
+    rows. A student_id of None is a deleted student.
+    """
+    recs = []
+    for allocation_id, seat_id, hall_id, seat_number, student_id, *needs in rows:
+        recs.append((allocation_id, seat_id, hall_id, seat_number, student_id,
+                     None if student_id is None else f"S{student_id}", None if student_id is None else "CS",
+                     None if student_id is None else 1, bool(needs and needs[0])))
+    return pd.DataFrame(recs, columns=ALLOC_COLUMNS)
+
+
+def no_students():
+    return students()
+
+
+def targets(plan):
+    return [seat for _, seat in plan["moves"]] + [seat for _, seat in plan["adds"]]
+
+
+def test_valid_seating_is_left_alone():
+    grid = hall(1, ["A1", "A2"])
+    plan = plan_reallocation(allocations((101, 1, 1, "A1", 1), (102, 2, 1, "A2", 2)), no_students(), [grid], [])
+    assert plan["moves"] == [] and plan["adds"] == [] and plan["releases"] == []
+    assert plan["diff"].empty
+
+
+def test_removed_seat_moves_its_student_only():
+    # A2 (seat 2) was deleted from the hall
+    grid = hall(1, ["A1", "A3", "A4"], seat_ids=[1, 3, 4])
+    plan = plan_reallocation(allocations((101, 1, 1, "A1", 1), (102, 2, 1, "A2", 2)), no_students(), [grid], [])
+    assert plan["moves"] == [(102, 3)]
+    assert plan["adds"] == [] and plan["releases"] == []
+    row = plan["diff"].iloc[0]
+    assert (row["action"], row["allocation_id"], row["srn"], row["from_seat"], row["to_hall"], row["to_seat"]) == \
+        ("move", 102, "S2", "A2", 1, "A3")
+
+
+def test_unassigned_hall_moves_students_into_the_free_seats_left():
+    grid = hall(1, ["A1", "A2"])
+    allocs = allocations((101, 1, 1, "A1", 1),
+                         (201, 11, 2, "A1", 2), (202, 12, 2, "A2", 3), (203, 13, 2, "A3", 4))
+    plan = plan_reallocation(allocs, no_students(), [grid], [])
+    assert plan["moves"] == [(201, 2)]
+    stranded = plan["diff"][plan["diff"]["action"] == "stranded"]
+    assert sorted(stranded["allocation_id"]) == [202, 203]
+    assert set(stranded["from_hall"]) == {2}
+    assert stranded["to_seat"].isna().all()
+
+
+def test_deleted_student_is_released_and_the_seat_reused():
+    grid = hall(1, ["A1", "A2"])
+    allocs = allocations((101, 1, 1, "A1", None), (102, 2, 1, "A2", 2))
+    plan = plan_reallocation(allocs, students("EE", first_id=3), [grid], [])
+    assert plan["releases"] == [101]
+    assert plan["moves"] == []
+    assert plan["adds"] == [(3, 1)]
+    actions = plan["diff"].set_index("action")
+    assert actions.loc["release", "from_seat"] == "A1" and pd.isna(actions.loc["release", "student_id"])
+    assert actions.loc["add", "srn"] == "S3"
+
+
+def test_student_on_a_seat_a_rule_forbids_is_moved():
+    grid = hall(1, ["A1", "A2", "A3"], accessible=("A1",))
+    plan = plan_reallocation(allocations((101, 1, 1, "A1", 1)), no_students(), [grid], [ReserveAccessibleSeats()])
+    assert plan["moves"] == [(101, 2)]
+
+
+def test_no_move_or_add_targets_a_taken_seat():
+    grid = hall(1, ["A1", "A2", "A3", "B1", "B2", "B3"], accessible=("A1",))
+    allocs = allocations((101, 1, 1, "A1", 1),                      # unflagged on an accessible seat: stranded
+                         (102, 2, 1, "A2", 2), (103, 4, 1, "B1", 3),  # stay
+                         (104, 99, 1, "C1", 4),                     # seat deleted
+                         (105, 5, 1, "B2", None))                   # student deleted
+    waiting = students("EE", "EE", "ME", first_id=5, needs_accessible=(7,))
+    plan = plan_reallocation(allocs, waiting, [grid], [ReserveAccessibleSeats()])
+    kept = {2, 4}
+    assert not kept & set(targets(plan))
+    assert len(targets(plan)) == len(set(targets(plan)))
+    # the stranded allocation's seat still counts as taken this run, even for the flagged student
+    assert 1 not in targets(plan)
+    assert 7 in set(plan["diff"].loc[plan["diff"]["action"] == "unplaced", "student_id"])
+    assert plan["releases"] == [105]
+    assert {a for a, _ in plan["moves"]} == {101, 104}